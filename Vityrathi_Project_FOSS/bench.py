@@ -0,0 +1,552 @@
+"""
+Benchmark suite for Flight Operational Support Suite
+
+Generates a synthetic fleet, maintenance history, weather observations and
+fuel records at a configurable scale into a scratch copy of the three
+SQLite schemas (created by each module's init_db()), then times the real
+hot paths and prints the results as JSON:
+
+    python bench.py --aircraft 10000 --maintenance 200000 --weather 500000 --fuel 100000
+    python bench.py --output results.json
+
+The databases in databases/ are never touched.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import clearance_rules
+import columnar
+import db
+import fleet_review
+import fuel_calc
+import maintenance
+import paging
+import preflight
+import profiling
+import range_model
+import snapshot
+import stations
+import weather
+import weather_server
+
+# ------------------------------------------------------ #
+# Synthetic data
+# ------------------------------------------------------ #
+MANUFACTURERS = {
+    "Airbus": ("A319-100", "A320-214", "A320neo", "A321-200", "A330-300", "A350-900", "A380-800"),
+    "Boeing": ("737-800", "737-MAX-8", "747-400", "767-300ER", "777-300ER", "787-9"),
+    "Embraer": ("E170", "E175", "E190", "E195-E2"),
+    "ATR": ("ATR42-600", "ATR72-600"),
+    "Bombardier": ("CRJ700", "CRJ900", "Q400"),
+}
+TASKS = (
+    "A-check", "C-check", "Oil leak repair", "Tyre replacement", "Brake wear inspection",
+    "Avionics calibration", "Flap actuator repair", "Engine borescope", "Cabin pressure test",
+    "Landing gear service", "APU overhaul", "Bird strike inspection",
+)
+ENGINEERS = (
+    "Rahul Kulkarni", "Naveen Rao", "Priya Sharma", "Anita Desai", "Vikram Singh",
+    "Meera Iyer", "Arjun Patel", "Kavya Nair", "Sanjay Gupta", "Deepa Menon",
+)
+STATIONS = ("VIDP", "VABB", "VOBL", "VECC", "VOMM", "VOHS", "VAAH", "VILK")
+START_DATE = date(2015, 1, 1)
+DAY_SPAN = 365 * 10
+
+
+def _random_date(rng):
+    return (START_DATE + timedelta(days=rng.randrange(DAY_SPAN))).isoformat()
+
+
+def generate_aircraft(rng, count):
+    """Yields (name, model, manufacture_year) rows."""
+    makers = list(MANUFACTURERS)
+    for i in range(count):
+        maker = rng.choice(makers)
+        model = rng.choice(MANUFACTURERS[maker])
+        reg = "VT-" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3))
+        yield (f"{maker} {model} {reg}{i}", model, rng.randint(1990, 2025))
+
+
+def generate_maintenance(rng, count, aircraft_count):
+    """Yields (aircraft_id, description, date, engineer, cost, status) rows."""
+    for _ in range(count):
+        status = "completed" if rng.random() < 0.8 else "pending"
+        cost = round(rng.lognormvariate(10.5, 1.0), 2)
+        yield (rng.randint(1, aircraft_count), rng.choice(TASKS), _random_date(rng),
+               rng.choice(ENGINEERS), cost, status)
+
+
+def generate_weather(rng, count):
+    """Yields (wind, temp, humidity, visibility, date, clearance, station) rows."""
+    for _ in range(count):
+        wind = round(rng.gammavariate(2.0, 8.0), 1)
+        temp = round(rng.gauss(24, 12), 1)
+        hum = round(rng.uniform(15, 100), 1)
+        vis = round(min(rng.expovariate(1 / 8), 20), 1)
+        yield (wind, temp, hum, vis, _random_date(rng), weather.evaluate_clearance(wind, temp, hum, vis),
+               rng.choice(STATIONS))
+
+
+def generate_fuel(rng, count, aircraft_count):
+    """Yields (fuel, burn, speed, range, date, aircraft_id) rows."""
+    for _ in range(count):
+        fuel = round(rng.uniform(2000, 60000), 0)
+        burn = round(rng.uniform(500, 4000), 0)
+        speed = round(rng.uniform(400, 950), 0)
+        yield (fuel, burn, speed, fuel / burn * speed, _random_date(rng), rng.randint(1, aircraft_count))
+
+
+def _bulk_insert(conn, sql, rows, batch=10000):
+    # Inserts a row generator in batched transactions; returns (count, seconds).
+    start = time.perf_counter()
+    count = 0
+    buffer = []
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) == batch:
+            with conn:
+                conn.executemany(sql, buffer)
+            count += len(buffer)
+            buffer = []
+    if buffer:
+        with conn:
+            conn.executemany(sql, buffer)
+        count += len(buffer)
+    return count, time.perf_counter() - start
+
+
+def populate(rng, scale):
+    """Fills the three databases; returns generation stats per table."""
+    results = {}
+    results["aircraft"] = _bulk_insert(
+        maintenance.get_db(),
+        "INSERT INTO aircraft (name, model, manufacture_year) VALUES (?, ?, ?)",
+        generate_aircraft(rng, scale["aircraft"]))
+    results["maintenance"] = _bulk_insert(
+        maintenance.get_db(),
+        "INSERT INTO maintenance (aircraft_id, description, date, engineer, cost, status) VALUES (?, ?, ?, ?, ?, ?)",
+        generate_maintenance(rng, scale["maintenance"], max(scale["aircraft"], 1)))
+    results["weather"] = _bulk_insert(
+        weather.get_db(), weather.INSERT_WEATHER_SQL, generate_weather(rng, scale["weather"]))
+    results["fueldata"] = _bulk_insert(
+        fuel_calc.get_db(), fuel_calc.INSERT_FUEL_SQL, generate_fuel(rng, scale["fuel"], max(scale["aircraft"], 1)))
+
+    return {
+        table: {"rows": count, "seconds": round(secs, 4),
+                "rows_per_sec": round(count / secs, 1) if secs else None}
+        for table, (count, secs) in results.items()
+    }
+
+
+# ------------------------------------------------------ #
+# Timing
+# ------------------------------------------------------ #
+def _summarize(samples):
+    # Latency summary in milliseconds.
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": round(ms[len(ms) // 2], 4),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+        "min_ms": round(ms[0], 4),
+        "max_ms": round(ms[-1], 4),
+    }
+
+
+def time_op(fn, args_list):
+    """Calls fn(*args) for each entry and returns its latency summary."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return _summarize(samples)
+
+
+def _first_page(conn, table, columns, **options):
+    return next(paging.iter_pages(conn, table, columns, **options), [])
+
+
+def _drain(conn, table, columns, **options):
+    for _ in paging.iter_pages(conn, table, columns, page_size=1000, **options):
+        pass
+
+
+def _replay(records, rows, durability):
+    # Scripted entry through the record APIs under one batching setting.
+    previous = (db.batch_rows, db.batch_interval * 1000, db.durability)
+    db.configure_writes(rows, 200, durability)
+    start = time.perf_counter()
+    for add, args in records:
+        add(*args)
+    db.flush()
+    seconds = time.perf_counter() - start
+    db.configure_writes(*previous)
+    return len(records) / seconds
+
+
+def _replay_unshared(records):
+    # The original write path, per record: connect, insert, commit, close.
+    start = time.perf_counter()
+    for path, sql, params in records:
+        conn = sqlite3.connect(path)
+        conn.execute(sql, params)
+        conn.commit()
+        conn.close()
+    return len(records) / (time.perf_counter() - start)
+
+
+def _station_writers(paths, rows):
+    # One thread per station, each committing rows one at a time to paths[i]
+    # with full durability; returns total rows per second.
+    connections = []
+    for path in paths:
+        conn = db.open_connection(path, check_same_thread=False)
+        weather.create_schema(conn)
+        conn.execute("PRAGMA synchronous=FULL")
+        connections.append(conn)
+    row = (10.0, 20.0, 50.0, 10.0, "2025-01-01", clearance_rules.CLEARED)
+
+    def writer(conn, station):
+        for _ in range(rows):
+            with conn:
+                conn.execute(weather.INSERT_WEATHER_SQL, row + (station,))
+
+    threads = [threading.Thread(target=writer, args=(conn, station))
+               for conn, station in zip(connections, STATIONS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    for conn in connections:
+        conn.close()
+    return len(threads) * rows / seconds
+
+
+def wind_by_clearance_sqlite():
+    # Mean wind speed per verdict from row tuples (what analysts do today).
+    totals = {}
+    for wind, clearance in weather.get_db().execute("SELECT wind_speed, clearance FROM weather"):
+        entry = totals.setdefault(clearance, [0, 0.0])
+        entry[0] += 1
+        entry[1] += wind
+    return {clearance: total / count for clearance, (count, total) in totals.items()}
+
+
+def wind_by_clearance_export(directory):
+    # The same from the memory-mapped columnar export.
+    import numpy as np
+
+    export = columnar.open_export("weather", directory)
+    codes = export["clearance"]
+    counts = np.bincount(codes + 1)
+    totals = np.bincount(codes + 1, weights=export["wind_speed"])
+    names = [None] + export.dictionaries["clearance"]
+    return {names[i]: totals[i] / counts[i] for i in np.flatnonzero(counts)}
+
+
+def run_benchmarks(rng, scale, repeat, workdir):
+    """Times the hot paths; returns {operation: latency summary}."""
+    ops = {}
+    n_aircraft = max(scale["aircraft"], 1)
+
+    # ---- Single-record inserts through the record API ---- #
+    ops["insert.aircraft"] = time_op(
+        maintenance.add_aircraft_record,
+        [("Bench " + str(i), "A320-214", 2015) for i in range(repeat)])
+    ops["insert.maintenance"] = time_op(
+        maintenance.add_maintenance_record,
+        [(rng.randint(1, n_aircraft), "Bench task", "2025-01-01", "Bench", 100.0, "pending")
+         for _ in range(repeat)])
+    ops["insert.weather"] = time_op(
+        weather.save_observation,
+        [(10.0, 20.0, 50.0, 10.0, "2025-01-01") for _ in range(repeat)])
+    ops["insert.fuel"] = time_op(
+        fuel_calc.save_range,
+        [(8000.0, 2400.0, 720.0, "2025-01-01") for _ in range(repeat)])
+
+    # ---- Group commit: a shift log replayed per row vs in batches ---- #
+    # The same rows as plain INSERTs, for the original connection-per-record path
+    shift, unshared = [], []
+    for _ in range(max(repeat * 50, 300)):
+        aircraft_id = rng.randint(1, n_aircraft)
+        shift.append((maintenance.add_maintenance_record,
+                      (aircraft_id, "Shift task", "2025-01-01", "Bench", 100.0, "pending")))
+        shift.append((weather.save_observation, (10.0, 20.0, 50.0, 10.0, "2025-01-01")))
+        shift.append((fuel_calc.save_range, (8000.0, 2400.0, 720.0, "2025-01-01")))
+        unshared.append((maintenance.DB_PATH,
+                         "INSERT INTO maintenance (aircraft_id, description, date, engineer, cost, status) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (aircraft_id, "Shift task", "2025-01-01", "Bench", 100.0, "pending")))
+        unshared.append((weather.DB_PATH, weather.INSERT_WEATHER_SQL,
+                         (10.0, 20.0, 50.0, 10.0, "2025-01-01", clearance_rules.CLEARED, None)))
+        unshared.append((fuel_calc.DB_PATH, fuel_calc.INSERT_FUEL_SQL,
+                         (8000.0, 2400.0, 720.0, 2400.0, "2025-01-01", None)))
+    db.flush()
+    original = _replay_unshared(unshared)
+    for durability in ("full", "normal"):
+        single = _replay(shift, 1, durability)
+        batched = _replay(shift, 500, durability)
+        ops[f"group_commit.{durability}"] = {"rows": len(shift), "original_rows_per_sec": round(original, 1),
+                                             "per_row_rows_per_sec": round(single, 1),
+                                             "batched_rows_per_sec": round(batched, 1),
+                                             "gain": round(batched / original, 1),
+                                             "gain_vs_per_row": round(batched / single, 1)}
+
+    # ---- Bulk weather import ---- #
+    csv_path = os.path.join(workdir, "bench_weather.csv")
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("wind_speed,temperature,humidity,visibility,date\n")
+        for row in generate_weather(rng, max(repeat * 100, 1000)):
+            f.write(",".join(str(v) for v in row[:5]) + "\n")
+    stats = weather.import_weather_file(csv_path)
+    ops["import.weather_file"] = {"rows": stats["accepted"], "seconds": round(stats["seconds"], 4),
+                                  "rows_per_sec": round(stats["rows_per_sec"], 1)}
+
+    # ---- Live ingestion server (local socket, 4 clients) ---- #
+    keys = ("wind_speed", "temperature", "humidity", "visibility", "date")
+    feed = [dict(zip(keys, row[:5])) for row in generate_weather(rng, max(repeat * 200, 2000))]
+    stats, secs, rate = asyncio.run(weather_server.measure_ingest(feed, clients=4))
+    ops["ingest.server"] = {"rows": stats["committed"], "commits": stats["commits"],
+                            "seconds": round(secs, 4), "rows_per_sec": round(rate, 1)}
+
+    # ---- Aircraft search and history ---- #
+    keywords = [model for models in MANUFACTURERS.values() for model in models]
+    keywords += ["VT-" + "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(2))
+                 for _ in range(repeat)]
+    searches = [(rng.choice(keywords),) for _ in range(repeat)]
+    ops["search_aircraft"] = time_op(maintenance.find_aircraft, searches)
+    ops["search_aircraft.uncached"] = time_op(maintenance._search_aircraft, searches)
+    ops["aircraft_exists"] = time_op(
+        maintenance.aircraft_exists, [(rng.randint(1, n_aircraft),) for _ in range(repeat)])
+    ops["maintenance_history"] = time_op(
+        maintenance.maintenance_history, [(rng.randint(1, n_aircraft),) for _ in range(repeat)])
+    ops["rollup.aircraft"] = time_op(
+        maintenance.aircraft_rollup, [(rng.randint(1, n_aircraft),) for _ in range(repeat)])
+    ops["rollup.monthly"] = time_op(maintenance.monthly_rollups, [()] * repeat)
+
+    # ---- Recurring schedule: whole fleet, then "due next" and incremental advances ---- #
+    start = time.perf_counter()
+    maintenance.schedule_fleet("A-check", 120, first_due="2025-01-01")
+    ops["schedule.fleet_add"] = {"aircraft": n_aircraft, "seconds": round(time.perf_counter() - start, 4)}
+    ops["schedule.due_next"] = time_op(maintenance.due_maintenance, [(None, 20)] * repeat)
+    ops["schedule.log_completed"] = time_op(
+        maintenance.add_maintenance_record,
+        [(rng.randint(1, n_aircraft), "A-check", "2025-06-01", "Bench", 100.0, "completed")
+         for _ in range(repeat)])
+
+    # ---- Date-range queries (one month, streamed in full) ---- #
+    months = [(START_DATE + timedelta(days=rng.randrange(DAY_SPAN))).replace(day=1) for _ in range(repeat)]
+    month_args = [(m.isoformat(), m.replace(day=28).isoformat()) for m in months]
+    ops["date_range.maintenance"] = time_op(lambda a, b: sum(1 for _ in maintenance.maintenance_between(a, b)),
+                                            month_args)
+    ops["date_range.weather"] = time_op(lambda a, b: sum(1 for _ in weather.observations_between(a, b)),
+                                        month_args)
+    ops["date_range.fuel"] = time_op(lambda a, b: sum(1 for _ in fuel_calc.ranges_between(a, b)), month_args)
+
+    # ---- Change feed: first sync (whole table), then a sync of new rows only ---- #
+    for label, rows in (("full", None), ("delta", repeat)):
+        if rows:
+            for _ in range(rows):
+                weather.save_observation(10.0, 20.0, 50.0, 10.0, "2025-01-01")
+        start = time.perf_counter()
+        synced = sum(1 for _ in weather.observation_changes("bench"))
+        ops[f"feed.{label}_sync.weather"] = {"rows": synced, "seconds": round(time.perf_counter() - start, 4)}
+
+    # ---- Clearance and range history views ---- #
+    wconn = weather.get_db()
+    fconn = fuel_calc.get_db()
+    clearance_cols = "date, wind_speed, visibility, clearance"
+    ops["clearance.first_page"] = time_op(_first_page, [(wconn, "weather", clearance_cols)] * repeat)
+    ops["clearance.first_page_newest"] = time_op(
+        lambda: _first_page(wconn, "weather", clearance_cols, descending=True), [()] * repeat)
+    ops["clearance.counts"] = time_op(
+        lambda: wconn.execute("SELECT clearance, COUNT(*) FROM weather GROUP BY clearance").fetchall(),
+        [()] * max(repeat // 10, 1))
+    def clearance_dashboard():
+        return weather.clearance_rates("week"), weather.denial_counts(), weather.parameter_summary()
+
+    start = time.perf_counter()
+    clearance_dashboard()  # first read builds the daily statistics
+    ops["clearance.stats_build"] = {"seconds": round(time.perf_counter() - start, 4)}
+    ops["clearance.stats_cached"] = time_op(clearance_dashboard, [()] * repeat)
+    samples = []
+    for _ in range(max(repeat // 10, 1)):
+        for _ in range(100):
+            weather.save_observation(10.0, 20.0, 50.0, 10.0, "2025-01-01")
+        start = time.perf_counter()
+        clearance_dashboard()
+        samples.append(time.perf_counter() - start)
+    ops["clearance.stats_delta_100"] = _summarize(samples)
+    ops["clearance.rescore_dry_run"] = time_op(
+        lambda: weather.rescore_weather(dry_run=True), [()] * max(repeat // 10, 1))
+    range_cols = "id, fuel_capacity, burn_rate, cruising_speed, estimated_range, date"
+    ops["range_history.first_page"] = time_op(_first_page, [(fconn, "fueldata", range_cols)] * repeat)
+    ops["preflight.aircraft"] = time_op(
+        preflight.preflight, [(rng.randint(1, n_aircraft),) for _ in range(repeat)])
+    ops["preflight.fleet"] = time_op(preflight.preflight, [()] * max(repeat // 20, 1))
+    ops["range_history.full_scan"] = time_op(_drain, [(fconn, "fueldata", range_cols)] * max(repeat // 20, 1))
+
+    # ---- Aircraft-type range model: cold table build, integrator vs table lookups ---- #
+    range_model.TABLE_DIR = os.path.join(workdir, "range_tables")
+    range_model.clear_cache()
+    models = range_model.available()
+    start = time.perf_counter()
+    for model in models:
+        range_model.get_table(model)
+    ops["range_model.build_tables"] = {"models": len(models), "seconds": round(time.perf_counter() - start, 4)}
+    params = [range_model.model_params(rng.choice(models)) for _ in range(max(repeat // 10, 1))]
+    ops["range_model.integrator"] = time_op(
+        range_model.integrate, [(p, rng.uniform(0.1, 1.0) * p["max_fuel"]) for p in params])
+    fleet_models = [rng.choice(models) for _ in range(100000)]
+    fleet_fuel = [rng.uniform(0.1, 1.0) * range_model.model_params(m)["max_fuel"] for m in fleet_models]
+    ops["range_model.fleet_lookup_100k"] = time_op(range_model.fleet_range, [(fleet_models, fleet_fuel)] * 5)
+
+    # ---- Fleet review: every aircraft x the last 30 daily windows ---- #
+    _, last_day = fleet_review.weather_date_range()
+    first_day = (date.fromisoformat(last_day) - timedelta(days=29)).isoformat()
+    for workers in sorted({1, os.cpu_count() or 1}):
+        stats = fleet_review.run_review(first_day, last_day, workers=workers)
+        ops[f"review.fleet_30d.workers_{workers}"] = {
+            "rows": stats["rows"], "seconds": round(stats["seconds"], 4),
+            "merge_seconds": round(stats["merge_seconds"], 4),
+            "rows_per_sec": round(stats["rows"] / stats["seconds"], 1),
+        }
+
+    # ---- Online snapshot and restore of all three databases ---- #
+    manifest = snapshot.create_snapshot(os.path.join(workdir, "backups"))
+    ops["snapshot.create"] = {"bytes": manifest["bytes"], "seconds": manifest["seconds"],
+                              "mb_per_sec": manifest["mb_per_sec"]}
+    start = time.perf_counter()
+    restored = snapshot.restore_snapshot(manifest["path"])
+    seconds = time.perf_counter() - start
+    size = sum(entry["bytes"] for entry in restored.values())
+    ops["snapshot.restore"] = {"bytes": size, "seconds": round(seconds, 4),
+                               "mb_per_sec": round(size / 1e6 / seconds, 1)}
+
+    # ---- Columnar export and memory-mapped reads ---- #
+    export_dir = os.path.join(workdir, "exports")
+    stats = columnar.export_table("weather", export_dir, full=True)
+    ops["export.weather_full"] = {"rows": stats["rows"], "seconds": stats["seconds"],
+                                  "rows_per_sec": stats["rows_per_sec"]}
+    for _ in range(100):
+        weather.save_observation(10.0, 20.0, 50.0, 10.0, "2025-01-01")
+    stats = columnar.export_table("weather", export_dir)
+    ops["export.weather_incremental_100"] = {"rows": stats["appended"], "seconds": stats["seconds"]}
+    scans = [()] * max(repeat // 20, 1)
+    ops["export.scan_sqlite"] = time_op(wind_by_clearance_sqlite, scans)
+    ops["export.scan_mmap"] = time_op(wind_by_clearance_export, [(export_dir,)] * len(scans))
+
+    # ---- Station shards: contention and fan-out reads (runs last: adds shard files) ---- #
+    writers = 4
+    contention = os.path.join(workdir, "contention")
+    os.makedirs(contention, exist_ok=True)
+    shared = _station_writers([os.path.join(contention, "shared.db")] * writers, repeat * 5)
+    sharded = _station_writers([os.path.join(contention, f"{code}.db") for code in STATIONS[:writers]],
+                               repeat * 5)
+    ops["stations.writers_4"] = {"single_file_rows_per_sec": round(shared, 1),
+                                 "sharded_rows_per_sec": round(sharded, 1),
+                                 "gain": round(sharded / shared, 1)}
+
+    stations.configure(True)
+    start = time.perf_counter()
+    for conn, group in stations.route(list(generate_weather(rng, max(scale["weather"] // 2, 1000)))):
+        with conn:
+            conn.executemany(weather.INSERT_WEATHER_SQL, group)
+    ops["stations.shard_load"] = {"shards": len(stations.shards()),
+                                  "seconds": round(time.perf_counter() - start, 4)}
+    history_cols = "id, date, clearance"
+    ops["stations.history_first_page"] = time_op(
+        lambda: next(stations.iter_pages(history_cols, order="date", descending=True)), [()] * repeat)
+    ops["stations.history_month"] = time_op(
+        lambda a, b: sum(len(page) for page in stations.iter_pages(history_cols, order="date",
+                                                                   date_from=a, date_to=b)),
+        month_args)
+    ops["stations.latest"] = time_op(weather.latest_observation, [()] * repeat)
+    ops["stations.latest_one_station"] = time_op(
+        weather.latest_observation, [(rng.choice(STATIONS),) for _ in range(repeat)])
+    stations.configure(False)
+    stations.close_readers()
+
+    return ops
+
+
+# ------------------------------------------------------ #
+# Entry point
+# ------------------------------------------------------ #
+def _use_scratch_databases(workdir):
+    # Points every module at databases inside workdir.
+    maintenance.DB_PATH = os.path.join(workdir, "maintenance.db")
+    weather.DB_PATH = os.path.join(workdir, "weather.db")
+    fuel_calc.DB_PATH = os.path.join(workdir, "fuel.db")
+    for module in (maintenance, weather, fuel_calc):
+        module.init_db()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FOSS benchmark suite (JSON output)")
+    parser.add_argument("--aircraft", type=int, default=10000)
+    parser.add_argument("--maintenance", type=int, default=100000)
+    parser.add_argument("--weather", type=int, default=200000)
+    parser.add_argument("--fuel", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=200, help="samples per timed operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dir", help="directory for the scratch databases (default: temporary)")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--profile", action="store_true",
+                        help="add per-statement timings to the report (slows every operation)")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiling.enable(at_exit=False)
+
+    scale = {"aircraft": args.aircraft, "maintenance": args.maintenance,
+             "weather": args.weather, "fuel": args.fuel}
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="foss-bench-") as tmp:
+        workdir = args.dir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        _use_scratch_databases(workdir)
+
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "scale": scale,
+                "repeat": args.repeat,
+                "seed": args.seed,
+            },
+            "generate": populate(rng, scale),
+            "ops": run_benchmarks(rng, scale, args.repeat, workdir),
+        }
+        if profiling.enabled:
+            report["profile"] = profiling.summary()
+        db.close_all()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
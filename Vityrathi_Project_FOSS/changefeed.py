@@ -0,0 +1,137 @@
+"""
+Module: changefeed.py
+Purpose: Incremental change feeds over the maintenance, weather and fuel tables.
+
+This module handles:
+- Logging updated rows per table (<table>_changes, filled by a trigger)
+- Per-consumer watermarks in a small feed_watermarks table
+- changes(): a generator of the rows inserted or updated since a consumer's
+  watermark, so a downstream sync reads only the delta
+
+Inserts need no log: every feed table has an AUTOINCREMENT id, so new rows
+are exactly those above the consumer's last seen id. Updates are logged by
+an AFTER UPDATE trigger into <table>_changes, which keeps one entry per row
+(the latest change gets a new sequence number), so the log never grows
+beyond the table itself. FOSS never deletes from these tables; deletes are
+not reported.
+
+Delivery is at-least-once: the watermark moves after each page has been
+consumed, so a consumer that stops part-way gets the rest of that page
+again next time. Each row is yielded as (op, row) where op is "insert" or
+"update" and row holds the table's columns (same as SELECT *), with its
+current values.
+"""
+
+WATERMARK_TABLE = "feed_watermarks"
+
+# Rows read per query while streaming a feed
+DEFAULT_PAGE_SIZE = 1000
+
+
+# ------------------------------------------------------ #
+# Schema
+# ------------------------------------------------------ #
+def ensure_feed(conn, table):
+    """Creates the change log, its trigger and the watermark table (idempotent)."""
+    with conn:
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table}_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            row_id INTEGER NOT NULL UNIQUE
+        )
+        """)
+        # REPLACE drops the row's previous entry; AUTOINCREMENT keeps
+        # sequence numbers from ever being reused
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_changes_update AFTER UPDATE ON {table}
+        BEGIN INSERT OR REPLACE INTO {table}_changes (row_id) VALUES (new.id); END
+        """)
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            consumer TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            last_id INTEGER NOT NULL,
+            last_seq INTEGER NOT NULL,
+            synced_at TEXT NOT NULL,
+            PRIMARY KEY (consumer, table_name)
+        ) WITHOUT ROWID
+        """)
+
+
+# ------------------------------------------------------ #
+# Watermarks
+# ------------------------------------------------------ #
+def get_watermark(conn, table, consumer):
+    """Returns (last_id, last_seq) for a consumer; (0, 0) if it never synced."""
+    row = conn.execute(
+        f"SELECT last_id, last_seq FROM {WATERMARK_TABLE} WHERE consumer = ? AND table_name = ?",
+        (consumer, table)).fetchone()
+    return tuple(row) if row else (0, 0)
+
+
+def set_watermark(conn, table, consumer, last_id, last_seq):
+    """Stores a consumer's position in a table's feed."""
+    with conn:
+        conn.execute(f"""
+        INSERT INTO {WATERMARK_TABLE} (consumer, table_name, last_id, last_seq, synced_at)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        ON CONFLICT (consumer, table_name) DO UPDATE SET
+            last_id = excluded.last_id, last_seq = excluded.last_seq, synced_at = excluded.synced_at
+        """, (consumer, table, last_id, last_seq))
+
+
+def reset(conn, table, consumer):
+    """Forgets a consumer's watermark; its next sync starts from the first row."""
+    with conn:
+        conn.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE consumer = ? AND table_name = ?",
+                     (consumer, table))
+
+
+def columns(conn, table):
+    """Column names of table, in the order feed rows hold them."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def consumers(conn):
+    """Returns (consumer, table, last_id, last_seq, synced_at) for every watermark."""
+    return conn.execute(f"SELECT * FROM {WATERMARK_TABLE} ORDER BY consumer, table_name").fetchall()
+
+
+# ------------------------------------------------------ #
+# Feed
+# ------------------------------------------------------ #
+def changes(conn, table, consumer, page_size=DEFAULT_PAGE_SIZE, advance=True):
+    """
+    Yields (op, row) for rows inserted or updated since consumer's watermark
+    (updates first). advance=False leaves the watermark where it is.
+    """
+    last_id, last_seq = get_watermark(conn, table, consumer)
+    # One statement, so both bounds come from the same snapshot
+    top_id, top_seq = conn.execute(
+        f"SELECT (SELECT IFNULL(MAX(id), 0) FROM {table}), "
+        f"(SELECT IFNULL(MAX(seq), 0) FROM {table}_changes)").fetchone()
+
+    # Updated rows we have already delivered; newer ids arrive as inserts
+    if last_id == 0:
+        last_seq = top_seq
+    while last_seq < top_seq:
+        rows = conn.execute(f"""
+        SELECT c.seq, t.* FROM {table}_changes c JOIN {table} t ON t.id = c.row_id
+        WHERE c.seq > ? AND c.seq <= ? AND c.row_id <= ?
+        ORDER BY c.seq LIMIT ?
+        """, (last_seq, top_seq, last_id, page_size)).fetchall()
+        for row in rows:
+            yield "update", row[1:]
+        last_seq = rows[-1][0] if len(rows) == page_size else top_seq
+        if advance:
+            set_watermark(conn, table, consumer, last_id, last_seq)
+
+    while last_id < top_id:
+        rows = conn.execute(
+            f"SELECT * FROM {table} WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (last_id, top_id, page_size)).fetchall()
+        for row in rows:
+            yield "insert", row
+        last_id = rows[-1][0] if len(rows) == page_size else top_id
+        if advance:
+            set_watermark(conn, table, consumer, last_id, last_seq)
@@ -0,0 +1,268 @@
+"""
+Module: clearance_rules.py
+Purpose: Configurable takeoff-clearance rules, compiled once per rule set.
+
+This module handles:
+- Loading limits from clearance_rules.json: a default rule list plus
+  overrides per aircraft category and per airport
+- Compiling each resolved rule set into a plain Python verdict function,
+  a NumPy evaluator and an SQL CASE expression
+- Explaining a decision: every failing rule and how far past its limit
+- Caching compiled rule sets (clear_cache() after editing the file)
+- Warning when a requested airport or category has no rules in the file
+
+A rule fails when its field is below "min" or above "max"; values equal to a
+limit pass. Rules are checked in the order of the default list and the first
+failure is the verdict, as before. Airport overrides win over category
+overrides, which win over the defaults. Example:
+
+    {
+      "default": [
+        {"name": "wind", "field": "wind_speed", "max": 35, "reason": "NO - High wind"},
+        ...
+      ],
+      "categories": {"light": {"wind": {"max": 20}}},
+      "airports": {"VILH": {"visibility": {"min": 5}}}
+    }
+
+The file is read from this module's directory unless FOSS_CLEARANCE_RULES
+names another one.
+"""
+
+import json
+import math
+import os
+import sys
+
+CONFIG_PATH = (os.environ.get("FOSS_CLEARANCE_RULES")
+               or os.path.join(os.path.dirname(os.path.abspath(__file__)), "clearance_rules.json"))
+
+CLEARED = "YES - Cleared for takeoff"
+
+# Observation fields a rule may test, in evaluate_clearance() argument order
+FIELDS = ("wind_speed", "temperature", "humidity", "visibility")
+
+# Used when no config file exists; matches the original hard-coded checks
+DEFAULT_RULES = [
+    {"name": "wind", "field": "wind_speed", "max": 35, "reason": "NO - High wind"},
+    {"name": "visibility", "field": "visibility", "min": 3, "reason": "NO - Low visibility"},
+    {"name": "temperature", "field": "temperature", "min": -20, "max": 50, "reason": "NO - Unsafe temperature"},
+    {"name": "humidity", "field": "humidity", "max": 95, "reason": "NO - High humidity risk"},
+]
+
+# (config path, airport, category) -> RuleSet
+_compiled = {}
+# config path -> parsed file
+_configs = {}
+
+
+# ------------------------------------------------------ #
+# Compiled rule set
+# ------------------------------------------------------ #
+class Rule:
+    """One limit on one observation field."""
+
+    __slots__ = ("name", "field", "min", "max", "reason")
+
+    def __init__(self, name, field, min=None, max=None, reason=None):
+        if field not in FIELDS:
+            raise ValueError(f"Rule '{name}': unknown field '{field}'.")
+        if min is None and max is None:
+            raise ValueError(f"Rule '{name}' needs a min or a max.")
+        self.name = name
+        self.field = field
+        self.min = _limit(name, min)
+        self.max = _limit(name, max)
+        self.reason = reason or f"NO - {name} out of limits"
+
+    def conditions(self):
+        # (operator, limit) pairs that make this rule fail
+        tests = []
+        if self.min is not None:
+            tests.append(("<", self.min))
+        if self.max is not None:
+            tests.append((">", self.max))
+        return tests
+
+
+def _limit(name, value):
+    if value is None:
+        return None
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Rule '{name}': limits must be finite numbers.")
+    return value
+
+
+class RuleSet:
+    """
+    An ordered list of rules; code()/evaluate() are generated per rule set
+    (code 0 is CLEARED, code i the reason of rule i-1).
+    """
+
+    __slots__ = ("name", "rules", "reasons", "code", "evaluate")
+
+    def __init__(self, rules, name="default"):
+        self.name = name
+        self.rules = tuple(rules)
+        self.reasons = (CLEARED,) + tuple(rule.reason for rule in self.rules)
+        self.code = self._compile(range(len(self.reasons)))
+        self.evaluate = self._compile(self.reasons)
+
+    def _compile(self, results):
+        # Generates straight-line code with the limits inlined as constants,
+        # so a verdict costs the same as the original hand-written if-chain.
+        # results[i] is returned for verdict code i.
+        lines = [f"def verdict({', '.join(FIELDS)}):"]
+        for code, rule in enumerate(self.rules, 1):
+            test = " or ".join(f"{rule.field} {op} {limit!r}" for op, limit in rule.conditions())
+            lines.append(f"    if {test}:")
+            lines.append(f"        return {results[code]!r}")
+        lines.append(f"    return {results[0]!r}")
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        return namespace["verdict"]
+
+    def explain(self, wind, temp, humidity, vis):
+        """
+        Lists every failing rule, in priority order.
+
+        Each entry is a dict with rule, field, value, the limit it broke,
+        margin (how far past the limit, always positive) and reason. Empty
+        means cleared.
+        """
+        values = dict(zip(FIELDS, (wind, temp, humidity, vis)))
+        failures = []
+        for rule in self.rules:
+            value = values[rule.field]
+            for op, limit in rule.conditions():
+                margin = limit - value if op == "<" else value - limit
+                if margin > 0:
+                    failures.append({"rule": rule.name, "field": rule.field, "value": value,
+                                     "limit": limit, "margin": margin, "reason": rule.reason})
+        return failures
+
+    # ---------------- bulk ---------------- #
+    def evaluate_array(self, wind, temp, humidity, vis):
+        """
+        Array counterpart of code(); returns an int8 array of verdict codes
+        for equal-length columns, using np.select (first match wins).
+        """
+        import numpy as np
+
+        columns = {field: np.asarray(values, dtype=np.float64)
+                   for field, values in zip(FIELDS, (wind, temp, humidity, vis))}
+        conditions = []
+        for rule in self.rules:
+            column = columns[rule.field]
+            failed = None
+            for op, limit in rule.conditions():
+                test = column < limit if op == "<" else column > limit
+                failed = test if failed is None else failed | test
+            conditions.append(failed)
+        return np.select(conditions, range(1, len(self.rules) + 1), default=0).astype(np.int8)
+
+    def sql_case(self):
+        """SQL CASE expression giving the verdict string for a weather row."""
+        parts = ["CASE"]
+        for rule in self.rules:
+            test = " OR ".join(f"{rule.field} {op} {limit!r}" for op, limit in rule.conditions())
+            parts.append(f"WHEN {test} THEN {_sql_text(rule.reason)}")
+        parts.append(f"ELSE {_sql_text(CLEARED)} END")
+        return " ".join(parts)
+
+
+def describe(failure):
+    """One-line text for an explain() entry."""
+    side = "above" if failure["value"] > failure["limit"] else "below"
+    return (f"{failure['reason']}: {failure['field']} {failure['value']:g} is {side} "
+            f"the {failure['limit']:g} limit by {failure['margin']:g}")
+
+
+def _sql_text(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+# ------------------------------------------------------ #
+# Loading and caching
+# ------------------------------------------------------ #
+def load_config(path=None):
+    """Returns the parsed rules file, or the built-in defaults if it does not exist."""
+    path = path or CONFIG_PATH
+    config = _configs.get(path)
+    if config is None:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        else:
+            config = {"default": DEFAULT_RULES}
+        _configs[path] = config
+    return config
+
+
+def _apply_overrides(rules, overrides, where):
+    # Merges {rule name: {min/max/reason/field}} into the ordered rule dicts.
+    by_name = {rule["name"]: rule for rule in rules}
+    for name, changes in overrides.items():
+        if name in by_name:
+            by_name[name].update(changes)
+        elif "field" in changes:
+            rule = dict(changes, name=name)
+            rules.append(rule)
+            by_name[name] = rule
+        else:
+            raise ValueError(f"{where}: rule '{name}' is not a default rule and has no field.")
+
+
+def get_rule_set(airport=None, category=None, path=None):
+    """
+    Returns the compiled rules for an airport and/or aircraft category.
+
+    Unknown airports or categories fall back to the defaults. Results are
+    cached per (file, airport, category).
+    """
+    key = (path or CONFIG_PATH, airport, category)
+    rule_set = _compiled.get(key)
+    if rule_set is None:
+        path = key[0]
+        config = load_config(path)
+        rules = [dict(rule) for rule in config.get("default", DEFAULT_RULES)]
+        name = "default"
+        if category and category in config.get("categories", {}):
+            _apply_overrides(rules, config["categories"][category], f"category {category}")
+            name = f"category {category}"
+        if airport and airport in config.get("airports", {}):
+            _apply_overrides(rules, config["airports"][airport], f"airport {airport}")
+            name = f"airport {airport}" + (f", {name}" if name != "default" else "")
+        rule_set = RuleSet([Rule(**rule) for rule in rules], name)
+        _compiled[key] = rule_set
+    return rule_set
+
+
+def clear_cache():
+    """Forgets loaded files and compiled rule sets (e.g. after editing the file)."""
+    _configs.clear()
+    _compiled.clear()
+
+
+def available(path=None):
+    """Returns (airports, categories) named in the rules file."""
+    config = load_config(path)
+    return sorted(config.get("airports", {})), sorted(config.get("categories", {}))
+
+
+def unknown_selection(airport=None, category=None, path=None):
+    """Returns a message per requested airport/category that the rules file does not name."""
+    airports, categories = available(path)
+    messages = []
+    if airport and airport not in airports:
+        messages.append(f"airport '{airport}' has no rules in {path or CONFIG_PATH}; using the defaults.")
+    if category and category not in categories:
+        messages.append(f"category '{category}' has no rules in {path or CONFIG_PATH}; using the defaults.")
+    return messages
+
+
+def warn_unknown(airport=None, category=None, path=None, file=None):
+    """Prints unknown_selection() warnings (to stderr by default)."""
+    for message in unknown_selection(airport, category, path):
+        print("Warning:", message, file=file or sys.stderr)
@@ -0,0 +1,794 @@
+"""
+Command-line interface for Flight Operational Support Suite (run as foss.py)
+
+Every operation from the interactive menus is available as a subcommand
+with no prompts, e.g.:
+
+    python foss.py maint aircraft add --name "Airbus A320" --model A320-214 --year 2015
+    python foss.py maint history --aircraft 12
+    python foss.py weather add --wind 12 --temp 25 --humidity 60 --visibility 10 --date 2025-01-01
+    python foss.py fuel range --fuel 8000 --burn 2400 --speed 720
+    python foss.py snapshot create
+
+Running with no arguments starts the interactive menu. Feature modules are
+imported only by the subcommand that needs them, to keep start-up fast.
+--profile (or the FOSS_PROFILE environment variable) reports per-statement
+timings at exit.
+"""
+
+import argparse
+import os
+import sys
+
+
+# ------------------------------------------------------ #
+# Output helpers
+# ------------------------------------------------------ #
+def _print_rows(rows, headers=None):
+    # Prints rows as pipe-separated text (header first, if given).
+    if headers:
+        print(" | ".join(headers))
+    count = 0
+    for row in rows:
+        print(" | ".join("" if value is None else str(value) for value in row))
+        count += 1
+    return count
+
+
+def _print_pages(pages, headers):
+    # Streams every page of a paging.iter_pages() generator.
+    print(" | ".join(headers))
+    for page in pages:
+        _print_rows(page)
+
+
+def _page_options(args):
+    # Maps the shared history flags onto paging.iter_pages() keywords.
+    options = {"order": args.order, "descending": args.desc, "page_size": args.page_size}
+    if getattr(args, "date_from", None):
+        options["date_from"] = args.date_from
+    if getattr(args, "date_to", None):
+        options["date_to"] = args.date_to
+    return options
+
+
+# ------------------------------------------------------ #
+# Maintenance commands
+# ------------------------------------------------------ #
+def cmd_aircraft_add(args):
+    import maintenance
+    aircraft_id = maintenance.add_aircraft_record(args.name, args.model, args.year)
+    print(f"Aircraft added with ID {aircraft_id}.")
+
+
+def cmd_aircraft_list(args):
+    import maintenance
+    import registry
+    args.order = "id"
+    pages = maintenance.get_registry().iter_pages(**_page_options(args))
+    _print_pages(pages, registry.COLUMNS)
+
+
+def cmd_aircraft_search(args):
+    import maintenance
+    rows = maintenance.find_aircraft(args.keyword)
+    if _print_rows(rows, ("id", "name", "model", "manufacture_year")) == 0:
+        print("No matching aircraft found.")
+
+
+def cmd_maint_log(args):
+    import maintenance
+    record_id = maintenance.add_maintenance_record(
+        args.aircraft, args.description, args.date, args.engineer, args.cost, args.status)
+    print(f"Maintenance record {record_id} added.")
+
+
+def cmd_maint_complete(args):
+    import maintenance
+    maintenance.complete_maintenance(args.record)
+    print(f"Maintenance record {args.record} completed.")
+
+
+def cmd_maint_list(args):
+    import maintenance
+    import paging
+    columns = ("id", "aircraft_id", "description", "date", "engineer", "cost", "status")
+    options = _page_options(args)
+    if args.engineer:
+        options.update(where="engineer = ?", params=(args.engineer,))
+    pages = paging.iter_pages(maintenance.get_db(), "maintenance", ", ".join(columns), **options)
+    _print_pages(pages, columns)
+
+
+def cmd_maint_history(args):
+    import maintenance
+    rows = maintenance.maintenance_history(args.aircraft)
+    headers = ("id", "aircraft_id", "description", "date", "engineer", "cost", "status")
+    if _print_rows(rows, headers) == 0:
+        print("No maintenance records for this aircraft.")
+
+
+def cmd_maint_rollup(args):
+    import maintenance
+    if args.action == "rebuild":
+        maintenance.rebuild_rollups()
+        print("Rollups rebuilt.")
+    elif args.action == "check":
+        problems = maintenance.check_rollups()
+        for table, key, stored, expected in problems:
+            print(f"{table} [{key}]: stored={stored} expected={expected}")
+        print("Rollups consistent." if not problems else f"{len(problems)} mismatches.")
+        if problems:
+            raise SystemExit(1)
+    elif args.aircraft is not None:
+        _print_rows([maintenance.aircraft_rollup(args.aircraft)],
+                    ("total_cost", "records", "pending", "completed"))
+    else:
+        _print_rows(maintenance.monthly_rollups(args.month_from, args.month_to),
+                    ("month", "total_cost", "records", "pending", "completed"))
+
+
+def cmd_maint_schedule(args):
+    import maintenance
+    many = args.fleet or args.model is not None
+    if (args.aircraft is not None) == many:
+        raise ValueError("Give --aircraft, or --fleet / --model to schedule many aircraft.")
+    if args.aircraft is not None:
+        due = maintenance.schedule_task(args.aircraft, args.task, args.every, args.first_due)
+        print(f"Scheduled '{args.task}' every {args.every} days; next due {due}.")
+    else:
+        count = maintenance.schedule_fleet(args.task, args.every, args.model, args.first_due)
+        print(f"Scheduled '{args.task}' every {args.every} days for {count} aircraft.")
+
+
+def cmd_maint_due(args):
+    import maintenance
+    rows = maintenance.due_maintenance(args.before, args.limit, args.aircraft)
+    if _print_rows(rows, maintenance.SCHEDULE_COLUMNS) == 0:
+        print("No scheduled maintenance is due.")
+
+
+# ------------------------------------------------------ #
+# Weather commands
+# ------------------------------------------------------ #
+def _rules(args):
+    # Clearance rule set picked by --airport/--category.
+    import clearance_rules
+    clearance_rules.warn_unknown(args.airport, args.category)
+    return clearance_rules.get_rule_set(args.airport, args.category)
+
+
+def _print_failures(rules, args):
+    # One line per failing clearance rule, with its margin.
+    import clearance_rules
+    for failure in rules.explain(args.wind, args.temp, args.humidity, args.visibility):
+        print(" -", clearance_rules.describe(failure))
+
+
+def cmd_weather_add(args):
+    import weather
+    rules = _rules(args)
+    record_id, clearance = weather.save_observation(
+        args.wind, args.temp, args.humidity, args.visibility, args.date, rules, args.station)
+    print(f"Weather record {record_id} stored.")
+    print(f"TAKEOFF CLEARANCE: {clearance}")
+    _print_failures(rules, args)
+
+
+def cmd_weather_check(args):
+    rules = _rules(args)
+    print(rules.evaluate(args.wind, args.temp, args.humidity, args.visibility))
+    _print_failures(rules, args)
+
+
+def cmd_weather_rescore(args):
+    import weather
+    rules = _rules(args)
+    counts = weather.rescore_weather(rules, dry_run=args.dry_run)
+    action = "would change" if args.dry_run else "changed"
+    print(f"Rules: {rules.name}. {sum(counts.values())} verdicts {action}.")
+    for verdict, count in sorted(counts.items()):
+        print(f"  {count:>8}  -> {verdict}")
+
+
+def cmd_weather_import(args):
+    import weather
+    stats = weather.import_weather_file(args.file, args.batch_size, _rules(args))
+    print(f"Imported {stats['accepted']} observations ({stats['rejected']} rejected) "
+          f"in {stats['seconds']:.2f} s - {stats['rows_per_sec']:.0f} rows/sec")
+
+
+def cmd_weather_serve(args):
+    import weather_server
+    weather_server.serve(args)
+
+
+def cmd_weather_logs(args):
+    import stations
+    columns = ("id", "station", "wind_speed", "temperature", "humidity", "visibility", "date", "clearance")
+    pages = stations.iter_pages(", ".join(columns), station=stations.normalize(args.station),
+                                **_page_options(args))
+    _print_pages(pages, columns)
+
+
+def cmd_weather_clearance(args):
+    import stations
+    columns = ("date", "station", "wind_speed", "visibility", "clearance")
+    pages = stations.iter_pages(", ".join(columns), station=stations.normalize(args.station),
+                                **_page_options(args))
+    _print_pages(pages, columns)
+
+
+def cmd_weather_latest(args):
+    import weather
+    if args.station:
+        rows = [row for row in [weather.latest_observation(args.station)] if row]
+    else:
+        rows = weather.latest_by_station()
+    if _print_rows(rows, weather.LATEST_COLUMNS) == 0:
+        print("No weather observations found.")
+
+
+def cmd_weather_stats(args):
+    import weather
+    if args.show in ("rates", "all"):
+        rows = [(label, n, int(cleared), f"{rate:.4f}")
+                for label, n, cleared, rate in weather.clearance_rates(args.period, args.date_from, args.date_to)]
+        _print_rows(rows, (args.period, "observations", "cleared", "rate"))
+    if args.show in ("denials", "all"):
+        _print_rows(weather.denial_counts(args.date_from, args.date_to), ("verdict", "observations"))
+    if args.show in ("parameters", "all"):
+        summary = weather.parameter_summary(args.date_from, args.date_to)
+        _print_rows(((name, count, low, high, None if mean is None else round(mean, 3))
+                     for name, (count, low, high, mean) in summary.items()),
+                    ("parameter", "count", "min", "max", "mean"))
+
+
+# ------------------------------------------------------ #
+# Fuel commands
+# ------------------------------------------------------ #
+def cmd_fuel_range(args):
+    import fuel_calc
+    if args.date:
+        record_id, flight_range = fuel_calc.save_range(args.fuel, args.burn, args.speed, args.date,
+                                                       args.aircraft)
+        print(f"Estimated range = {flight_range:.2f} km (saved as record {record_id})")
+    else:
+        endurance, flight_range = fuel_calc.compute_range(args.fuel, args.burn, args.speed)
+        print(f"Endurance = {endurance:.2f} h, estimated range = {flight_range:.2f} km")
+
+
+def cmd_fuel_history(args):
+    import fuel_calc
+    import paging
+    columns = ("id", "aircraft_id", "fuel_capacity", "burn_rate", "cruising_speed", "estimated_range", "date")
+    pages = paging.iter_pages(fuel_calc.get_db(), "fueldata", ", ".join(columns), **_page_options(args))
+    _print_pages(pages, columns)
+
+
+def cmd_fuel_sweep(args):
+    import fuel_calc
+    fuels = fuel_calc.sweep_axis(*args.fuel)
+    burns = fuel_calc.sweep_axis(*args.burn)
+    speeds = fuel_calc.sweep_axis(*args.speed)
+    if args.csv:
+        written = fuel_calc.sweep_to_csv(args.csv, fuels, burns, speeds)
+        print(f"Wrote {written} rows to {args.csv}")
+    elif args.save_date:
+        written = fuel_calc.sweep_to_db(args.save_date, fuels, burns, speeds)
+        print(f"Saved {written} rows to fuel database.")
+    else:
+        for chunk in fuel_calc.iter_range_sweep(fuels, burns, speeds):
+            _print_rows(zip(*(chunk[name].tolist() for name in fuel_calc.SWEEP_COLUMNS)))
+
+
+def cmd_fuel_model(args):
+    import fuel_calc
+    import range_model
+    if args.check:
+        errors = range_model.check_tables(args.samples)
+        for model, error in errors.items():
+            print(f"{model}: max relative error {error:.2e}")
+        print(f"Tolerance {range_model.TOLERANCE:g}: "
+              + ("all tables within tolerance" if max(errors.values()) <= range_model.TOLERANCE else "EXCEEDED"))
+        return
+    if not args.fuel or (args.aircraft is None) == (args.model is None):
+        raise ValueError("Give --fuel and exactly one of --aircraft or --model (or use --check).")
+    print("model | fuel | endurance_h | estimated_range_km")
+    for fuel in args.fuel:
+        if args.aircraft is not None:
+            model, endurance, flight_range = fuel_calc.aircraft_model_range(args.aircraft, fuel)
+            if args.date:
+                fuel_calc.save_model_range(args.aircraft, fuel, args.date)
+        else:
+            model = args.model
+            endurance, flight_range = range_model.model_range(model, fuel)
+        print(f"{model} | {fuel:g} | {endurance:.4f} | {flight_range:.2f}")
+
+
+# ------------------------------------------------------ #
+# Fleet review commands
+# ------------------------------------------------------ #
+def cmd_review_run(args):
+    import fleet_review
+    fleet_review.report(args)
+
+
+def cmd_review_show(args):
+    import fleet_review
+    rows = fleet_review.review_rows(args.window, args.aircraft, args.verdict)
+    if _print_rows(rows, fleet_review.REVIEW_COLUMNS) == 0:
+        print("No review rows found. Run 'foss.py review run' first.")
+
+
+# ------------------------------------------------------ #
+# Change feed commands
+# ------------------------------------------------------ #
+def _feed_source(name):
+    # feed name -> (connections, table); weather has one per source database
+    if name == "weather":
+        import stations
+        return stations.source_connections(), "weather"
+    import fuel_calc
+    import maintenance
+    module, table = {"maintenance": (maintenance, "maintenance"), "fuel": (fuel_calc, "fueldata")}[name]
+    return [module.get_db()], table
+
+
+def cmd_feed_read(args):
+    import changefeed
+    connections, table = _feed_source(args.table)
+
+    def rows():
+        # Each database's rows, against its own watermark
+        for conn in connections:
+            if args.reset:
+                changefeed.reset(conn, table, args.consumer)
+            for op, row in changefeed.changes(conn, table, args.consumer, args.page_size, advance=not args.peek):
+                yield (op,) + tuple(row)
+
+    headers = ["op"] + changefeed.columns(connections[0], table)
+    if _print_rows(rows(), headers) == 0:
+        print(f"No changes since {args.consumer}'s last sync.")
+
+
+def cmd_feed_status(args):
+    import changefeed
+    headers = ("consumer", "table", "last_id", "last_seq", "synced_at", "database")
+    rows = [tuple(row) + (os.path.basename(conn.execute("PRAGMA database_list").fetchone()[2]),)
+            for name in ("maintenance", "weather", "fuel")
+            for conn in _feed_source(name)[0]
+            for row in changefeed.consumers(conn)]
+    if _print_rows(rows, headers) == 0:
+        print("No feed consumers yet.")
+
+
+# ------------------------------------------------------ #
+# Snapshot commands
+# ------------------------------------------------------ #
+def cmd_snapshot(args):
+    import snapshot
+    snapshot.report(args)
+
+
+# ------------------------------------------------------ #
+# Columnar export command
+# ------------------------------------------------------ #
+def cmd_export(args):
+    import columnar
+    differs = []
+    for table, stats in columnar.export_all(args.dir, args.full, args.tables).items():
+        print(f"{table}: {stats['rows']} rows ({stats['mode']}: {stats['appended']} appended, "
+              f"{stats['updated']} updated) in {stats['seconds']:.2f} s -> {stats['path']}")
+        if args.check:
+            problems = columnar.check_export(table, args.dir)
+            for problem in problems:
+                print(f"  {problem}")
+            if problems:
+                differs.append(table)
+    if differs:
+        raise ValueError(f"Export differs from the database: {', '.join(differs)}")
+
+
+# ------------------------------------------------------ #
+# Preflight command
+# ------------------------------------------------------ #
+def cmd_preflight(args):
+    import preflight
+    rows = preflight.preflight(args.aircraft, args.required_range, args.station)
+    if _print_rows(rows, preflight.PREFLIGHT_COLUMNS) == 0:
+        print("No matching aircraft found.")
+    elif args.strict and any(row[-1] != "GO" for row in rows):
+        raise SystemExit(1)
+
+
+# ------------------------------------------------------ #
+# Date migration command
+# ------------------------------------------------------ #
+def cmd_migrate(args):
+    import db
+    import fuel_calc
+    import maintenance
+    import weather
+    for module, table in ((maintenance, "maintenance"), (weather, "weather"), (fuel_calc, "fueldata")):
+        # get_db() upgrades an old database on first open; rescan to report
+        report = db.ensure_dates(module.get_db(), (table,), force=True)[table]
+        print(f"{table}: {report['rewritten']} dates rewritten, {report['invalid']} invalid", end="")
+        print(f" (ids {report['invalid_ids']})" if report["invalid"] else "")
+
+
+# ------------------------------------------------------ #
+# Parser
+# ------------------------------------------------------ #
+def _add_rule_flags(parser):
+    # Clearance rule set selection (see clearance_rules.json).
+    parser.add_argument("--airport", help="use this airport's clearance rules")
+    parser.add_argument("--category", help="use this aircraft category's clearance rules")
+
+
+def _add_history_flags(parser, with_dates=True):
+    # Shared paging/filter flags for history listings.
+    parser.add_argument("--page-size", type=int, default=1000, help="rows fetched per query")
+    parser.add_argument("--desc", action="store_true", help="newest first")
+    if with_dates:
+        parser.add_argument("--from", dest="date_from", help="first date (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="date_to", help="last date (YYYY-MM-DD)")
+        parser.add_argument("--order", choices=("id", "date"), default="id")
+
+
+def _maint_commands(maint):
+    maint_cmds = maint.add_subparsers(dest="command", required=True)
+
+    aircraft = maint_cmds.add_parser("aircraft", help="aircraft registry")
+    aircraft_cmds = aircraft.add_subparsers(dest="action", required=True)
+    p = aircraft_cmds.add_parser("add", help="register an aircraft")
+    p.add_argument("--name", required=True)
+    p.add_argument("--model", required=True)
+    p.add_argument("--year", required=True)
+    p.set_defaults(func=cmd_aircraft_add)
+    p = aircraft_cmds.add_parser("list", help="list registered aircraft")
+    _add_history_flags(p, with_dates=False)
+    p.set_defaults(func=cmd_aircraft_list)
+
+    p = maint_cmds.add_parser("search", help="search aircraft by name or model")
+    p.add_argument("keyword")
+    p.set_defaults(func=cmd_aircraft_search)
+
+    p = maint_cmds.add_parser("log", help="record a maintenance event")
+    p.add_argument("--aircraft", type=int, required=True)
+    p.add_argument("--description", required=True)
+    p.add_argument("--date", required=True)
+    p.add_argument("--engineer", required=True)
+    p.add_argument("--cost", type=float, required=True)
+    p.add_argument("--status", required=True, choices=("completed", "pending"), type=str.lower)
+    p.set_defaults(func=cmd_maint_log)
+
+    p = maint_cmds.add_parser("complete", help="mark a pending maintenance record as completed")
+    p.add_argument("--record", type=int, required=True)
+    p.set_defaults(func=cmd_maint_complete)
+
+    p = maint_cmds.add_parser("list", help="list all maintenance records")
+    _add_history_flags(p)
+    p.add_argument("--engineer", help="only records by this engineer")
+    p.set_defaults(func=cmd_maint_list)
+
+    p = maint_cmds.add_parser("history", help="maintenance records for one aircraft")
+    p.add_argument("--aircraft", type=int, required=True)
+    p.set_defaults(func=cmd_maint_history)
+
+    p = maint_cmds.add_parser("schedule", help="add a recurring task (advanced by completed records)")
+    p.add_argument("--task", required=True, help="matches the description of completed records")
+    p.add_argument("--every", type=int, required=True, metavar="DAYS", help="interval in days")
+    p.add_argument("--aircraft", type=int, help="one aircraft")
+    p.add_argument("--fleet", action="store_true", help="every registered aircraft")
+    p.add_argument("--model", help="every aircraft of this model")
+    p.add_argument("--first-due", help="due date when the task was never done (default: today)")
+    p.set_defaults(func=cmd_maint_schedule)
+    p = maint_cmds.add_parser("due", help="scheduled tasks, earliest due first")
+    p.add_argument("--before", help="only tasks due on or before this date")
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--aircraft", type=int)
+    p.set_defaults(func=cmd_maint_due)
+    p = maint_cmds.add_parser("rollup", help="cost/status totals per aircraft or month")
+    p.add_argument("action", nargs="?", choices=("show", "rebuild", "check"), default="show")
+    p.add_argument("--aircraft", type=int, help="totals for one aircraft (default: per month)")
+    p.add_argument("--from", dest="month_from", help="first month (YYYY-MM)")
+    p.add_argument("--to", dest="month_to", help="last month (YYYY-MM)")
+    p.set_defaults(func=cmd_maint_rollup)
+
+
+def _weather_commands(weather):
+    weather_cmds = weather.add_subparsers(dest="command", required=True)
+    for name, func, help_text in (("add", cmd_weather_add, "record and score an observation"),
+                                  ("check", cmd_weather_check, "score an observation without saving")):
+        p = weather_cmds.add_parser(name, help=help_text)
+        p.add_argument("--wind", type=float, required=True, help="knots")
+        p.add_argument("--temp", type=float, required=True, help="°C")
+        p.add_argument("--humidity", type=float, required=True, help="%%")
+        p.add_argument("--visibility", type=float, required=True, help="km")
+        if name == "add":
+            p.add_argument("--date", required=True)
+            p.add_argument("--station", help="reporting station code (e.g. VIDP)")
+        _add_rule_flags(p)
+        p.set_defaults(func=func)
+
+    p = weather_cmds.add_parser("import", help="bulk import a CSV/JSONL file")
+    p.add_argument("file")
+    p.add_argument("--batch-size", type=int, default=5000)
+    _add_rule_flags(p)
+    p.set_defaults(func=cmd_weather_import)
+
+    p = weather_cmds.add_parser("rescore", help="re-score stored clearances under a rule set")
+    p.add_argument("--dry-run", action="store_true", help="only count the verdicts that would change")
+    _add_rule_flags(p)
+    p.set_defaults(func=cmd_weather_rescore)
+
+    p = weather_cmds.add_parser("serve", help="run the live line-delimited JSON ingestion server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    p.add_argument("--batch-size", type=int, default=5000, help="max rows per group commit")
+    p.add_argument("--commit-ms", type=float, default=50, help="max wait before a group commit")
+    p.add_argument("--max-pending", type=int, default=20000, help="queue bound (backpressure)")
+    _add_rule_flags(p)
+    p.set_defaults(func=cmd_weather_serve)
+
+    p = weather_cmds.add_parser("logs", help="weather history")
+    _add_history_flags(p)
+    p.add_argument("--station", help="only this station's observations")
+    p.set_defaults(func=cmd_weather_logs)
+
+    p = weather_cmds.add_parser("clearance", help="clearance decisions")
+    _add_history_flags(p)
+    p.add_argument("--station", help="only this station's observations")
+    p.set_defaults(func=cmd_weather_clearance)
+
+    p = weather_cmds.add_parser("latest", help="latest observation of every station (or one)")
+    p.add_argument("--station")
+    p.set_defaults(func=cmd_weather_latest)
+
+    p = weather_cmds.add_parser("stats", help="clearance rates, denial reasons and parameter ranges")
+    p.add_argument("--show", choices=("rates", "denials", "parameters", "all"), default="all")
+    p.add_argument("--period", choices=("day", "week"), default="week", help="grouping for clearance rates")
+    p.add_argument("--from", dest="date_from", help="first date (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", help="last date (YYYY-MM-DD)")
+    p.set_defaults(func=cmd_weather_stats)
+
+
+def _fuel_commands(fuel):
+    fuel_cmds = fuel.add_subparsers(dest="command", required=True)
+
+    p = fuel_cmds.add_parser("range", help="estimate range (saved when --date is given)")
+    p.add_argument("--fuel", type=float, required=True, help="kg")
+    p.add_argument("--burn", type=float, required=True, help="kg/hour")
+    p.add_argument("--speed", type=float, required=True, help="km/h")
+    p.add_argument("--date")
+    p.add_argument("--aircraft", type=int, help="link the saved estimate to an aircraft ID")
+    p.set_defaults(func=cmd_fuel_range)
+
+    p = fuel_cmds.add_parser("history", help="range calculation history")
+    _add_history_flags(p)
+    p.set_defaults(func=cmd_fuel_history)
+
+    p = fuel_cmds.add_parser("sweep", help="vectorized fuel x burn x speed sweep")
+    for axis in ("fuel", "burn", "speed"):
+        p.add_argument(f"--{axis}", type=float, nargs=3, required=True,
+                       metavar=("START", "STOP", "STEP"))
+    p.add_argument("--csv", help="write results to this CSV file")
+    p.add_argument("--save-date", help="persist results to the fuel database with this date")
+    p.set_defaults(func=cmd_fuel_sweep)
+    p = fuel_cmds.add_parser("model", help="weight-dependent range for an aircraft type (aircraft_models.json)")
+    p.add_argument("--aircraft", type=int, help="registered aircraft (its model is looked up)")
+    p.add_argument("--model", help="aircraft model, e.g. A320-214")
+    p.add_argument("--fuel", type=float, nargs="+", help="fuel onboard (kg); several values allowed")
+    p.add_argument("--date", help="with --aircraft: save the estimates with this date")
+    p.add_argument("--check", action="store_true", help="compare every table with the full integrator")
+    p.add_argument("--samples", type=int, default=50, help="random fuel loads per model for --check")
+    p.set_defaults(func=cmd_fuel_model)
+
+
+def _review_commands(review):
+    review_cmds = review.add_subparsers(dest="command", required=True)
+    p = review_cmds.add_parser("run", help="review every aircraft in every window and store the results")
+    p.add_argument("--from", dest="date_from", help="first day (default: first observation)")
+    p.add_argument("--to", dest="date_to", help="last day (default: last observation)")
+    p.add_argument("--window-days", type=int, default=1)
+    p.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    p.add_argument("--required-range", type=float, help="minimum range in km")
+    _add_rule_flags(p)
+    p.set_defaults(func=cmd_review_run)
+    p = review_cmds.add_parser("show", help="print stored review rows")
+    p.add_argument("--window", help="window start date")
+    p.add_argument("--aircraft", type=int)
+    p.add_argument("--verdict", help="verdict prefix, e.g. GO or NO-GO")
+    p.set_defaults(func=cmd_review_show)
+
+
+def _feed_commands(feed):
+    feed_cmds = feed.add_subparsers(dest="action", required=True)
+    p = feed_cmds.add_parser("read", help="print new and updated rows and advance the watermark")
+    p.add_argument("table", choices=("maintenance", "weather", "fuel"))
+    p.add_argument("--consumer", required=True, help="name the watermark is stored under")
+    p.add_argument("--page-size", type=int, default=1000, help="rows fetched per query")
+    p.add_argument("--peek", action="store_true", help="do not move the watermark")
+    p.add_argument("--reset", action="store_true", help="start again from the first row")
+    p.set_defaults(func=cmd_feed_read)
+    p = feed_cmds.add_parser("status", help="list consumers and their watermarks")
+    p.set_defaults(func=cmd_feed_status)
+
+
+def _snapshot_commands(backup):
+    backup_cmds = backup.add_subparsers(dest="action", required=True)
+    p = backup_cmds.add_parser("create", help="take a consistent snapshot while the app keeps running")
+    p.add_argument("--dir", help="backup directory (default: backups)")
+    p.add_argument("--verify", action="store_true", help="run PRAGMA quick_check on each copy")
+    p.set_defaults(func=cmd_snapshot)
+    p = backup_cmds.add_parser("list", help="list snapshots")
+    p.add_argument("--dir", help="backup directory (default: backups)")
+    p.set_defaults(func=cmd_snapshot)
+    p = backup_cmds.add_parser("restore", help="replace the live databases with a snapshot")
+    p.add_argument("archive", help="snapshot directory, or its name in the backup directory")
+    p.add_argument("--dir", help="backup directory (default: backups)")
+    p.add_argument("--only", nargs="+", metavar="FILE",
+                   help="restore only these files (e.g. weather.db or stations/VIDP.db)")
+    p.set_defaults(func=cmd_snapshot)
+
+
+def _export_commands(p):
+    p.add_argument("tables", nargs="*", metavar="TABLE",
+                   help="weather, maintenance and/or fueldata (default: all three)")
+    p.add_argument("--dir", help="export directory (default: exports)")
+    p.add_argument("--full", action="store_true", help="rebuild instead of appending new rows")
+    p.add_argument("--check", action="store_true", help="compare each export with its table afterwards")
+    p.set_defaults(func=cmd_export)
+
+
+def _preflight_commands(p):
+    p.add_argument("--aircraft", type=int, help="check one aircraft (default: whole fleet)")
+    p.add_argument("--required-range", type=float, help="minimum range in km")
+    p.add_argument("--station", help="use the latest weather at this station (default: any)")
+    p.add_argument("--strict", action="store_true", help="exit with status 1 unless every aircraft is GO")
+    p.set_defaults(func=cmd_preflight)
+
+
+def _migrate_commands(p):
+    p.set_defaults(func=cmd_migrate)
+
+
+# Subcommand modules in `foss --help` order: name -> (help, function that
+# adds the module's arguments and subcommands to its parser)
+MODULES = {
+    "menu": ("start the interactive menu", None),
+    "maint": ("aircraft and maintenance records", _maint_commands),
+    "weather": ("weather records and takeoff clearance", _weather_commands),
+    "fuel": ("fuel and range estimation", _fuel_commands),
+    "review": ("fleet-wide review over observation windows (multi-process)", _review_commands),
+    "feed": ("rows inserted or updated since a consumer's last sync", _feed_commands),
+    "snapshot": ("online backup and restore of every database", _snapshot_commands),
+    "export": ("columnar NumPy export of the history tables (memory-mappable)", _export_commands),
+    "preflight": ("go/no-go check across all three databases", _preflight_commands),
+    "migrate": ("normalize stored dates to YYYY-MM-DD and report bad rows", _migrate_commands),
+}
+
+
+class _Parser(argparse.ArgumentParser):
+    # argparse makes a help formatter for every add_argument() call, and the
+    # default one imports shutil to size the terminal; os can do that alone.
+    # Subparsers inherit the class.
+    def _get_formatter(self):
+        return self.formatter_class(prog=self.prog, width=_help_width())
+
+
+def _help_width():
+    # shutil.get_terminal_size().columns, less the 2 argparse leaves free.
+    try:
+        columns = int(os.environ.get("COLUMNS", 0))
+    except ValueError:
+        columns = 0
+    if columns <= 0:
+        try:
+            columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+        except (AttributeError, ValueError, OSError):
+            columns = 0
+    return (columns or 80) - 2
+
+
+def build_parser(modules=None):
+    """
+    Returns the argument parser. Only the modules named in modules (all
+    of them if None) get their subcommands; the rest are listed for
+    --help but left empty, which keeps start-up cheap for main().
+    """
+    parser = _Parser(prog="foss", description="Flight Operational Support Suite")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every database operation and print a summary at exit")
+    parser.add_argument("--profile-json", metavar="PATH", help="like --profile, but write the summary as JSON")
+    parser.add_argument("--batch-rows", type=int, metavar="N",
+                        help="commit single-record writes in groups of N rows (default: 1, commit each)")
+    parser.add_argument("--batch-ms", type=float, metavar="T",
+                        help="longest a batched row waits for its commit, in ms (default: 200)")
+    parser.add_argument("--durability", choices=("full", "normal", "off"),
+                        help="fsync policy for commits: full, normal (default) or off")
+    parser.add_argument("--shard-stations", action="store_true",
+                        help="store weather for each station in its own database file")
+    subparsers = parser.add_subparsers(dest="module", metavar="{maint,weather,fuel,preflight,review,feed,snapshot,export,migrate,menu}")
+    for name, (help_text, add_commands) in MODULES.items():
+        module = subparsers.add_parser(name, help=help_text)
+        if add_commands is not None and (modules is None or name in modules):
+            add_commands(module)
+    return parser
+
+
+# Global options of build_parser(), for _chosen_module()
+FLAG_OPTIONS = ("-h", "--help", "--profile", "--shard-stations")
+VALUE_OPTIONS = ("--profile-json", "--batch-rows", "--batch-ms", "--durability")
+
+
+def _chosen_module(argv):
+    # The subcommand module named on the command line, or None. A plain scan
+    # past the global options (long ones may be abbreviated, as argparse
+    # allows), so the parser is built once, for that module only; the full
+    # parse reports any errors with the proper usage text.
+    takes_value = False
+    for arg in sys.argv[1:] if argv is None else argv:
+        if takes_value:
+            takes_value = False
+        elif arg.startswith("-"):
+            name = arg.split("=", 1)[0]
+            takes_value = ("=" not in arg and name not in FLAG_OPTIONS and name.startswith("--")
+                           and any(option.startswith(name) for option in VALUE_OPTIONS))
+        else:
+            return arg if arg in MODULES else None
+    return None
+
+
+def main(argv=None):
+    module = _chosen_module(argv)
+    args = build_parser(modules=() if module is None else (module,)).parse_args(argv)
+
+    if args.profile or args.profile_json:
+        import profiling
+        profiling.enable(args.profile_json)
+    if args.shard_stations:
+        import stations
+        stations.configure(True)
+    if args.batch_rows or args.batch_ms is not None or args.durability:
+        import db
+        try:
+            db.configure_writes(args.batch_rows, args.batch_ms, args.durability)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    if args.module in (None, "menu"):
+        from main import main as run_menu
+        run_menu()
+        return 0
+
+    try:
+        args.func(args)
+    except BrokenPipeError:
+        raise
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Database Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run(argv=None):
+    """Runs main() as the foss.py script: exit status, Ctrl-C and closed pipes."""
+    try:
+        sys.exit(main(argv))
+    except KeyboardInterrupt:
+        print("\nProgram terminated manually by user.")
+    except BrokenPipeError:
+        # Output was piped into a command that exited early (e.g. head)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
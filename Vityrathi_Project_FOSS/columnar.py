@@ -0,0 +1,625 @@
+"""
+Module: columnar.py
+Purpose: Columnar export of the history tables to memory-mappable files.
+
+This module handles:
+- Writing weather, maintenance and fueldata to one NumPy .npy file per
+  column, CHUNK_ROWS rows at a time, so memory use does not grow with the
+  table
+- Exporting weather from weather.db and every station database of
+  stations.py as one table; the source column names the file each row
+  came from
+- Dictionary-encoding the low-cardinality text columns (DICTIONARY_COLUMNS:
+  clearance, status, engineer, station, source): int32 codes in the .npy
+  file, the strings in the manifest
+- Storing other text (e.g. maintenance.description) as UTF-8 bytes in one
+  .npy file, with a start offset and a length per row
+- Incremental exports: only rows added since the last export are appended,
+  and rows updated since then (the change log of changefeed.py) are
+  rewritten in place
+- open_export(): reading an export back as memory-mapped arrays, with no
+  copy and no SQLite scan
+- check_export(): comparing an export with its table
+
+Each table is exported to <directory>/<table>/ with a manifest.json that
+holds the column kinds, the dictionaries, the byte count of each text
+column, the row count and, per source
+database, the last exported id and change sequence number. The manifest
+is written last, so an export interrupted part-way is ignored: its rows
+are cut off and exported again next time. Every export opens its read
+transactions on all source databases before reading any rows, so the
+files match the table as it was at one moment.
+
+Column kinds and their NULLs:
+    int    int64            -1 (NULL_INT)
+    float  float64          NaN
+    date   datetime64[D]    NaT (also for dates that cannot be parsed)
+    code   int32 codes      -1 (NULL_CODE)
+    text   <name>.start.npy int64 and <name>.length.npy int32 into the
+           bytes of <name>.utf8.npy; length -1 for NULL. An updated value
+           is appended, so the bytes of the old one stay unused until the
+           next full export.
+
+Every .npy file has a HEADER_BYTES header, so its length can grow without
+moving the data.
+
+Rows keep their source's order (by id) within each source; rows of
+different sources interleave as they are appended. NumPy is required.
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import db
+import fuel_calc
+import maintenance
+import stations
+import weather
+
+EXPORT_DIR = "exports"
+MANIFEST = "manifest.json"
+
+# Rows fetched from SQLite and appended per step
+CHUNK_ROWS = 100000
+
+NULL_INT = -1
+NULL_CODE = -1
+
+# Bumped when the file layout changes (older exports are then rebuilt)
+FORMAT_VERSION = 3
+
+# Extra column: the database a row was read from (e.g. stations/VIDP.db)
+SOURCE_COLUMN = "source"
+
+# Text columns with few distinct values; other text is stored as UTF-8
+DICTIONARY_COLUMNS = ("clearance", "status", "engineer", "station", SOURCE_COLUMN)
+
+DTYPES = {"int": "<i8", "float": "<f8", "date": "<M8[D]", "code": "<i4"}
+
+# Per-row files of a text column (<name>.<part>.npy), plus <name>.utf8.npy
+TEXT_PARTS = {"start": "<i8", "length": "<i4"}
+TEXT_BYTES = "u1"
+
+# Size of every .npy header (room for any row count)
+HEADER_BYTES = 128
+
+
+def _tables():
+    # table -> module owning its database (paths read at call time)
+    return {"weather": weather, "maintenance": maintenance, "fueldata": fuel_calc}
+
+
+def tables():
+    """Names of the tables that can be exported."""
+    return list(_tables())
+
+
+def _sources(table):
+    # (name, path) of every database holding rows of table: weather rows
+    # are spread over weather.db and the station databases
+    module = _tables()[table]
+    sources = [(os.path.basename(module.DB_PATH), module.DB_PATH)]
+    if module is weather:
+        sources += [(f"{stations.SHARD_DIR_NAME}/{station}.db", path) for station, path in stations.shards()]
+    return sources
+
+
+def _kind(name, declared):
+    # Column kind from SQLite's type affinity rules (dates are stored as TEXT).
+    declared = (declared or "").upper()
+    if name == "date" or name.endswith("_date"):
+        return "date"
+    if "INT" in declared:
+        return "int"
+    if any(word in declared for word in ("REAL", "FLOA", "DOUB")):
+        return "float"
+    return "code" if name in DICTIONARY_COLUMNS else "text"
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, name + ".npy")
+
+
+def _files(name, kind):
+    # (file name, dtype) of the per-row files of one column
+    if kind == "text":
+        return [(f"{name}.{part}", dtype) for part, dtype in TEXT_PARTS.items()]
+    return [(name, DTYPES[kind])]
+
+
+def _bytes_path(directory, name):
+    return _column_path(directory, name + ".utf8")
+
+
+# ------------------------------------------------------ #
+# .npy files that grow
+# ------------------------------------------------------ #
+def _read_header(f):
+    # Returns (rows, dtype, offset of the data).
+    import numpy as np
+
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+    return shape[0], dtype, f.tell()
+
+
+def _header(dtype, rows):
+    # A version 1.0 header padded to HEADER_BYTES; the row count can grow
+    # to any size without the data moving
+    import numpy as np
+
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(dtype), rows)
+    prefix = np.lib.format.MAGIC_PREFIX + bytes((1, 0))
+    size = HEADER_BYTES - len(prefix) - 2
+    return prefix + size.to_bytes(2, "little") + text.ljust(size - 1).encode("latin1") + b"\n"
+
+
+def _create_column(path, dtype):
+    import numpy as np
+
+    with open(path, "wb") as f:
+        f.write(_header(np.dtype(dtype), 0))
+
+
+def _write_rows(path, start, values=None):
+    """
+    Writes values at row start and makes start + len(values) the row
+    count; later rows are cut off (all of them if values is None).
+    """
+    import numpy as np
+
+    with open(path, "r+b") as f:
+        _, dtype, offset = _read_header(f)
+        if offset != HEADER_BYTES:
+            raise ValueError(f"{path} was written by an older version; export with --full.")
+        values = np.empty(0, dtype) if values is None else values.astype(dtype, copy=False)
+        f.seek(offset + start * dtype.itemsize)
+        f.write(values.tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(_header(dtype, start + len(values)))
+
+
+# ------------------------------------------------------ #
+# Rows -> column arrays
+# ------------------------------------------------------ #
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return NULL_INT
+
+
+def _as_date(value):
+    import numpy as np
+
+    try:
+        return np.datetime64(value, "D") if value else np.datetime64("NaT")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+class _Dictionary:
+    """Strings of one text column and their codes (first seen, first numbered)."""
+
+    __slots__ = ("strings", "codes")
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self.codes = {value: code for code, value in enumerate(self.strings)}
+
+    def code(self, value):
+        if value is None:
+            return NULL_CODE
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+class _Bytes:
+    """UTF-8 bytes of one text column, appended to its .utf8.npy file."""
+
+    __slots__ = ("path", "size")
+
+    def __init__(self, path, size=0):
+        self.path = path
+        self.size = size
+
+    def append(self, values):
+        # Writes values after the current end; returns (starts, lengths).
+        import numpy as np
+
+        encoded = [None if value is None else str(value).encode() for value in values]
+        lengths = np.fromiter((-1 if data is None else len(data) for data in encoded),
+                              dtype=TEXT_PARTS["length"], count=len(encoded))
+        sizes = np.maximum(lengths, 0).astype(TEXT_PARTS["start"])
+        starts = self.size + np.cumsum(sizes) - sizes
+        data = b"".join(data for data in encoded if data)
+        _write_rows(self.path, self.size, np.frombuffer(data, dtype=TEXT_BYTES))
+        self.size += len(data)
+        return starts, lengths
+
+
+def _to_array(kind, values, dictionary=None):
+    # One column of a chunk; the fast NumPy conversion first, then the
+    # value-by-value one if the column holds NULLs or stray types.
+    import numpy as np
+
+    if kind == "code":
+        return np.fromiter((dictionary.code(value) for value in values), dtype=DTYPES["code"],
+                           count=len(values))
+    convert = {"int": _as_int, "float": _as_float, "date": _as_date}[kind]
+    try:
+        return np.array(values, dtype=DTYPES[kind])
+    except (TypeError, ValueError):
+        return np.array([convert(value) for value in values], dtype=DTYPES[kind])
+
+
+def _chunk_arrays(columns, rows, encoders):
+    # {file name: array} for a list of row tuples; text values are
+    # appended to their byte files on the way.
+    values = list(zip(*rows))
+    arrays = {}
+    for i, (name, kind) in enumerate(columns):
+        if kind == "text":
+            arrays[f"{name}.start"], arrays[f"{name}.length"] = encoders[name].append(values[i])
+        else:
+            arrays[name] = _to_array(kind, values[i], encoders.get(name))
+    return arrays
+
+
+# ------------------------------------------------------ #
+# Export
+# ------------------------------------------------------ #
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(directory, manifest):
+    # Written to a temporary file and renamed: the commit point of an export.
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+
+
+def _source_rows(target, rows, code):
+    # Positions of one source's rows among the first rows, in id order.
+    import numpy as np
+
+    return np.flatnonzero(np.load(_column_path(target, SOURCE_COLUMN), mmap_mode="r")[:rows] == code)
+
+
+def _append_rows(conn, table, columns, target, start, encoders, after_id, upto_id, code):
+    # Streams rows after_id < id <= upto_id of one source (code) onto the
+    # column files; returns the new row count.
+    import numpy as np
+
+    names = ", ".join(name for name, _ in columns)
+    cursor = conn.execute(f"SELECT {names} FROM {table} WHERE id > ? AND id <= ? ORDER BY id",
+                          (after_id, upto_id))
+    rows = start
+    while True:
+        chunk = cursor.fetchmany(CHUNK_ROWS)
+        if not chunk:
+            return rows
+        for name, values in _chunk_arrays(columns, chunk, encoders).items():
+            _write_rows(_column_path(target, name), rows, values)
+        _write_rows(_column_path(target, SOURCE_COLUMN), rows,
+                    np.full(len(chunk), code, dtype=DTYPES["code"]))
+        rows += len(chunk)
+
+
+def _apply_updates(conn, table, columns, target, positions, encoders, last_id, last_seq, top_seq):
+    # Rewrites in place the exported rows of one source (at positions, in
+    # id order) updated since last_seq; returns how many.
+    import numpy as np
+
+    if top_seq <= last_seq or len(positions) == 0:
+        return 0
+    ids = np.load(_column_path(target, "id"), mmap_mode="r")[positions]
+    rows = len(ids)
+    names = ", ".join("t." + name for name, _ in columns)
+    cursor = conn.execute(f"""
+    SELECT {names} FROM {table}_changes c JOIN {table} t ON t.id = c.row_id
+    WHERE c.seq > ? AND c.seq <= ? AND c.row_id <= ?
+    """, (last_seq, top_seq, last_id))
+    updated = 0
+    while True:
+        chunk = cursor.fetchmany(CHUNK_ROWS)
+        if not chunk:
+            return updated
+        arrays = _chunk_arrays(columns, chunk, encoders)
+        index = np.searchsorted(ids, arrays["id"])
+        found = (index < rows) & (ids[np.minimum(index, rows - 1)] == arrays["id"])
+        for name, values in arrays.items():
+            column = np.load(_column_path(target, name), mmap_mode="r+")
+            column[positions[index[found]]] = values[found]
+            column.flush()
+            del column
+        updated += int(found.sum())
+
+
+def export_table(table, directory=None, full=False):
+    """
+    Exports one table to <directory>/<table>/, incrementally when the previous
+    export is still usable. Returns stats (mode, appended, updated, rows, ...).
+    """
+    module = _tables()[table]
+    directory = directory or EXPORT_DIR
+    target = os.path.join(directory, table)
+    start = time.perf_counter()
+
+    module.get_db()  # creates missing files and brings schemas up to date
+    sources = _sources(table)
+    for _, path in sources[1:]:
+        db.connect(path, module.create_schema)
+    db.flush()       # rows waiting for a group commit are not visible to the readers
+    connections = []
+    try:
+        for _, path in sources:
+            connections.append(db.open_read_only(path))
+        # Every source's read transaction starts before any rows are read
+        tops = {}
+        for (name, _), conn in zip(sources, connections):
+            conn.execute("BEGIN")
+            tops[name] = conn.execute(
+                f"SELECT (SELECT IFNULL(MAX(id), 0) FROM {table}), "
+                f"(SELECT IFNULL(MAX(seq), 0) FROM {table}_changes)").fetchone()
+        columns = [(row[1], _kind(row[1], row[2]))
+                   for row in connections[0].execute(f"PRAGMA table_info({table})")]
+        exported = columns + [(SOURCE_COLUMN, "code")]
+
+        manifest = None if full else _load_manifest(target)
+        if manifest is not None and (manifest.get("version") != FORMAT_VERSION
+                                     or manifest.get("columns") != [list(column) for column in exported]
+                                     or any(name not in tops
+                                            or entry["last_id"] > tops[name][0]
+                                            or entry["last_seq"] > tops[name][1]
+                                            for name, entry in manifest["sources"].items())):
+            manifest = None
+
+        if manifest is None:
+            mode = "full"
+            # Built next to the old export and swapped in when complete
+            work = target + ".partial"
+            shutil.rmtree(work, ignore_errors=True)
+            os.makedirs(work)
+            for name, kind in exported:
+                for file, dtype in _files(name, kind):
+                    _create_column(_column_path(work, file), dtype)
+                if kind == "text":
+                    _create_column(_bytes_path(work, name), TEXT_BYTES)
+            encoders = {name: _Dictionary() for name, kind in exported if kind == "code"}
+            encoders.update((name, _Bytes(_bytes_path(work, name))) for name, kind in exported if kind == "text")
+            done, rows = {}, 0
+        else:
+            mode = "incremental"
+            work = target
+            encoders = {name: _Dictionary(strings) for name, strings in manifest["dictionaries"].items()}
+            encoders.update((name, _Bytes(_bytes_path(work, name), size))
+                            for name, size in manifest["text_bytes"].items())
+            done, rows = manifest["sources"], manifest["rows"]
+            # Drops what an interrupted export wrote after the last manifest
+            for name, kind in exported:
+                for file, _ in _files(name, kind):
+                    _write_rows(_column_path(work, file), rows)
+            for name, size in manifest["text_bytes"].items():
+                _write_rows(_bytes_path(work, name), size)
+
+        updated, total, exported_sources = 0, rows, {}
+        for (name, path), conn in zip(sources, connections):
+            top_id, top_seq = tops[name]
+            # A source new to this export: every row is appended, no updates
+            last_id, last_seq = (0, top_seq) if name not in done else (
+                done[name]["last_id"], done[name]["last_seq"])
+            code = encoders[SOURCE_COLUMN].code(name)
+            if top_seq > last_seq:
+                positions = _source_rows(work, rows, code)
+                updated += _apply_updates(conn, table, columns, work, positions, encoders,
+                                          last_id, last_seq, top_seq)
+            total = _append_rows(conn, table, columns, work, total, encoders, last_id, top_id, code)
+            exported_sources[name] = {"path": os.path.abspath(path), "last_id": top_id, "last_seq": top_seq}
+            conn.rollback()
+    finally:
+        for conn in connections:
+            conn.close()
+
+    _save_manifest(work, {
+        "version": FORMAT_VERSION,
+        "table": table,
+        "exported": datetime.now().isoformat(timespec="seconds"),
+        "columns": [list(column) for column in exported],
+        "rows": total,
+        "sources": exported_sources,
+        "dictionaries": {name: encoder.strings for name, encoder in encoders.items()
+                         if isinstance(encoder, _Dictionary)},
+        "text_bytes": {name: encoder.size for name, encoder in encoders.items() if isinstance(encoder, _Bytes)},
+    })
+    if work != target:
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(work, target)
+
+    seconds = time.perf_counter() - start
+    appended = total - rows
+    return {"table": table, "mode": mode, "appended": appended, "updated": updated, "rows": total,
+            "seconds": round(seconds, 4), "rows_per_sec": round(appended / seconds, 1) if seconds else None,
+            "path": target}
+
+
+def export_all(directory=None, full=False, names=None):
+    """Exports every table (or those in names); returns {table: stats}."""
+    unknown = [name for name in names or () if name not in _tables()]
+    if unknown:
+        raise ValueError(f"Cannot export {', '.join(unknown)}; choose from {', '.join(tables())}.")
+    return {table: export_table(table, directory, full) for table in names or tables()}
+
+
+# ------------------------------------------------------ #
+# Reading exports
+# ------------------------------------------------------ #
+class ExportedTable:
+    """
+    An exported table: each column is a read-only memory map of its .npy
+    file, opened on first use.
+    """
+
+    __slots__ = ("table", "path", "rows", "sources", "kinds", "dictionaries", "text_bytes", "_columns")
+
+    def __init__(self, table, path, manifest):
+        self.table = table
+        self.path = path
+        self.rows = manifest["rows"]
+        self.sources = manifest["sources"]  # name -> path, last_id, last_seq
+        self.kinds = dict(manifest["columns"])
+        self.dictionaries = manifest["dictionaries"]
+        self.text_bytes = manifest["text_bytes"]
+        self._columns = {}
+
+    @property
+    def columns(self):
+        return list(self.kinds)
+
+    def __len__(self):
+        return self.rows
+
+    def _file(self, file, count):
+        import numpy as np
+
+        array = self._columns.get(file)
+        if array is None:
+            # Anything past count belongs to an unfinished export
+            array = self._columns[file] = np.load(_column_path(self.path, file), mmap_mode="r")[:count]
+        return array
+
+    def __getitem__(self, name):
+        """The column as stored (code columns as codes), without copying."""
+        kind = self.kinds.get(name)
+        if kind is None:
+            raise KeyError(name)
+        if kind == "text":
+            raise TypeError(f"{name} is stored as UTF-8 bytes; use decode().")
+        return self._file(name, self.rows)
+
+    def code(self, name, value):
+        """Code of a string in a code column (NULL_CODE if it never occurs)."""
+        try:
+            return self.dictionaries[name].index(value)
+        except ValueError:
+            return NULL_CODE
+
+    def decode(self, name, rows=slice(None)):
+        """Strings of a code or text column (None for NULL) as an object array."""
+        import numpy as np
+
+        if self.kinds[name] == "code":
+            strings = np.array(self.dictionaries[name] + [None], dtype=object)
+            return strings[self[name][rows]]  # NULL_CODE (-1) picks the trailing None
+        starts = self._file(f"{name}.start", self.rows)[rows]
+        lengths = self._file(f"{name}.length", self.rows)[rows]
+        data = self._file(f"{name}.utf8", self.text_bytes[name])
+        strings = np.empty(len(starts), dtype=object)
+        strings[:] = [None if length < 0 else bytes(data[start:start + length]).decode()
+                      for start, length in zip(starts.tolist(), lengths.tolist())]
+        return strings
+
+
+def open_export(table, directory=None):
+    """Opens an exported table; raises FileNotFoundError if it was never exported."""
+    path = os.path.join(directory or EXPORT_DIR, table)
+    manifest = _load_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"No export of {table} in {directory or EXPORT_DIR}.")
+    return ExportedTable(table, path, manifest)
+
+
+def check_export(table, directory=None, limit=10):
+    """
+    Compares an export with its table in every source database, row by
+    row, as of the export's last id for that source. Rows updated since
+    the export are reported too, and so are source databases the export
+    does not cover. Returns up to limit descriptions of differences;
+    empty when they match.
+    """
+    import numpy as np
+
+    export = open_export(table, directory)
+    module = _tables()[table]
+    kinds = [(name, kind) for name, kind in export.kinds.items() if name != SOURCE_COLUMN]
+    dictionaries = {name: _Dictionary(export.dictionaries[name]) for name, kind in kinds if kind == "code"}
+    names = ", ".join(name for name, _ in kinds)
+    sources = dict(_sources(table))
+    problems = []
+    for name in sorted(export.sources.keys() - sources.keys()):
+        problems.append(f"{name}: exported, but the database is gone")
+    for name, path in sources.items():
+        conn = db.connect(path, module.create_schema)
+        if name not in export.sources:
+            if conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]:
+                problems.append(f"{name}: {table} rows not in the export")
+            continue
+        positions = np.flatnonzero(export[SOURCE_COLUMN] == export.code(SOURCE_COLUMN, name))
+        cursor = conn.execute(f"SELECT {names} FROM {table} WHERE id <= ? ORDER BY id",
+                              (export.sources[name]["last_id"],))
+        problems += _check_source(export, name, cursor, kinds, dictionaries, positions,
+                                  limit - len(problems))
+        if len(problems) >= limit:
+            break
+    return problems[:limit]
+
+
+def _check_source(export, name, cursor, kinds, dictionaries, positions, limit):
+    # Differences between one source's rows (cursor, in id order) and the
+    # exported rows at positions.
+    import numpy as np
+
+    problems = []
+    position = 0
+    while len(problems) < limit:
+        chunk = cursor.fetchmany(CHUNK_ROWS)
+        if not chunk:
+            break
+        values = list(zip(*chunk))
+        rows = positions[position:position + len(chunk)]
+        if len(rows) != len(chunk):
+            problems.append(f"{name}: {position + len(rows)} {export.table} rows exported, more in the table")
+            return problems
+        for i, (column, kind) in enumerate(kinds):
+            if kind == "text":
+                stored = export.decode(column, rows)
+                expected = np.empty(len(chunk), dtype=object)
+                expected[:] = [None if value is None else str(value) for value in values[i]]
+                same = stored == expected
+            else:
+                stored = export[column][rows]
+                expected = _to_array(kind, values[i], dictionaries.get(column))
+                same = (stored == expected) | (np.isnan(stored) & np.isnan(expected)
+                                               if kind in ("float", "date") else False)
+            for i in np.flatnonzero(~same)[:limit - len(problems)]:
+                problems.append(f"{name} {export.table} id {chunk[i][0]}: {column} differs")
+        position += len(chunk)
+    if not problems and position != len(positions):
+        problems.append(f"{name}: {len(positions)} {export.table} rows exported, {position} in the table")
+    return problems
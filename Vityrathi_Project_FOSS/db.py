@@ -0,0 +1,431 @@
+"""
+Module: db.py
+Purpose: Shared SQLite connection layer for all FOSS modules.
+
+This module handles:
+- Keeping one persistent connection per database file for the whole process
+- Applying performance pragmas once, when a connection is first opened
+- Running each module's schema check once per database per process
+- Normalized YYYY-MM-DD dates: validation, in-place migration and triggers
+- Handing out connections/cursors to the maintenance, weather and fuel modules
+- Closing every connection cleanly at exit
+- Opening instrumented connections when profiling.py is enabled
+- Optional group commit of single-record writes, with a durability setting
+"""
+
+import atexit
+import os
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+
+# ------------------------------------------------------ #
+# Connection Tuning
+# ------------------------------------------------------ #
+# Applied once per connection, in this order.
+PRAGMAS = (
+    ("journal_mode", "WAL"),       # readers never block the writer
+    ("synchronous", "NORMAL"),     # safe with WAL, one fsync per checkpoint
+    ("cache_size", -32000),        # ~32 MB page cache (negative = KiB)
+    ("mmap_size", 268435456),      # map up to 256 MB of the file
+    ("temp_store", "MEMORY"),
+)
+
+# Subset of PRAGMAS that read-only connections may set
+READ_ONLY_PRAGMAS = tuple(p for p in PRAGMAS if p[0] in ("cache_size", "mmap_size", "temp_store"))
+
+# Open connections keyed by absolute database path
+_connections = {}
+
+# (working directory, path) -> absolute path; connect() runs on every write
+_keys = {}
+
+# Set once _profiler() has looked at FOSS_PROFILE
+_profile_env_checked = False
+
+
+# ------------------------------------------------------ #
+# Connection Management
+# ------------------------------------------------------ #
+def _profiler():
+    # The profiling module when profiling is on, else None. It is imported
+    # only once enable() was called or FOSS_PROFILE asks for it (checked on
+    # the first connection only), so normal start-up does not load it.
+    global _profile_env_checked
+    module = sys.modules.get("profiling")
+    if module is None and not _profile_env_checked:
+        _profile_env_checked = True
+        if os.environ.get("FOSS_PROFILE", "").strip():
+            import profiling as module
+    return module if module is not None and module.enabled else None
+
+
+def _apply_pragmas(conn):
+    # Tunes a freshly opened connection.
+    for name, value in PRAGMAS:
+        if name == "synchronous":
+            value = DURABILITY[durability]
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def open_connection(path, **kwargs):
+    """
+    Opens a new, unshared connection tuned with PRAGMAS.
+
+    For worker threads or processes that cannot use the shared connection.
+    The caller owns it and must close it.
+    """
+    if not _env_loaded:
+        configure_from_env()
+    profiler = _profiler()
+    if profiler:
+        kwargs.setdefault("factory", profiler.ProfiledConnection)
+    conn = sqlite3.connect(os.path.abspath(path), **kwargs)
+    _apply_pragmas(conn)
+    return conn
+
+
+def _read_only_uri(path):
+    from urllib.parse import quote
+    return "file:" + quote(os.path.abspath(path)) + "?mode=ro"
+
+
+def open_read_only(path, **kwargs):
+    """
+    Opens a new read-only connection (e.g. one per worker process).
+
+    Writes fail with sqlite3.OperationalError. Databases attached through
+    attach(..., read_only=True) are read-only as well. The caller owns it
+    and must close it.
+    """
+    kwargs["uri"] = True
+    profiler = _profiler()
+    if profiler:
+        kwargs["factory"] = profiler.ProfiledConnection
+    conn = sqlite3.connect(_read_only_uri(path), **kwargs)
+    for name, value in READ_ONLY_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def path_key(path):
+    """Returns os.path.abspath(path), memoised per working directory."""
+    cwd = os.getcwd()
+    key = _keys.get((cwd, path))
+    if key is None:
+        key = _keys[(cwd, path)] = os.path.abspath(path)
+    return key
+
+
+def connect(path, schema=None):
+    """
+    Returns the shared connection for a database file.
+
+    The connection is opened and tuned on first use and reused by every
+    later call; schema(conn), if given, runs only at that point. Callers
+    must not close it; use close_all() instead.
+    """
+    key = path_key(path)
+    conn = _connections.get(key)
+    if conn is None:
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(key), exist_ok=True)
+        conn = open_connection(key)
+        _connections[key] = conn
+        if schema is not None:
+            schema(conn)
+        profiler = _profiler()
+        if profiler:
+            profiler.record(os.path.basename(key), "connect + schema", time.perf_counter() - start)
+    return conn
+
+
+def attach(conn, alias, path, read_only=False):
+    """
+    Attaches another database file to conn under alias, once.
+
+    read_only=True needs a connection opened by open_read_only().
+    """
+    attached = [row[1] for row in conn.execute("PRAGMA database_list")]
+    if alias not in attached:
+        target = _read_only_uri(path) if read_only else os.path.abspath(path)
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (target,))
+
+
+def cursor(path):
+    """Returns a new cursor on the shared connection for path."""
+    return connect(path).cursor()
+
+
+def close(path):
+    """Commits pending writes and closes the shared connection for path, if one is open."""
+    conn = _connections.pop(os.path.abspath(path), None)
+    if conn is not None:
+        _flush(conn)
+        conn.close()
+
+
+def close_all():
+    """Commits pending writes and closes every shared connection (registered to run at exit)."""
+    while _connections:
+        _, conn = _connections.popitem()
+        try:
+            _flush(conn)
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(close_all)
+
+
+# ------------------------------------------------------ #
+# Batched writes (group commit)
+# ------------------------------------------------------ #
+# Single-record writes (log_maintenance, record_weather, calculate_range and
+# their record APIs) go through write(). By default each one commits at
+# once. With batch_rows > 1 the rows are still inserted immediately (ids,
+# triggers and errors behave as before, and this process reads them back),
+# but the COMMIT is shared by up to batch_rows rows or batch_interval
+# seconds of writes, whichever comes first. Pending rows are committed by
+# flush(), by close()/close_all() (so at exit) and whenever other code
+# commits the same connection. Until then other processes do not see them,
+# and a crash loses them.
+#
+# durability sets PRAGMA synchronous for every shared connection:
+#   "full"   - each commit is fsynced; a committed row survives power loss
+#   "normal" - WAL default; commits survive a crash of this process, the
+#              last ones may be lost on power loss (database stays intact)
+#   "off"    - no fsync at all; fastest, for bulk replays that can be redone
+DURABILITY = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}
+
+batch_rows = 1
+batch_interval = 0.2
+durability = "normal"
+
+# connection -> [rows waiting for commit, time.monotonic() of the first one]
+_pending = {}
+
+# Set once FOSS_BATCH_ROWS / FOSS_BATCH_MS / FOSS_DURABILITY have been applied
+_env_loaded = False
+
+
+def configure_writes(rows=None, interval_ms=None, durability_level=None):
+    """
+    Sets the group-commit size (rows; 1 = commit every write), the longest
+    a written row may wait for its commit (ms), and the durability level.
+    Pending rows are committed first; open connections are updated.
+    Raises ValueError, changing nothing, if a value is invalid.
+    """
+    global batch_rows, batch_interval, durability
+    if not _env_loaded:
+        configure_from_env()  # explicit settings win over the environment
+    rows, interval_ms, durability_level = _check_writes(rows, interval_ms, durability_level)
+
+    flush()
+    if rows is not None:
+        batch_rows = rows
+    if interval_ms is not None:
+        batch_interval = interval_ms / 1000
+    if durability_level is not None:
+        durability = durability_level
+        for conn in _connections.values():
+            conn.execute(f"PRAGMA synchronous = {DURABILITY[durability]}")
+
+
+def _check_writes(rows, interval_ms, durability_level):
+    # Validated and converted configure_writes() arguments (None = unchanged).
+    if rows is not None:
+        try:
+            rows = int(rows)
+        except ValueError:
+            raise ValueError("Batch size must be a whole number of rows.") from None
+        if rows < 1:
+            raise ValueError("Batch size must be at least 1 row.")
+    if interval_ms is not None:
+        try:
+            interval_ms = float(interval_ms)
+        except ValueError:
+            raise ValueError("Batch interval must be a number of milliseconds.") from None
+        if interval_ms < 0:
+            raise ValueError("Batch interval cannot be negative.")
+    if durability_level is not None and durability_level not in DURABILITY:
+        raise ValueError(f"Durability must be one of: {', '.join(DURABILITY)}.")
+    return rows, interval_ms, durability_level
+
+
+def write(conn, sql, params=()):
+    """
+    Executes one data-changing statement under the current batching
+    settings and returns its cursor (lastrowid is valid immediately).
+    """
+    if batch_rows <= 1:
+        with conn:
+            return conn.execute(sql, params)
+
+    state = _pending.get(conn)
+    if state is None or not conn.in_transaction:
+        # Nothing pending, or someone else committed this connection
+        state = _pending[conn] = [0, time.monotonic()]
+    cursor = conn.execute(sql, params)
+    state[0] += 1
+    if state[0] >= batch_rows or time.monotonic() - state[1] >= batch_interval:
+        _flush(conn)
+    return cursor
+
+
+def _flush(conn):
+    # Commits one connection's pending rows; returns how many there were.
+    state = _pending.pop(conn, None)
+    if conn.in_transaction:
+        conn.commit()
+    return state[0] if state else 0
+
+
+def flush(path=None):
+    """Commits pending batched writes (for one database, or all); returns the row count."""
+    if path is not None:
+        conn = _connections.get(os.path.abspath(path))
+        return _flush(conn) if conn is not None else 0
+    return sum(_flush(conn) for conn in list(_connections.values()))
+
+
+def flush_due():
+    """Commits batches older than batch_interval (call between interactive actions)."""
+    now = time.monotonic()
+    for conn, state in list(_pending.items()):
+        if now - state[1] >= batch_interval:
+            _flush(conn)
+
+
+def configure_from_env():
+    """
+    Applies FOSS_BATCH_ROWS, FOSS_BATCH_MS and FOSS_DURABILITY (before the
+    first connection); raises ValueError naming a bad variable.
+    """
+    global _env_loaded
+    settings = []
+    for position, name in enumerate(("FOSS_BATCH_ROWS", "FOSS_BATCH_MS", "FOSS_DURABILITY")):
+        value = os.environ.get(name, "").strip().lower() or None
+        arguments = [None, None, None]
+        arguments[position] = value
+        try:
+            settings.append(_check_writes(*arguments)[position])
+        except ValueError as e:
+            raise ValueError(f"{name}={os.environ[name]!r}: {e}") from None
+    _env_loaded = True
+    configure_writes(*settings)
+
+
+# ------------------------------------------------------ #
+# Dates
+# ------------------------------------------------------ #
+# Dates are stored as ISO-8601 'YYYY-MM-DD' text: it sorts chronologically,
+# so plain B-tree indexes answer range queries, and it is what SQLite's own
+# date() function produces.
+DATE_ERROR = "Invalid date format. Use YYYY-MM-DD."
+
+# Other spellings accepted when migrating legacy rows
+LEGACY_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%d-%m-%Y", "%d/%m/%Y", "%Y%m%d")
+
+# PRAGMA user_version at which a database has normalized, checked dates
+# (2: the triggers also reject days past the end of the month)
+DATE_SCHEMA_VERSION = 2
+
+
+def parse_date(text, lenient=False):
+    """
+    Returns text as a normalized 'YYYY-MM-DD' string.
+
+    Raises ValueError(DATE_ERROR) for anything that is not a real calendar
+    date. With lenient=True, LEGACY_DATE_FORMATS (and a trailing time part)
+    are accepted too.
+    """
+    text = str(text).strip()
+    if len(text) == 10 and text[4] == "-" and text[7] == "-":
+        try:
+            return date.fromisoformat(text).isoformat()
+        except ValueError:
+            raise ValueError(DATE_ERROR) from None
+    if lenient:
+        head = text.replace("T", " ").split(" ")[0]
+        for fmt in LEGACY_DATE_FORMATS:
+            try:
+                return datetime.strptime(head, fmt).date().isoformat()
+            except ValueError:
+                continue
+    raise ValueError(DATE_ERROR)
+
+
+def is_valid_date(text):
+    """True if text is already a valid 'YYYY-MM-DD' date."""
+    try:
+        return parse_date(text) == text
+    except ValueError:
+        return False
+
+
+def migrate_dates(conn, table, chunk_size=5000):
+    """
+    Rewrites table.date to 'YYYY-MM-DD' one chunk (transaction) at a time;
+    returns {"rewritten", "invalid", "invalid_ids"}.
+    """
+    report = {"rewritten": 0, "invalid": 0, "invalid_ids": []}
+    last = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, date FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+            (last, chunk_size)).fetchall()
+        if not rows:
+            break
+        last = rows[-1][0]
+
+        updates = []
+        for row_id, value in rows:
+            if value is None:
+                continue
+            try:
+                fixed = parse_date(value, lenient=True)
+            except ValueError:
+                report["invalid"] += 1
+                if len(report["invalid_ids"]) < 20:
+                    report["invalid_ids"].append(row_id)
+                continue
+            if fixed != value:
+                updates.append((fixed, row_id))
+        if updates:
+            with conn:
+                conn.executemany(f"UPDATE {table} SET date = ? WHERE id = ?", updates)
+            report["rewritten"] += len(updates)
+    return report
+
+
+def ensure_dates(conn, tables, force=False):
+    """
+    Migrates dates once (PRAGMA user_version) and installs the triggers that
+    reject bad ones; returns {table: migration report}.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    reports = {}
+    if force or version < DATE_SCHEMA_VERSION:
+        for table in tables:
+            reports[table] = migrate_dates(conn, table)
+
+    with conn:
+        for table in tables:
+            for event in ("INSERT", "UPDATE OF date"):
+                name = f"{table}_date_check_{event.split()[0].lower()}"
+                if version < DATE_SCHEMA_VERSION:
+                    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                # date() alone passes '2025-02-30' through unchanged; a
+                # modifier makes it normalize the day (to '2025-03-02')
+                conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {name} BEFORE {event} ON {table}
+                WHEN new.date IS NOT NULL AND date(new.date, '+0 days') IS NOT new.date
+                BEGIN SELECT RAISE(ABORT, '{DATE_ERROR}'); END
+                """)
+        if version < DATE_SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {DATE_SCHEMA_VERSION}")
+    return reports
@@ -0,0 +1,383 @@
+"""
+Module: fleet_review.py
+Purpose: End-of-day review of every aircraft against every observation window.
+
+This module handles:
+- Splitting the reviewed date range into windows (one day by default)
+- For each aircraft and window: observations and clearances in the window,
+  pending maintenance and the latest range estimate as of the window's end,
+  and the same GO / NO-GO verdict as the preflight check
+- Reading the per-aircraft maintenance and range history once, in the
+  parent, and handing each block only its starting state and its own events
+- Spreading contiguous blocks of windows over a ProcessPoolExecutor; each
+  worker reads through its own read-only connections, merging the
+  observations of weather.db and every station database by date
+- Merging worker output into the fleet_review table in bulk (SQLite copies
+  each worker's scratch file with INSERT ... SELECT; no rows are pickled)
+"""
+
+import argparse
+import heapq
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import clearance_rules
+import db
+import fuel_calc
+import maintenance
+import stations
+import weather
+
+REVIEW_COLUMNS = (
+    "window_start", "window_end", "aircraft_id", "observations", "cleared",
+    "clearance", "pending_maintenance", "estimated_range", "verdict",
+)
+
+REVIEW_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {name} (
+    window_start TEXT NOT NULL,
+    window_end TEXT NOT NULL,
+    aircraft_id INTEGER NOT NULL,
+    observations INTEGER NOT NULL,
+    cleared INTEGER NOT NULL,
+    clearance TEXT,
+    pending_maintenance INTEGER NOT NULL,
+    estimated_range REAL,
+    verdict TEXT NOT NULL{key}
+){options}
+"""
+
+# Blocks of windows per worker; more than one evens out uneven blocks
+PARTITIONS_PER_WORKER = 4
+
+
+# ------------------------------------------------------ #
+# Results table
+# ------------------------------------------------------ #
+def get_db():
+    """Returns the maintenance connection, with the fleet_review table present."""
+    conn = maintenance.get_db()
+    conn.execute(REVIEW_TABLE_SQL.format(
+        name="fleet_review", key=",\n    PRIMARY KEY (window_start, aircraft_id)", options=" WITHOUT ROWID"))
+    return conn
+
+
+def make_windows(date_from, date_to, window_days=1):
+    """Returns [(start, end), ...] 'YYYY-MM-DD' windows covering date_from..date_to."""
+    start = date.fromisoformat(db.parse_date(date_from))
+    last = date.fromisoformat(db.parse_date(date_to))
+    if window_days < 1:
+        raise ValueError("Window length must be at least one day.")
+    step = timedelta(days=window_days)
+    windows = []
+    while start <= last:
+        end = min(start + step - timedelta(days=1), last)
+        windows.append((start.isoformat(), end.isoformat()))
+        start += step
+    return windows
+
+
+def _verdict(pending, clearance, estimated_range, required_range):
+    # Same order of checks as preflight.PREFLIGHT_SQL.
+    if pending > 0:
+        return "NO-GO - Pending maintenance"
+    if clearance is None:
+        return "NO-GO - No weather data"
+    if not clearance.startswith("YES"):
+        return "NO-GO - Weather"
+    if estimated_range is None:
+        return "NO-GO - No range estimate"
+    if required_range is not None and estimated_range < required_range:
+        return "NO-GO - Insufficient range"
+    return "GO"
+
+
+# ------------------------------------------------------ #
+# Worker
+# ------------------------------------------------------ #
+def review_partition(task):
+    """
+    Reviews every aircraft over one block of windows (runs in a worker).
+
+    task is a dict of plain values (weather database paths, windows, rule-set
+    selection, required range, output path, and the block's slice of the
+    fleet history from _history_slices). Rows go to a scratch SQLite file at
+    task["output"]; returns (output path, rows written, seconds).
+    """
+    start_time = time.perf_counter()
+    windows = task["windows"]
+    first, last = windows[0][0], windows[-1][1]
+    rules = clearance_rules.get_rule_set(task["airport"], task["category"], task["rules_path"])
+    evaluate, cleared_verdict = rules.evaluate, rules.reasons[0]
+
+    # Weather per window: count, cleared count, verdict of the latest
+    # observation. Each weather database streams its rows in date order
+    # through its own connection (one file may be attached per station, more
+    # than ATTACH allows); heapq.merge interleaves them.
+    observations = [0] * len(windows)
+    cleared = [0] * len(windows)
+    clearance = [None] * len(windows)
+    sources = [db.open_read_only(path) for path in task["weather_dbs"]]
+    try:
+        streams = [source.execute(
+            "SELECT date, wind_speed, temperature, humidity, visibility FROM weather "
+            "WHERE date >= ? AND date <= ? AND wind_speed IS NOT NULL AND temperature IS NOT NULL "
+            "AND humidity IS NOT NULL AND visibility IS NOT NULL ORDER BY date, id", (first, last))
+            for source in sources]
+        index = 0
+        for day, wind, temp, hum, vis in heapq.merge(*streams, key=lambda row: row[0]):
+            while day > windows[index][1]:
+                index += 1
+            verdict = evaluate(wind, temp, hum, vis)
+            observations[index] += 1
+            clearance[index] = verdict
+            if verdict == cleared_verdict:
+                cleared[index] += 1
+    finally:
+        for source in sources:
+            source.close()
+
+    aircraft_ids, pending, latest_range = task["aircraft_ids"], task["pending"], task["latest_range"]
+    pending_events, range_events = task["pending_events"], task["range_events"]
+
+    def rows():
+        # Window by window, so rows come out in fleet_review key order and
+        # the final merge only ever appends.
+        required = task["required_range"]
+        p = r = 0
+        for i, (window_start, window_end) in enumerate(windows):
+            # Both event lists are date-ordered: apply everything up to this window's end
+            while p < len(pending_events) and pending_events[p][0] <= window_end:
+                _, aircraft_id, count = pending_events[p]
+                pending[aircraft_id] += count
+                p += 1
+            while r < len(range_events) and range_events[r][0] <= window_end:
+                _, aircraft_id, estimate = range_events[r]
+                latest_range[aircraft_id] = estimate
+                r += 1
+            for aircraft_id in aircraft_ids:
+                count, estimate = pending[aircraft_id], latest_range[aircraft_id]
+                yield (window_start, window_end, aircraft_id, observations[i], cleared[i], clearance[i],
+                       count, estimate, _verdict(count, clearance[i], estimate, required))
+
+    out = db.open_connection(task["output"])
+    try:
+        out.execute("PRAGMA synchronous = OFF")
+        out.execute(REVIEW_TABLE_SQL.format(name="fleet_review", key="", options=""))
+        with out:
+            cursor = out.executemany(f"INSERT INTO fleet_review VALUES ({', '.join('?' * len(REVIEW_COLUMNS))})",
+                                     rows())
+        written = cursor.rowcount
+    finally:
+        out.close()
+    return task["output"], written, time.perf_counter() - start_time
+
+
+# ------------------------------------------------------ #
+# Pipeline
+# ------------------------------------------------------ #
+def _partition(windows, parts):
+    # Splits windows into at most `parts` contiguous, near-equal blocks.
+    parts = max(1, min(parts, len(windows)))
+    size, extra = divmod(len(windows), parts)
+    blocks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        blocks.append(windows[start:end])
+        start = end
+    return blocks
+
+
+def _fleet_history(conn, fuel_conn, first, last):
+    # One pass over each history table up to `last`: rows dated before
+    # `first` are folded into a starting state (pending counts, latest range
+    # estimate), later rows come back as date-ordered events.
+    aircraft_ids = [row[0] for row in conn.execute("SELECT id FROM aircraft ORDER BY id")]
+    pending = dict.fromkeys(aircraft_ids, 0)
+    pending_events = []
+    for day, aircraft_id, count in conn.execute(
+            "SELECT CASE WHEN date < ? THEN NULL ELSE date END AS day, aircraft_id, COUNT(*) FROM maintenance "
+            "WHERE lower(status) = 'pending' AND date <= ? GROUP BY day, aircraft_id ORDER BY day", (first, last)):
+        if aircraft_id not in pending:
+            continue
+        if day is None:
+            pending[aircraft_id] = count
+        else:
+            pending_events.append((day, aircraft_id, count))
+
+    latest_range = dict.fromkeys(aircraft_ids)
+    range_events = []
+    for day, _, aircraft_id, estimate in fuel_conn.execute(
+            "SELECT NULL, id, aircraft_id, estimated_range FROM ("
+            "  SELECT id, aircraft_id, estimated_range, ROW_NUMBER() OVER ("
+            "    PARTITION BY aircraft_id ORDER BY date DESC, id DESC) AS latest"
+            "  FROM fueldata WHERE aircraft_id IS NOT NULL AND date < ?"
+            ") WHERE latest = 1 "
+            "UNION ALL SELECT date, id, aircraft_id, estimated_range FROM fueldata "
+            "WHERE aircraft_id IS NOT NULL AND date >= ? AND date <= ? ORDER BY 1, 2", (first, first, last)):
+        if aircraft_id not in latest_range:
+            continue
+        if day is None:
+            latest_range[aircraft_id] = estimate
+        else:
+            range_events.append((day, aircraft_id, estimate))
+    return aircraft_ids, pending, latest_range, pending_events, range_events
+
+
+def _history_slices(history, blocks):
+    # Yields, per block, its starting state and only the events dated in it.
+    aircraft_ids, pending, latest_range, pending_events, range_events = history
+    p = r = 0
+    for block in blocks:
+        block_start, block_end = block[0][0], block[-1][1]
+        while p < len(pending_events) and pending_events[p][0] < block_start:
+            _, aircraft_id, count = pending_events[p]
+            pending[aircraft_id] += count
+            p += 1
+        while r < len(range_events) and range_events[r][0] < block_start:
+            _, aircraft_id, estimate = range_events[r]
+            latest_range[aircraft_id] = estimate
+            r += 1
+        p_end, r_end = p, r
+        while p_end < len(pending_events) and pending_events[p_end][0] <= block_end:
+            p_end += 1
+        while r_end < len(range_events) and range_events[r_end][0] <= block_end:
+            r_end += 1
+        yield {"aircraft_ids": aircraft_ids, "pending": dict(pending), "latest_range": dict(latest_range),
+               "pending_events": pending_events[p:p_end], "range_events": range_events[r:r_end]}
+
+
+def weather_date_range():
+    """(first, last) observation date across the weather databases, or (None, None) if empty."""
+    spans = stations.fan_out(lambda conn: conn.execute("SELECT MIN(date), MAX(date) FROM weather").fetchone())
+    firsts = [first for first, _ in spans if first is not None]
+    lasts = [last for _, last in spans if last is not None]
+    return (min(firsts), max(lasts)) if firsts else (None, None)
+
+
+def run_review(date_from=None, date_to=None, window_days=1, workers=None,
+               airport=None, category=None, required_range=None):
+    """
+    Reviews every aircraft in every window and stores the results; returns
+    timing and row counts. workers=1 runs in this process.
+    """
+    start_time = time.perf_counter()
+    if date_from is None or date_to is None:
+        first, last = weather_date_range()
+        date_from, date_to = date_from or first, date_to or last
+        if date_from is None:
+            raise ValueError("No weather observations to review.")
+    windows = make_windows(date_from, date_to, window_days)
+    workers = workers or os.cpu_count() or 1
+
+    # Make sure every schema (and the date migration) is in place before
+    # workers open the files read-only.
+    conn = get_db()
+    weather.init_db()
+    fuel_calc.init_db()
+    rules_path = os.path.abspath(clearance_rules.CONFIG_PATH)
+    clearance_rules.get_rule_set(airport, category, rules_path)  # fail fast on bad rules
+
+    # The fleet history is read once here; each block gets just its slice
+    blocks = _partition(windows, workers * PARTITIONS_PER_WORKER)
+    history = _fleet_history(conn, fuel_calc.get_db(), windows[0][0], windows[-1][1])
+
+    scratch = tempfile.mkdtemp(prefix="foss-review-")
+    try:
+        tasks = [{
+            "weather_dbs": stations.sources(), "windows": block, "airport": airport, "category": category,
+            "rules_path": rules_path, "required_range": required_range,
+            "output": os.path.join(scratch, f"part-{n}.db"), **history_slice,
+        } for n, (block, history_slice) in enumerate(zip(blocks, _history_slices(history, blocks)))]
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            # Workers start on the blocks straight away; meanwhile this
+            # process clears the old rows, then merges each block as soon as
+            # it and every earlier block are done, so merging overlaps the
+            # remaining work. Blocks arrive in key order: the merge appends.
+            parts = pool.map(review_partition, tasks) if pool else map(review_partition, tasks)
+            merge_seconds = 0.0
+            merge_start = time.perf_counter()
+            with conn:
+                conn.execute("DELETE FROM fleet_review WHERE window_start >= ? AND window_start <= ?",
+                             (windows[0][0], windows[-1][1]))
+            merge_seconds += time.perf_counter() - merge_start
+
+            results = []
+            for result in parts:
+                merge_start = time.perf_counter()
+                # ATTACH is not allowed inside a transaction, so each block commits on its own
+                db.attach(conn, "part", result[0])
+                try:
+                    with conn:
+                        conn.execute("INSERT INTO fleet_review SELECT * FROM part.fleet_review")
+                finally:
+                    conn.execute("DETACH DATABASE part")
+                merge_seconds += time.perf_counter() - merge_start
+                results.append(result)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    return {
+        "windows": len(windows),
+        "aircraft": conn.execute("SELECT COUNT(*) FROM aircraft").fetchone()[0],
+        "rows": sum(result[1] for result in results),
+        "workers": workers,
+        "compute_seconds": sum(result[2] for result in results),
+        "merge_seconds": merge_seconds,
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+def review_rows(window_start=None, aircraft_id=None, verdict=None):
+    """Yields stored review rows, filtered by window start, aircraft and/or verdict prefix."""
+    filters, params = [], []
+    if window_start:
+        filters.append("window_start = ?")
+        params.append(db.parse_date(window_start))
+    if aircraft_id is not None:
+        filters.append("aircraft_id = ?")
+        params.append(aircraft_id)
+    if verdict:
+        filters.append("verdict LIKE ?")
+        params.append(verdict + "%")
+    where = f" WHERE {' AND '.join(filters)}" if filters else ""
+    yield from get_db().execute(
+        f"SELECT {', '.join(REVIEW_COLUMNS)} FROM fleet_review{where} ORDER BY window_start, aircraft_id", params)
+
+
+# ------------------------------------------------------ #
+# Entry point
+# ------------------------------------------------------ #
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Fleet-wide review over observation windows")
+    parser.add_argument("--from", dest="date_from", help="first day (default: first observation)")
+    parser.add_argument("--to", dest="date_to", help="last day (default: last observation)")
+    parser.add_argument("--window-days", type=int, default=1)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--airport", help="use this airport's clearance rules")
+    parser.add_argument("--category", help="use this aircraft category's clearance rules")
+    parser.add_argument("--required-range", type=float, help="minimum range in km")
+    return parser
+
+
+def report(args):
+    clearance_rules.warn_unknown(args.airport, args.category)
+    stats = run_review(args.date_from, args.date_to, args.window_days, args.workers,
+                       args.airport, args.category, args.required_range)
+    print(f"Reviewed {stats['aircraft']} aircraft x {stats['windows']} windows = {stats['rows']} rows "
+          f"with {stats['workers']} worker(s) in {stats['seconds']:.2f} s "
+          f"(compute {stats['compute_seconds']:.2f} s, merge {stats['merge_seconds']:.2f} s)")
+    return stats
+
+
+if __name__ == "__main__":
+    report(build_parser().parse_args())
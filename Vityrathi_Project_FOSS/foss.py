@@ -0,0 +1,13 @@
+"""
+Command-line entry point for Flight Operational Support Suite
+
+    python foss.py --help
+
+The parser and the subcommands are in cli.py. Python caches the compiled
+code of imported modules but never of the script it runs, so this script
+stays small and start-up does not recompile the whole CLI every time.
+"""
+
+if __name__ == "__main__":
+    import cli
+    cli.run()
@@ -7,24 +7,37 @@ This module handles:
 - Range calculation based on consumption formulas
 - Database storage of flight estimates
 - Viewing history of fuel calculations
+- Vectorized parameter sweeps (fuel x burn rate x speed grids)
+- Weight-dependent range per aircraft type (tables from range_model.py)
 """
 
-import sqlite3
+import csv
+import time
+
+import db
+
+# changefeed, paging and range_model are imported where they are used, so
+# `foss.py fuel range` and friends start without loading them
+DB_PATH = "databases/fuel.db"
 
 # ------------------------------------------------------ #
 # Database Connection Utility
 # ------------------------------------------------------ #
 def get_db():
-    #Returns a connection to the fuel database.
-    return sqlite3.connect("databases/fuel.db")
+    #Returns the shared (persistent) connection to the fuel database.
+    return db.connect(DB_PATH, create_schema)
 
 
 # ------------------------------------------------------ #
 # Initialize database tables
 # ------------------------------------------------------ #
 def init_db():
+    #Makes sure the tables exist (checked once per process).
+    get_db()
+
+
+def create_schema(conn):
     #Creates fuel log tables if they do not exist.
-    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -34,17 +47,73 @@ def init_db():
         burn_rate REAL,
         cruising_speed REAL,
         estimated_range REAL,
-        date TEXT
+        date TEXT,
+        aircraft_id INTEGER
     )
     """)
 
+    # Older databases predate the aircraft link; add it in place
+    cursor.execute("PRAGMA table_info(fueldata)")
+    if "aircraft_id" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE fueldata ADD COLUMN aircraft_id INTEGER")
+
+    # Latest estimate per aircraft (used by the preflight check)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_fueldata_aircraft
+    ON fueldata (aircraft_id, id)
+    """)
+
+    # Date-range queries over the estimate history
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_fueldata_date
+    ON fueldata (date, id)
+    """)
+
     conn.commit()
-    conn.close()
+    db.ensure_dates(conn, ("fueldata",))
+    import changefeed
+    changefeed.ensure_feed(conn, "fueldata")
 
 
 # ------------------------------------------------------ #
 # Fuel & Range Calculation
 # ------------------------------------------------------ #
+INSERT_FUEL_SQL = (
+    "INSERT INTO fueldata (fuel_capacity, burn_rate, cruising_speed, estimated_range, date, aircraft_id) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def compute_range(fuel, burn, speed):
+    """Returns (endurance_hours, range_km) for the basic endurance model."""
+    fuel, burn, speed = float(fuel), float(burn), float(speed)
+    if fuel <= 0:
+        raise ValueError("Fuel must be a positive numeric value.")
+    if burn <= 0:
+        raise ValueError("Burn rate must be positive.")
+    if speed <= 0:
+        raise ValueError("Speed must be positive.")
+    endurance = fuel / burn  # hours
+    return endurance, endurance * speed  # km
+
+
+def save_range(fuel, burn, speed, date, aircraft_id=None):
+    """
+    Computes and stores one range estimate without prompting.
+
+    aircraft_id optionally links the estimate to a registered aircraft.
+    Returns (id, range_km); raises ValueError on invalid input.
+    """
+    date = db.parse_date(date)
+    _, flight_range = compute_range(fuel, burn, speed)
+    if aircraft_id is not None:
+        aircraft_id = int(aircraft_id)
+
+    cursor = db.write(get_db(), INSERT_FUEL_SQL,
+                      (float(fuel), float(burn), float(speed), flight_range, date, aircraft_id))
+    return cursor.lastrowid, flight_range
+
+
 def calculate_range():
     #Calculates aircraft range using basic fuel model with error handling.
 
@@ -87,54 +156,276 @@ def calculate_range():
     # ---- Date validation ---- #
     while True:
         date = input("Enter date (YYYY-MM-DD): ").strip()
-        if len(date) == 10 and date[4] == '-' and date[7] == '-':
+        if db.is_valid_date(date):
             break
         else:
-            print("Invalid date format. Use YYYY-MM-DD.")
+            print(db.DATE_ERROR)
 
-    # ---- Endurance calculation ---- #
+    # ---- Endurance calculation & database recording ---- #
+    # (estimates are linked to an aircraft through save_range(), 'foss.py
+    # fuel range --aircraft' or the aircraft-type range model, so scripted
+    # input for this prompt sequence stays unchanged)
     try:
-        endurance = fuel / burn  # hours
-        flight_range = endurance * speed  # km
+        _, flight_range = save_range(fuel, burn, speed, date)
+
+        print(f"\n Estimated range = {flight_range:.2f} km")
     except Exception as e:
-        print("Error in calculation:", e)
-        return
+        print("Database Error:", e)
 
-    # ---- Database recording ---- #
-    try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO fueldata (fuel_capacity, burn_rate, cruising_speed, estimated_range, date) VALUES (?, ?, ?, ?, ?)",
-            (fuel, burn, speed, flight_range, date)
-        )
-        conn.commit()
-        conn.close()
 
-        print(f"\n Estimated range = {flight_range:.2f} km")
+# ------------------------------------------------------ #
+# Aircraft-type Range Model
+# ------------------------------------------------------ #
+def aircraft_model_range(aircraft_id, fuel):
+    """
+    Returns (model, endurance_hours, range_km) for a registered aircraft,
+    from its type's precomputed range table (see range_model.py).
+    """
+    import maintenance
+    import range_model
+    record = maintenance.get_registry().get(int(aircraft_id))
+    if record is None:
+        raise ValueError(f"Aircraft ID {aircraft_id} not found.")
+    endurance, flight_range = range_model.model_range(record.model, float(fuel))
+    return record.model, endurance, flight_range
+
+
+def save_model_range(aircraft_id, fuel, date):
+    """
+    Stores an aircraft-type range estimate in fueldata.
+
+    burn_rate is the mean fuel flow over the flight (fuel / endurance) and
+    cruising_speed the type's cruise speed. Returns (id, range_km).
+    """
+    import range_model
+    date = db.parse_date(date)
+    model, endurance, flight_range = aircraft_model_range(aircraft_id, fuel)
+    speed = range_model.model_params(model)["cruise_speed"]
+
+    cursor = db.write(get_db(), INSERT_FUEL_SQL,
+                      (float(fuel), float(fuel) / endurance, speed, flight_range, date, int(aircraft_id)))
+    return cursor.lastrowid, flight_range
+
+
+def calculate_model_range():
+    #Range from the aircraft's type model, optionally saved.
+    while True:
+        aircraft_id = input("Enter aircraft ID: ").strip()
+        if aircraft_id.isdigit():
+            break
+        print("Aircraft ID must be numeric.")
+
+    while True:
+        try:
+            fuel = float(input("Enter total fuel onboard (kg): ").strip())
+            if fuel > 0:
+                break
+            print("Fuel must be a positive numeric value.")
+        except ValueError:
+            print("Enter a valid numeric value for fuel.")
+
+    while True:
+        date = input("Enter date to save (YYYY-MM-DD, blank to skip): ").strip()
+        if date == "" or db.is_valid_date(date):
+            break
+        print(db.DATE_ERROR)
+
+    try:
+        model, endurance, flight_range = aircraft_model_range(aircraft_id, fuel)
+        print(f"\n {model}: endurance = {endurance:.2f} h, estimated range = {flight_range:.2f} km")
+        if date:
+            save_model_range(aircraft_id, fuel, date)
+            print("Estimate saved.")
+    except ValueError as e:
+        print(e)
     except Exception as e:
         print("Database Error:", e)
 
 
+# ------------------------------------------------------ #
+# Batch Parameter Sweep (NumPy)
+# ------------------------------------------------------ #
+# Combinations evaluated per chunk; bounds memory for very large grids.
+SWEEP_CHUNK = 1_000_000
+SWEEP_COLUMNS = ("fuel_capacity", "burn_rate", "cruising_speed", "endurance", "estimated_range")
+
+
+def sweep_axis(start, stop, step):
+    """Returns the inclusive grid start, start+step, ... <= stop as an array."""
+    import numpy as np
+    if step <= 0:
+        raise ValueError("Step must be positive.")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return start + step * np.arange(max(count, 0), dtype=np.float64)
+
+
+def iter_range_sweep(fuels, burns, speeds, chunk_size=SWEEP_CHUNK):
+    """
+    Yields the fuel x burn x speed grid in chunks of column arrays.
+
+    Each chunk is a dict keyed by SWEEP_COLUMNS. Combinations are decoded
+    from a flat index, so the full grid is never materialized; endurance
+    (h) and range (km) use the same model as calculate_range().
+    """
+    import numpy as np
+
+    fuels = np.asarray(fuels, dtype=np.float64).ravel()
+    burns = np.asarray(burns, dtype=np.float64).ravel()
+    speeds = np.asarray(speeds, dtype=np.float64).ravel()
+    for name, axis in (("Fuel", fuels), ("Burn rate", burns), ("Speed", speeds)):
+        if axis.size and axis.min() <= 0:
+            raise ValueError(f"{name} values must be positive.")
+
+    per_fuel = burns.size * speeds.size
+    total = fuels.size * per_fuel
+    for start in range(0, total, chunk_size):
+        index = np.arange(start, min(start + chunk_size, total), dtype=np.int64)
+        fuel_idx, rest = np.divmod(index, per_fuel)
+        burn_idx, speed_idx = np.divmod(rest, speeds.size)
+
+        fuel = fuels[fuel_idx]
+        burn = burns[burn_idx]
+        speed = speeds[speed_idx]
+        endurance = fuel / burn  # hours
+        yield {
+            "fuel_capacity": fuel,
+            "burn_rate": burn,
+            "cruising_speed": speed,
+            "endurance": endurance,
+            "estimated_range": endurance * speed,  # km
+        }
+
+
+def sweep_range(fuels, burns, speeds):
+    """Computes the whole sweep in memory; returns one array per SWEEP_COLUMNS."""
+    import numpy as np
+    chunks = list(iter_range_sweep(fuels, burns, speeds))
+    if not chunks:
+        return {name: np.empty(0) for name in SWEEP_COLUMNS}
+    return {name: np.concatenate([c[name] for c in chunks]) for name in SWEEP_COLUMNS}
+
+
+def sweep_to_csv(path, fuels, burns, speeds, chunk_size=SWEEP_CHUNK):
+    """Streams a sweep to a CSV file chunk by chunk. Returns rows written."""
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(SWEEP_COLUMNS)
+        for chunk in iter_range_sweep(fuels, burns, speeds, chunk_size):
+            writer.writerows(zip(*(chunk[name].tolist() for name in SWEEP_COLUMNS)))
+            written += len(chunk["estimated_range"])
+    return written
+
+
+def sweep_to_db(date, fuels, burns, speeds, chunk_size=SWEEP_CHUNK):
+    """
+    Persists a sweep to fueldata, one transaction per chunk.
+
+    Returns rows written.
+    """
+    date = db.parse_date(date)
+    conn = get_db()
+    written = 0
+    for chunk in iter_range_sweep(fuels, burns, speeds, chunk_size):
+        count = len(chunk["estimated_range"])
+        rows = zip(chunk["fuel_capacity"].tolist(), chunk["burn_rate"].tolist(),
+                   chunk["cruising_speed"].tolist(), chunk["estimated_range"].tolist(),
+                   [date] * count, [None] * count)
+        with conn:
+            conn.executemany(INSERT_FUEL_SQL, rows)
+        written += count
+    return written
+
+
+def _ask_axis(label):
+    # Prompts for "start stop step" of one sweep axis.
+    while True:
+        parts = input(f"{label} as 'start stop step': ").split()
+        try:
+            start, stop, step = (float(x) for x in parts)
+            if start <= 0 or stop < start or step <= 0:
+                print("Values must be positive with start <= stop.")
+                continue
+            return sweep_axis(start, stop, step)
+        except ValueError:
+            print("Enter three numbers, e.g. 5000 20000 500")
+
+
+def run_range_sweep():
+    # Interactive batch sweep with optional CSV/database output.
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("Batch sweeps require NumPy (pip install numpy).")
+        return
+
+    fuels = _ask_axis("Fuel onboard (kg)")
+    burns = _ask_axis("Burn rate (kg/hour)")
+    speeds = _ask_axis("Cruising speed (km/h)")
+    total = fuels.size * burns.size * speeds.size
+    print(f"{total} combinations.")
+
+    output = input("Output: 1. Summary only  2. CSV file  3. Save to database : ").strip()
+    start = time.perf_counter()
+    try:
+        if output == "2":
+            path = input("CSV file path: ").strip()
+            written = sweep_to_csv(path, fuels, burns, speeds)
+            print(f"Wrote {written} rows to {path}")
+        elif output == "3":
+            while True:
+                date = input("Enter date (YYYY-MM-DD): ").strip()
+                if db.is_valid_date(date):
+                    break
+                print(db.DATE_ERROR)
+            written = sweep_to_db(date, fuels, burns, speeds)
+            print(f"Saved {written} rows to fuel database.")
+        else:
+            low, high = float("inf"), 0.0
+            for chunk in iter_range_sweep(fuels, burns, speeds):
+                low = min(low, float(chunk["estimated_range"].min()))
+                high = max(high, float(chunk["estimated_range"].max()))
+            if total:
+                print(f"Range spans {low:.2f} km to {high:.2f} km")
+    except Exception as e:
+        print("Sweep Error:", e)
+        return
+    print(f"Completed in {time.perf_counter() - start:.2f} s")
+
+
 # ------------------------------------------------------ #
 # View range calculation history
 # ------------------------------------------------------ #
+def ranges_between(date_from=None, date_to=None, page_size=1000):
+    """
+    Yields fueldata rows dated date_from..date_to (inclusive), oldest first.
+
+    Either bound may be None. Streams page by page along idx_fueldata_date.
+    """
+    import paging
+    pages = paging.iter_pages(get_db(), "fueldata", "*", order="date",
+                              date_from=date_from, date_to=date_to, page_size=page_size)
+    for page in pages:
+        yield from page
+
+
+def range_changes(consumer, page_size=1000, advance=True):
+    """
+    Yields ("insert" | "update", row) for fueldata rows changed since
+    consumer's last sync; see changefeed.changes().
+    """
+    import changefeed
+    return changefeed.changes(get_db(), "fueldata", consumer, page_size, advance)
+
+
 def view_range_logs():
     #Shows historical fuel & range computations.
+    import paging
+    options = paging.ask_view_options(with_dates=True)
+    columns = ("id", "aircraft_id", "fuel_capacity", "burn_rate", "cruising_speed", "estimated_range", "date")
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM fueldata")
-        rows = cursor.fetchall()
-        conn.close()
-
-        if len(rows) == 0:
-            print("No entries found in fuel database.")
-        else:
-            print("\nFuel & Range History:")
-            for row in rows:
-                print(row)
-
+        pages = paging.iter_pages(get_db(), "fueldata", ", ".join(columns), **options)
+        paging.show_pages(pages, "Fuel & Range History:", columns, "No entries found in fuel database.")
     except Exception as e:
         print("Database Error:", e)
 
@@ -146,16 +437,19 @@ def run_fuel_calc():
     #Runs the fuel calculation module.
     init_db()
     while True:
+        db.flush_due()
         print("\n--- Fuel & Range Module ---")
         print("1. Calculate Flight Range")
         print("2. View Range Calculation History")
-        print("3. Back to Main Menu")
+        print("3. Batch Range Sweep")
+        print("4. Aircraft-type Range Model")
+        print("5. Back to Main Menu")
 
         choice = input("Enter choice: ").strip()
 
         # Numeric check
         if not choice.isdigit():
-            print("Enter a number between 1–3.")
+            print("Enter a number between 1–5.")
             continue
 
         choice = int(choice)
@@ -165,6 +459,11 @@ def run_fuel_calc():
         elif choice == 2:
             view_range_logs()
         elif choice == 3:
+            run_range_sweep()
+        elif choice == 4:
+            calculate_model_range()
+        elif choice == 5:
+            db.flush()
             break
         else:
             print("Invalid selection, try again.")
\ No newline at end of file
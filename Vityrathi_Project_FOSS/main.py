@@ -1,10 +1,9 @@
 """
 Main controller for Flight Operational Support Suite
-"""
 
-from maintenance import run_maintenance
-from weather import run_weather
-from fuel_calc import run_fuel_calc
+Modules are imported when their menu is first opened, so start-up only
+pays for what is used. For scripted use, see foss.py.
+"""
 
 
 def main():
@@ -14,14 +13,15 @@ def main():
         print("1. Aircraft Maintenance System")
         print("2. Weather Takeoff Evaluation")
         print("3. Fuel & Flight Range Estimation")
-        print("4. Exit")
+        print("4. Preflight Readiness Check")
+        print("5. Exit")
 
         # Input validation loop
-        choice = input("Enter choice (1-4): ").strip()
+        choice = input("Enter choice (1-5): ").strip()
 
         # Only allow digits
         if not choice.isdigit():
-            print("Please enter a number between 1-4.")
+            print("Please enter a number between 1-5.")
             continue
 
         # Convert input into integer
@@ -30,28 +30,38 @@ def main():
         # Menu routing with validation
         if choice == 1:
             try:
+                from maintenance import run_maintenance
                 run_maintenance()
             except Exception as e:
                 print(f"Error running maintenance module: {e}")
 
         elif choice == 2:
             try:
+                from weather import run_weather
                 run_weather()
             except Exception as e:
                 print(f"Error running weather module: {e}")
 
         elif choice == 3:
             try:
+                from fuel_calc import run_fuel_calc
                 run_fuel_calc()
             except Exception as e:
                 print(f"Error running fuel module: {e}")
 
         elif choice == 4:
+            try:
+                from preflight import run_preflight
+                run_preflight()
+            except Exception as e:
+                print(f"Error running preflight check: {e}")
+
+        elif choice == 5:
             print("Exiting program.... Goodbye!")
             break
 
         else:
-            print("Invalid choice. Enter a number between 1-4.")
+            print("Invalid choice. Enter a number between 1-5.")
 
 
 if __name__ == "__main__":
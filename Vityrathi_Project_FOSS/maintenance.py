@@ -8,24 +8,53 @@ This module handles:
 - Maintenance history retrieval
 - Searching aircraft
 - Filtering records by date/engineer
+- Cost and status rollups per aircraft and per month
 """
 
-import sqlite3
+
+import changefeed
+import db
+import paging
+import registry
+
+DB_PATH = "databases/maintenance.db"
 
 # ------------------------------------------------------ #
 # Database Connection Utility
 # ------------------------------------------------------ #
 def get_db():
-    """Returns a connection to the maintenance database."""
-    return sqlite3.connect("databases/maintenance.db")
+    """Returns the shared (persistent) connection to the maintenance database."""
+    return db.connect(DB_PATH, create_schema)
+
+
+# Aircraft registries keyed by absolute database path
+_registries = {}
+
+
+def get_registry():
+    """Returns the in-process aircraft cache for the current database."""
+    key = db.path_key(DB_PATH)
+    cache = _registries.get(key)
+    if cache is None:
+        cache = _registries[key] = registry.AircraftRegistry(get_db)
+    return cache
+
+
+def invalidate_cache():
+    """Drops every cached aircraft record."""
+    _registries.clear()
 
 
 # ------------------------------------------------------ #
 # Initialize database tables
 # ------------------------------------------------------ #
 def init_db():
+    """Makes sure the tables exist (checked once per process)."""
+    get_db()
+
+
+def create_schema(conn):
     """Creates required tables if they do not already exist."""
-    conn = get_db()
     cursor = conn.cursor()
 
     # Table of aircraft
@@ -52,8 +81,583 @@ def init_db():
     )
     """)
 
+    # Per-aircraft history lookups (aircraft_id filter, ordered by date)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_maintenance_aircraft_date
+    ON maintenance (aircraft_id, date)
+    """)
+
+    # Date-range queries, across the fleet and per engineer
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_maintenance_date
+    ON maintenance (date, id)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_maintenance_engineer_date
+    ON maintenance (engineer, date)
+    """)
+
     conn.commit()
-    conn.close()
+    db.ensure_dates(conn, ("maintenance",))
+    changefeed.ensure_feed(conn, "maintenance")
+    registry.ensure_version(conn)
+    init_search_index(conn)
+    init_rollups(conn)
+    init_schedule(conn)
+
+
+# ------------------------------------------------------ #
+# Aircraft full-text search index
+# ------------------------------------------------------ #
+# Trigram tokens need at least this many characters to use the index.
+FTS_MIN_KEYWORD = 3
+
+
+def _has_search_index(conn):
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'aircraft_fts'")
+    return cursor.fetchone() is not None
+
+
+def init_search_index(conn):
+    """
+    Creates the FTS5 trigram index over aircraft name/model, kept in sync by
+    triggers. Returns False if this SQLite build lacks FTS5/trigram.
+    """
+    if _has_search_index(conn):
+        return True
+
+    try:
+        with conn:
+            conn.execute("""
+            CREATE VIRTUAL TABLE aircraft_fts USING fts5(
+                name, model,
+                content='aircraft', content_rowid='id',
+                tokenize='trigram'
+            )
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS aircraft_fts_insert AFTER INSERT ON aircraft BEGIN
+                INSERT INTO aircraft_fts (rowid, name, model) VALUES (new.id, new.name, new.model);
+            END
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS aircraft_fts_delete AFTER DELETE ON aircraft BEGIN
+                INSERT INTO aircraft_fts (aircraft_fts, rowid, name, model)
+                VALUES ('delete', old.id, old.name, old.model);
+            END
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS aircraft_fts_update AFTER UPDATE ON aircraft BEGIN
+                INSERT INTO aircraft_fts (aircraft_fts, rowid, name, model)
+                VALUES ('delete', old.id, old.name, old.model);
+                INSERT INTO aircraft_fts (rowid, name, model) VALUES (new.id, new.name, new.model);
+            END
+            """)
+            conn.execute("INSERT INTO aircraft_fts (aircraft_fts) VALUES ('rebuild')")
+    except Exception:
+        # FTS5 or the trigram tokenizer is unavailable; search falls back to LIKE
+        return False
+    return True
+
+
+def find_aircraft(keyword):
+    """
+    Returns aircraft rows whose name or model contains keyword.
+
+    Matching is case-insensitive. Results are cached per keyword by the
+    aircraft registry; see _search_aircraft() for the query itself.
+    """
+    return get_registry().search(keyword, _search_aircraft)
+
+
+def _search_aircraft(keyword):
+    # Keywords of FTS_MIN_KEYWORD characters or more are answered from the
+    # trigram index; shorter ones fall back to a LIKE scan.
+    conn = get_db()
+    if len(keyword) >= FTS_MIN_KEYWORD and _has_search_index(conn):
+        # Quote as a single FTS string so punctuation is matched literally
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        cursor = conn.execute(
+            "SELECT a.* FROM aircraft_fts JOIN aircraft a ON a.id = aircraft_fts.rowid "
+            "WHERE aircraft_fts MATCH ? ORDER BY a.id",
+            (phrase,)
+        )
+    else:
+        cursor = conn.execute(
+            "SELECT * FROM aircraft WHERE name LIKE ? OR model LIKE ? ORDER BY id",
+            (f"%{keyword}%", f"%{keyword}%")
+        )
+    return cursor.fetchall()
+
+
+def maintenance_history(aircraft_id):
+    """Returns maintenance rows for one aircraft, oldest first (index range scan)."""
+    conn = get_db()
+    cursor = conn.execute(
+        "SELECT * FROM maintenance WHERE aircraft_id = ? ORDER BY date, id",
+        (aircraft_id,)
+    )
+    return cursor.fetchall()
+
+
+def maintenance_between(date_from=None, date_to=None, engineer=None, page_size=1000):
+    """
+    Yields maintenance rows dated date_from..date_to (inclusive), oldest first.
+
+    Either bound may be None. Streams page by page along idx_maintenance_date,
+    or idx_maintenance_engineer_date when an engineer is given.
+    """
+    where, params = ("engineer = ?", (engineer,)) if engineer else (None, ())
+    pages = paging.iter_pages(get_db(), "maintenance", "*", order="date",
+                              date_from=date_from, date_to=date_to, page_size=page_size,
+                              where=where, params=params)
+    for page in pages:
+        yield from page
+
+
+def maintenance_changes(consumer, page_size=1000, advance=True):
+    """
+    Yields ("insert" | "update", row) for maintenance rows changed since
+    consumer's last sync; see changefeed.changes().
+    """
+    return changefeed.changes(get_db(), "maintenance", consumer, page_size, advance)
+
+
+# ------------------------------------------------------ #
+# Maintenance cost/status rollups
+# ------------------------------------------------------ #
+# rollup table -> (key column, SQL expression for the key of a maintenance row)
+ROLLUPS = {
+    "maintenance_rollup_aircraft": ("aircraft_id", "{row}aircraft_id"),
+    "maintenance_rollup_month": ("month", "substr({row}date, 1, 7)"),
+}
+
+
+def _rollup_triggers(table, key, expr):
+    # Trigger bodies that add (new) or remove (old) one maintenance row.
+    new_key = expr.format(row="new.")
+    old_key = expr.format(row="old.")
+    add = f"""
+        INSERT INTO {table} (key_value, total_cost, record_count, pending_count, completed_count)
+        SELECT {new_key}, IFNULL(new.cost, 0), 1,
+               lower(new.status) IS 'pending', lower(new.status) IS 'completed'
+        WHERE {new_key} IS NOT NULL
+        ON CONFLICT (key_value) DO UPDATE SET
+            total_cost = total_cost + excluded.total_cost,
+            record_count = record_count + 1,
+            pending_count = pending_count + excluded.pending_count,
+            completed_count = completed_count + excluded.completed_count;
+    """.replace("key_value", key)
+    remove = f"""
+        UPDATE {table} SET
+            total_cost = total_cost - IFNULL(old.cost, 0),
+            record_count = record_count - 1,
+            pending_count = pending_count - (lower(old.status) IS 'pending'),
+            completed_count = completed_count - (lower(old.status) IS 'completed')
+        WHERE {key} = {old_key};
+        DELETE FROM {table} WHERE {key} = {old_key} AND record_count <= 0;
+    """
+    return {
+        f"{table}_insert": f"AFTER INSERT ON maintenance BEGIN {add} END",
+        f"{table}_delete": f"AFTER DELETE ON maintenance BEGIN {remove} END",
+        f"{table}_update": f"AFTER UPDATE ON maintenance BEGIN {remove} {add} END",
+    }
+
+
+def _rollup_select(key, expr):
+    # Full recompute of one rollup, used by rebuild and check.
+    key_expr = expr.format(row="")
+    return f"""
+        SELECT {key_expr} AS {key}, SUM(IFNULL(cost, 0)), COUNT(*),
+               SUM(lower(status) IS 'pending'), SUM(lower(status) IS 'completed')
+        FROM maintenance WHERE {key_expr} IS NOT NULL GROUP BY {key_expr}
+    """
+
+
+def init_rollups(conn):
+    """
+    Creates the rollup tables and the triggers that maintain them.
+
+    Every insert, update or delete on `maintenance` adjusts the matching
+    per-aircraft and per-month rows, so readers get totals in O(1).
+    Rollups are rebuilt from history the first time they are created.
+    """
+    cursor = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({})".format(
+            ", ".join("?" * len(ROLLUPS))),
+        tuple(ROLLUPS))
+    existing = cursor.fetchone()[0]
+
+    with conn:
+        for table, (key, expr) in ROLLUPS.items():
+            key_type = "INTEGER" if key == "aircraft_id" else "TEXT"
+            conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {key} {key_type} PRIMARY KEY NOT NULL,
+                total_cost REAL NOT NULL DEFAULT 0,
+                record_count INTEGER NOT NULL DEFAULT 0,
+                pending_count INTEGER NOT NULL DEFAULT 0,
+                completed_count INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            for name, body in _rollup_triggers(table, key, expr).items():
+                conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    if existing < len(ROLLUPS):
+        rebuild_rollups(conn)
+
+
+def rebuild_rollups(conn=None):
+    """Recomputes every rollup from the maintenance table in one transaction."""
+    if conn is None:
+        conn = get_db()
+    with conn:
+        for table, (key, expr) in ROLLUPS.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(
+                f"INSERT INTO {table} ({key}, total_cost, record_count, pending_count, completed_count) "
+                + _rollup_select(key, expr))
+
+
+def check_rollups(conn=None, tolerance=0.01):
+    """
+    Compares stored rollups with a full recompute.
+
+    Returns a list of (table, key, stored, expected) mismatches, where
+    stored/expected are (total_cost, count, pending, completed) tuples or
+    None for a missing row. An empty list means the rollups are consistent.
+    """
+    if conn is None:
+        conn = get_db()
+    problems = []
+    for table, (key, expr) in ROLLUPS.items():
+        expected = {row[0]: row[1:] for row in conn.execute(_rollup_select(key, expr))}
+        stored = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT {key}, total_cost, record_count, pending_count, completed_count FROM {table}")}
+        for k in expected.keys() | stored.keys():
+            want = expected.get(k)
+            have = stored.get(k)
+            if want is None or have is None:
+                problems.append((table, k, have, want))
+            elif abs(want[0] - have[0]) > tolerance or tuple(want[1:]) != tuple(have[1:]):
+                problems.append((table, k, have, want))
+    return problems
+
+
+def aircraft_rollup(aircraft_id):
+    """Returns (total_cost, count, pending, completed) for one aircraft."""
+    cursor = get_db().execute(
+        "SELECT total_cost, record_count, pending_count, completed_count "
+        "FROM maintenance_rollup_aircraft WHERE aircraft_id = ?", (aircraft_id,))
+    return cursor.fetchone() or (0.0, 0, 0, 0)
+
+
+def monthly_rollups(month_from=None, month_to=None):
+    """Returns (month, total_cost, count, pending, completed) rows, oldest first."""
+    cursor = get_db().execute(
+        "SELECT month, total_cost, record_count, pending_count, completed_count "
+        "FROM maintenance_rollup_month WHERE month >= ? AND month <= ? ORDER BY month",
+        (month_from or "", month_to or "9999-99"))
+    return cursor.fetchall()
+
+
+def view_rollups():
+    """Displays cost/status totals for one aircraft or per month."""
+    aircraft_id = input("Enter aircraft ID (blank for monthly summary): ").strip()
+    try:
+        if aircraft_id.isdigit():
+            cost, count, pending, completed = aircraft_rollup(int(aircraft_id))
+            print(f"\nAircraft {aircraft_id}: {count} records, total cost ₹{cost:,.2f}, "
+                  f"{pending} pending, {completed} completed")
+            return
+        rows = monthly_rollups()
+        if len(rows) == 0:
+            print("No maintenance records found.")
+            return
+        print("\nMonthly Maintenance Summary:")
+        print("month | total_cost | records | pending | completed")
+        for month, cost, count, pending, completed in rows:
+            print(f"{month} | {cost:.2f} | {count} | {pending} | {completed}")
+    except Exception as e:
+        print("Database Error:", e)
+
+
+# ------------------------------------------------------ #
+# Recurring maintenance schedule
+# ------------------------------------------------------ #
+# A schedule row is one recurring task for one aircraft: "do <task> every
+# interval_days". A completed maintenance event whose description equals the
+# task (case-insensitive) advances next_due to its date + interval_days.
+SCHEDULE_COLUMNS = ("aircraft_id", "name", "model", "task", "interval_days", "last_done", "next_due")
+
+# Latest completed event for (aircraft, task); {row} is the schedule row alias
+_LAST_DONE_SQL = """
+    SELECT MAX(m.date) FROM maintenance m
+    WHERE m.aircraft_id = {row}aircraft_id AND m.description = {row}task COLLATE NOCASE
+      AND lower(m.status) = 'completed'
+"""
+
+
+def _advance_trigger(event):
+    # Moves the matching schedule row forward when a completed event lands.
+    # Older events (logged out of order) never move a schedule backwards.
+    return f"""
+    AFTER {event} ON maintenance
+    WHEN lower(new.status) = 'completed' AND new.date IS NOT NULL
+    BEGIN
+        UPDATE maintenance_schedule
+        SET last_done = new.date, next_due = date(new.date, '+' || interval_days || ' days')
+        WHERE aircraft_id = new.aircraft_id AND task = new.description
+          AND (last_done IS NULL OR last_done < new.date);
+    END
+    """
+
+
+def init_schedule(conn):
+    """
+    Creates the schedule table, its next_due index and the triggers that
+    advance it.
+    """
+    with conn:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aircraft_id INTEGER NOT NULL,
+            task TEXT NOT NULL COLLATE NOCASE,
+            interval_days INTEGER NOT NULL CHECK (interval_days > 0),
+            last_done TEXT,
+            next_due TEXT NOT NULL,
+            UNIQUE (aircraft_id, task),
+            FOREIGN KEY (aircraft_id) REFERENCES aircraft(id)
+        )
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_schedule_next_due
+        ON maintenance_schedule (next_due, aircraft_id)
+        """)
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS maintenance_schedule_insert {_advance_trigger('INSERT')}")
+        conn.execute("CREATE TRIGGER IF NOT EXISTS maintenance_schedule_update "
+                     + _advance_trigger("UPDATE OF status, date, description"))
+
+
+def schedule_task(aircraft_id, task, interval_days, first_due=None):
+    """
+    Adds (or changes the interval of) a recurring task for one aircraft.
+
+    next_due counts from the latest completed event for the task if there
+    is one, else it is first_due (default today). Returns next_due.
+    """
+    task = str(task).strip()
+    if task == "":
+        raise ValueError("Task cannot be empty.")
+    interval_days = int(interval_days)
+    if interval_days <= 0:
+        raise ValueError("Interval must be a positive number of days.")
+    if not aircraft_exists(aircraft_id):
+        raise ValueError("No aircraft exists with that ID.")
+    first_due = db.parse_date(first_due) if first_due else None
+
+    conn = get_db()
+    with conn:
+        last_done = conn.execute(
+            "SELECT MAX(date) FROM maintenance WHERE aircraft_id = ? AND description = ? COLLATE NOCASE "
+            "AND lower(status) = 'completed'", (aircraft_id, task)).fetchone()[0]
+        conn.execute("""
+        INSERT INTO maintenance_schedule (aircraft_id, task, interval_days, last_done, next_due)
+        VALUES (?, ?, ?, ?, IFNULL(date(?, '+' || ? || ' days'), IFNULL(?, date('now'))))
+        ON CONFLICT (aircraft_id, task) DO UPDATE SET
+            interval_days = excluded.interval_days,
+            last_done = excluded.last_done,
+            next_due = CASE WHEN excluded.last_done IS NULL THEN next_due ELSE excluded.next_due END
+        """, (aircraft_id, task, interval_days, last_done, last_done, interval_days, first_due))
+    return next_due_for(aircraft_id, task)
+
+
+def schedule_fleet(task, interval_days, model=None, first_due=None):
+    """
+    Adds a recurring task for every aircraft (or every aircraft of one
+    model) in a single statement. Returns the number of schedule rows
+    added or updated.
+    """
+    task = str(task).strip()
+    if task == "":
+        raise ValueError("Task cannot be empty.")
+    interval_days = int(interval_days)
+    if interval_days <= 0:
+        raise ValueError("Interval must be a positive number of days.")
+    first_due = db.parse_date(first_due) if first_due else None
+
+    where, params = ("WHERE model = ? COLLATE NOCASE", (model,)) if model else ("", ())
+    conn = get_db()
+    with conn:
+        cursor = conn.execute(f"""
+        INSERT INTO maintenance_schedule (aircraft_id, task, interval_days, last_done, next_due)
+        SELECT s.aircraft_id, s.task, s.interval_days, s.last_done,
+               IFNULL(date(s.last_done, '+' || s.interval_days || ' days'), IFNULL(?, date('now')))
+        FROM (SELECT id AS aircraft_id, ? AS task, ? AS interval_days, NULL AS last_done
+              FROM aircraft {where}) s
+        WHERE true
+        ON CONFLICT (aircraft_id, task) DO UPDATE SET interval_days = excluded.interval_days
+        """, (first_due, task, interval_days) + params)
+        count = cursor.rowcount
+        # Count from the last completed event where there is one
+        conn.execute(f"""
+        UPDATE maintenance_schedule AS s
+        SET last_done = done.last_done,
+            next_due = date(done.last_done, '+' || s.interval_days || ' days')
+        FROM (SELECT m.aircraft_id, MAX(m.date) AS last_done FROM maintenance m
+              WHERE m.description = ? COLLATE NOCASE AND lower(m.status) = 'completed'
+              GROUP BY m.aircraft_id) done
+        WHERE s.aircraft_id = done.aircraft_id AND s.task = ?
+        """, (task, task))
+    return count
+
+
+def unschedule_task(aircraft_id, task):
+    """Removes a recurring task; returns True if it existed."""
+    conn = get_db()
+    with conn:
+        cursor = conn.execute("DELETE FROM maintenance_schedule WHERE aircraft_id = ? AND task = ?",
+                              (aircraft_id, str(task).strip()))
+    return cursor.rowcount > 0
+
+
+def next_due_for(aircraft_id, task):
+    """Returns the next due date of one scheduled task, or None."""
+    row = get_db().execute("SELECT next_due FROM maintenance_schedule WHERE aircraft_id = ? AND task = ?",
+                           (aircraft_id, str(task).strip())).fetchone()
+    return row[0] if row else None
+
+
+def due_maintenance(before=None, limit=50, aircraft_id=None):
+    """
+    Returns the most urgent scheduled tasks, earliest next_due first.
+
+    before (YYYY-MM-DD) keeps only tasks due on or before that day. Rows
+    follow SCHEDULE_COLUMNS. Answered from the front of the next_due index.
+    """
+    before = db.parse_date(before) if before else "9999-12-31"
+    where, params = ("AND s.aircraft_id = ?", (aircraft_id,)) if aircraft_id is not None else ("", ())
+    cursor = get_db().execute(f"""
+        SELECT s.aircraft_id, a.name, a.model, s.task, s.interval_days, s.last_done, s.next_due
+        FROM maintenance_schedule s JOIN aircraft a ON a.id = s.aircraft_id
+        WHERE s.next_due <= ? {where}
+        ORDER BY s.next_due, s.aircraft_id
+        LIMIT ?
+    """, (before,) + params + (limit,))
+    return cursor.fetchall()
+
+
+def rebuild_schedule(conn=None):
+    """Recomputes last_done/next_due of every schedule row from the maintenance history."""
+    if conn is None:
+        conn = get_db()
+    with conn:
+        conn.execute(f"""
+        UPDATE maintenance_schedule AS s
+        SET last_done = done.last_done,
+            next_due = date(done.last_done, '+' || s.interval_days || ' days')
+        FROM (SELECT s2.id, ({_LAST_DONE_SQL.format(row="s2.")}) AS last_done
+              FROM maintenance_schedule s2) done
+        WHERE s.id = done.id AND done.last_done IS NOT NULL
+        """)
+
+
+def check_schedule(conn=None):
+    """
+    Compares each schedule row with its maintenance history.
+
+    Returns (aircraft_id, task, stored last_done, expected last_done) for
+    rows whose last_done lags the newest completed event; empty means the
+    incremental updates are consistent.
+    """
+    if conn is None:
+        conn = get_db()
+    return conn.execute(f"""
+        SELECT aircraft_id, task, last_done, expected FROM (
+            SELECT s.aircraft_id, s.task, s.last_done, ({_LAST_DONE_SQL.format(row="s.")}) AS expected
+            FROM maintenance_schedule s)
+        WHERE expected IS NOT NULL AND (last_done IS NULL OR last_done < expected)
+    """).fetchall()
+
+
+# ------------------------------------------------------ #
+# Record API (no prompts)
+# ------------------------------------------------------ #
+def add_aircraft_record(name, model, year):
+    """
+    Validates and stores one aircraft; returns its new id.
+
+    Raises ValueError with the same messages as the interactive prompts.
+    """
+    name = str(name).strip()
+    model = str(model).strip()
+    if name == "":
+        raise ValueError("Aircraft name cannot be empty.")
+    if model == "":
+        raise ValueError("Model cannot be empty.")
+    if not str(year).strip().isdigit():
+        raise ValueError("Manufacture year must be a numeric value.")
+    year = int(year)
+    if year < 1950 or year > 2025:
+        raise ValueError("Enter a realistic year between 1950–2025.")
+
+    conn = get_db()
+    with conn:
+        cursor = conn.execute("INSERT INTO aircraft (name, model, manufacture_year) VALUES (?, ?, ?)",
+                              (name, model, year))
+    get_registry().added(cursor.lastrowid, name, model, year)
+    return cursor.lastrowid
+
+
+def aircraft_exists(aircraft_id):
+    """Returns True if an aircraft with this id is registered (served by the registry)."""
+    return get_registry().exists(aircraft_id)
+
+
+def add_maintenance_record(aircraft_id, description, date, engineer, cost, status):
+    """
+    Validates and stores one maintenance event; returns its new id.
+
+    Raises ValueError with the same messages as the interactive prompts.
+    """
+    description = str(description).strip()
+    engineer = str(engineer).strip()
+    status = str(status).strip().lower()
+    if not aircraft_exists(aircraft_id):
+        raise ValueError("No aircraft exists with that ID.")
+    if description == "":
+        raise ValueError("Description cannot be empty.")
+    date = db.parse_date(date)
+    if engineer == "":
+        raise ValueError("Engineer name cannot be empty.")
+    cost = float(cost)
+    if cost < 0:
+        raise ValueError("Cost must be positive.")
+    if status not in ("completed", "pending"):
+        raise ValueError("Status must be either 'Completed' or 'Pending'.")
+
+    cursor = db.write(
+        get_db(),
+        "INSERT INTO maintenance (aircraft_id, description, date, engineer, cost, status) VALUES (?, ?, ?, ?, ?, ?)",
+        (aircraft_id, description, date, engineer, cost, status)
+    )
+    return cursor.lastrowid
+
+
+def complete_maintenance(record_id):
+    """
+    Marks one pending maintenance record as completed.
+
+    Raises ValueError if there is no pending record with that id.
+    """
+    cursor = db.write(
+        get_db(),
+        "UPDATE maintenance SET status = 'completed' WHERE id = ? AND lower(status) = 'pending'",
+        (record_id,)
+    )
+    if cursor.rowcount == 0:
+        raise ValueError("No pending maintenance record with that ID.")
 
 
 # ------------------------------------------------------ #
@@ -92,12 +696,7 @@ def add_aircraft():
 
     # ---- Insert into DB ---- #
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO aircraft (name, model, manufacture_year) VALUES (?, ?, ?)",
-                       (name, model, year))
-        conn.commit()
-        conn.close()
+        add_aircraft_record(name, model, year)
         print("Aircraft added successfully.")
 
     except Exception as e:
@@ -113,12 +712,7 @@ def search_aircraft():
         return
 
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM aircraft WHERE name LIKE ? OR model LIKE ?", 
-                       (f"%{keyword}%", f"%{keyword}%"))
-        rows = cursor.fetchall()
-        conn.close()
+        rows = find_aircraft(keyword)
 
         if len(rows) == 0:
             print("No matching aircraft found.")
@@ -132,19 +726,10 @@ def search_aircraft():
 
 def view_aircraft():
     """Displays all aircraft records with empty DB check."""
+    options = paging.ask_view_options(with_dates=False)
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM aircraft")
-        rows = cursor.fetchall()
-        conn.close()
-
-        if len(rows) == 0:
-            print("No aircraft registered yet.")
-        else:
-            print("\nRegistered Aircraft:")
-            for row in rows:
-                print(row)
+        pages = get_registry().iter_pages(**options)
+        paging.show_pages(pages, "Registered Aircraft:", registry.COLUMNS, "No aircraft registered yet.")
     except Exception as e:
         print("Database Error:", e)
 
@@ -163,13 +748,7 @@ def log_maintenance():
             continue
 
         # Check if ID exists
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM aircraft WHERE id = ?", (aircraft_id,))
-        exists = cursor.fetchone()
-        conn.close()
-
-        if exists is None:
+        if not aircraft_exists(int(aircraft_id)):
             print("No aircraft exists with that ID.")
         else:
             aircraft_id = int(aircraft_id)
@@ -186,10 +765,10 @@ def log_maintenance():
     # ---- Date format check ---- #
     while True:
         date = input("Enter date (YYYY-MM-DD): ").strip()
-        if len(date) == 10 and date[4] == '-' and date[7] == '-':
+        if db.is_valid_date(date):
             break
         else:
-            print("Invalid date format. Use YYYY-MM-DD.")
+            print(db.DATE_ERROR)
 
     # ---- Engineer name ---- #
     while True:
@@ -221,35 +800,83 @@ def log_maintenance():
 
     # ---- Insert record ---- #
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO maintenance (aircraft_id, description, date, engineer, cost, status) VALUES (?, ?, ?, ?, ?, ?)",
-            (aircraft_id, desc, date, eng, cost, status)
-        )
-        conn.commit()
-        conn.close()
-
+        add_maintenance_record(aircraft_id, desc, date, eng, cost, status)
         print("Maintenance record added.")
+        due = next_due_for(aircraft_id, desc) if status == "completed" else None
+        if due:
+            print(f"Next '{desc}' for aircraft {aircraft_id} is due on {due}.")
     except Exception as e:
         print("Database Error:", e)
 
 
 def view_maintenance():
     """Displays full maintenance logs for all aircraft."""
+    options = paging.ask_view_options(with_dates=True)
+    columns = ("id", "aircraft_id", "description", "date", "engineer", "cost", "status")
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM maintenance")
-        rows = cursor.fetchall()
-        conn.close()
+        pages = paging.iter_pages(get_db(), "maintenance", ", ".join(columns), **options)
+        paging.show_pages(pages, "Maintenance Records:", columns, "No maintenance records found.")
+    except Exception as e:
+        print("Database Error:", e)
 
-        if len(rows) == 0:
-            print("No maintenance records found.")
+
+def schedule_maintenance():
+    """Adds a recurring task for one aircraft, or for the whole fleet."""
+    target = input("Aircraft ID (blank for every aircraft): ").strip()
+    if target != "" and not target.isdigit():
+        print("ID must be numeric.")
+        return
+
+    while True:
+        task = input("Task (matches the description of completed records): ").strip()
+        if task == "":
+            print("Task cannot be empty.")
         else:
-            print("\nMaintenance Records:")
-            for row in rows:
-                print(row)
+            break
+
+    while True:
+        interval = input("Repeat every how many days?: ").strip()
+        if interval.isdigit() and int(interval) > 0:
+            interval = int(interval)
+            break
+        print("Interval must be a positive number of days.")
+
+    while True:
+        first_due = input("First due date if never done (YYYY-MM-DD, blank for today): ").strip()
+        if first_due == "" or db.is_valid_date(first_due):
+            break
+        print(db.DATE_ERROR)
+
+    try:
+        if target == "":
+            count = schedule_fleet(task, interval, first_due=first_due or None)
+            print(f"Scheduled '{task}' every {interval} days for {count} aircraft.")
+        else:
+            due = schedule_task(int(target), task, interval, first_due or None)
+            print(f"Scheduled '{task}' every {interval} days; next due {due}.")
+    except ValueError as e:
+        print(e)
+    except Exception as e:
+        print("Database Error:", e)
+
+
+def view_due_maintenance():
+    """Displays the most urgent scheduled tasks across the fleet."""
+    while True:
+        before = input("Due on or before (YYYY-MM-DD, blank for all): ").strip()
+        if before == "" or db.is_valid_date(before):
+            break
+        print(db.DATE_ERROR)
+
+    try:
+        rows = due_maintenance(before or None, limit=50)
+        if len(rows) == 0:
+            print("No scheduled maintenance is due.")
+            return
+        print("\nMaintenance Due (earliest first):")
+        print(" | ".join(SCHEDULE_COLUMNS))
+        for row in rows:
+            print(" | ".join("" if value is None else str(value) for value in row))
     except Exception as e:
         print("Database Error:", e)
 
@@ -266,11 +893,7 @@ def view_maintenance_by_aircraft():
             break
 
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM maintenance WHERE aircraft_id = ?", (aircraft_id,))
-        rows = cursor.fetchall()
-        conn.close()
+        rows = maintenance_history(aircraft_id)
 
         if len(rows) == 0:
             print("No maintenance records for this aircraft.")
@@ -289,6 +912,7 @@ def run_maintenance():
     """Runs the maintenance system menu."""
     init_db()
     while True:
+        db.flush_due()
         print("\n--- Aircraft Maintenance Module ---")
         print("1. Add Aircraft")
         print("2. Search Aircraft")
@@ -296,7 +920,10 @@ def run_maintenance():
         print("4. Add Maintenance Record")
         print("5. View All Maintenance Records")
         print("6. View Maintenance Records for Specific Aircraft")
-        print("7. Back to Main Menu")
+        print("7. View Cost & Status Summary")
+        print("8. Schedule Recurring Maintenance")
+        print("9. View Maintenance Due")
+        print("10. Back to Main Menu")
 
         choice = input("Enter choice: ").strip()
 
@@ -313,6 +940,13 @@ def run_maintenance():
         elif choice == '6':
             view_maintenance_by_aircraft()
         elif choice == '7':
+            view_rollups()
+        elif choice == '8':
+            schedule_maintenance()
+        elif choice == '9':
+            view_due_maintenance()
+        elif choice == '10':
+            db.flush()
             break
         else:
             print("Invalid input, please try again.")
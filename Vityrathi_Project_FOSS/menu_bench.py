@@ -0,0 +1,273 @@
+"""
+Menu latency driver for Flight Operational Support Suite
+
+Runs scripted sessions through the interactive menus (main.main(), with
+input() answered from a script) against scratch databases that are grown
+step by step, times every menu action at each size and reports the
+actions whose latency grows with the size of the tables:
+
+    python menu_bench.py --sizes 10000,50000,200000 --repeat 10
+    python menu_bench.py --output menus.json
+
+Sizes are weather rows; the other tables grow with them in TABLE_RATIOS.
+An action is timed from the moment its menu choice is entered until the
+menu is shown again, so prompts, queries and printing are all included
+(output is captured, not written to the terminal). Viewers stop after the
+first page. The databases in databases/ are never touched.
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+
+import bench
+import db
+from main import main as main_menu
+
+# Rows per table for each weather row (the mix of bench.py's defaults)
+TABLE_RATIOS = {"aircraft": 0.05, "maintenance": 0.5, "weather": 1.0, "fuel": 0.25}
+DEFAULT_SIZES = (10000, 50000, 200000)
+
+# An action grows with table size when its median latency fits
+# size ** exponent with exponent >= GROWTH_EXPONENT and it is at least
+# MIN_GROWTH times slower at the largest size than at the smallest
+GROWTH_EXPONENT = 0.25
+MIN_GROWTH = 1.5
+
+# Prompts answered within one action before the script counts as stuck
+MAX_PROMPTS = 50
+
+MENU_PROMPT = "Enter choice"
+EXIT_CHOICE = "5"
+
+# Module menu (main menu choice) -> its "Back to Main Menu" choice
+BACK_CHOICES = {"1": "10", "2": "6", "3": "5"}
+
+# Viewer options left at their defaults; stop after the first page
+VIEWER_ANSWERS = {
+    "Rows per page": "", "From date": "", "To date": "", "Order by date": "", "Newest first": "",
+    "-- ": "q",
+}
+
+
+class ScriptError(BaseException):
+    """
+    The menus asked for something the script does not answer, or an
+    action printed an error. A BaseException, so the menus' own
+    "except Exception" handlers do not swallow it.
+    """
+
+
+class Action:
+    """One scripted menu action: the menu choices leading to it and its answers."""
+
+    __slots__ = ("name", "path", "answers")
+
+    def __init__(self, name, path, answers=None):
+        self.name = name
+        self.path = path
+        # Prompt prefix -> answer
+        self.answers = dict(VIEWER_ANSWERS, **(answers or {}))
+
+
+ACTIONS = (
+    Action("maintenance.add_aircraft", ("1", "1"), {
+        "Enter aircraft name": "Driver A320", "Enter model": "A320-214", "Enter manufacture year": "2015"}),
+    Action("maintenance.search_aircraft", ("1", "2"), {"Enter search keyword": "A320"}),
+    Action("maintenance.view_aircraft", ("1", "3")),
+    Action("maintenance.log_maintenance", ("1", "4"), {
+        "Enter aircraft ID": "1", "Enter maintenance description": "Tyre replacement",
+        "Enter date": "2025-01-01", "Enter engineer name": "Naveen Rao", "Enter repair cost": "100",
+        "Enter maintenance status": "Pending"}),
+    Action("maintenance.view_records", ("1", "5")),
+    Action("maintenance.records_for_aircraft", ("1", "6"), {"Enter aircraft ID": "1"}),
+    Action("maintenance.monthly_summary", ("1", "7"), {"Enter aircraft ID": ""}),
+    Action("maintenance.aircraft_summary", ("1", "7"), {"Enter aircraft ID": "1"}),
+    Action("maintenance.due", ("1", "9"), {"Due on or before": ""}),
+    Action("weather.record", ("2", "1"), {
+        "Enter wind speed": "10", "Enter temperature": "20", "Enter humidity": "50",
+        "Enter visibility": "10", "Enter date": "2025-01-01", "Enter station code": ""}),
+    Action("weather.logs", ("2", "2")),
+    Action("weather.clearance", ("2", "3")),
+    Action("weather.stats", ("2", "5"), {"Group by": "week"}),
+    Action("fuel.calculate", ("3", "1"), {
+        "Enter total fuel": "8000", "Enter fuel burn rate": "2400", "Enter cruising speed": "720",
+        "Enter date": "2025-01-01"}),
+    Action("fuel.history", ("3", "2")),
+    Action("fuel.model_range", ("3", "4"), {
+        "Enter aircraft ID": "1", "Enter total fuel": "4000", "Enter date to save": ""}),
+    Action("preflight.aircraft", ("4",), {"Enter aircraft ID": "1", "Required range": ""}),
+    Action("preflight.fleet", ("4",), {"Enter aircraft ID": "", "Required range": ""}),
+)
+
+
+# ------------------------------------------------------ #
+# Scripted sessions
+# ------------------------------------------------------ #
+class _Session:
+    """Stands in for input() during one run of one action and times it."""
+
+    def __init__(self, action):
+        self.action = action
+        back = [BACK_CHOICES[action.path[0]]] if action.path[0] in BACK_CHOICES else []
+        self.choices = list(action.path) + back + [EXIT_CHOICE]
+        self.path_left = len(action.path)
+        self.prompts = 0
+        self.started = None
+        self.elapsed = None
+
+    def __call__(self, prompt=""):
+        if prompt.startswith(MENU_PROMPT):
+            if self.started is not None and self.elapsed is None:
+                self.elapsed = time.perf_counter() - self.started
+            if not self.choices:
+                raise ScriptError(f"{self.action.name}: menu shown again after exit")
+            self.path_left -= 1
+            choice = self.choices.pop(0)
+            if self.path_left == 0:
+                self.started = time.perf_counter()
+            return choice
+
+        self.prompts += 1
+        if self.prompts > MAX_PROMPTS:
+            raise ScriptError(f"{self.action.name}: stuck at prompt {prompt!r}")
+        # Longest matching prefix, so "Enter date to save" beats "Enter date"
+        matches = [key for key in self.action.answers if prompt.startswith(key)]
+        if not matches:
+            raise ScriptError(f"{self.action.name}: no answer for prompt {prompt!r}")
+        return self.action.answers[max(matches, key=len)]
+
+
+def run_action(action):
+    """Runs one scripted session through main.main(); returns the action's seconds."""
+    session = _Session(action)
+    output = io.StringIO()
+    saved = builtins.input
+    builtins.input = session
+    try:
+        with contextlib.redirect_stdout(output):
+            main_menu()
+    finally:
+        builtins.input = saved
+
+    if session.elapsed is None:
+        raise ScriptError(f"{action.name}: the menu never came back")
+    errors = [line.strip() for line in output.getvalue().splitlines() if "Error" in line]
+    if errors:
+        raise ScriptError(f"{action.name}: {errors[0]}")
+    return session.elapsed
+
+
+# ------------------------------------------------------ #
+# Growing databases
+# ------------------------------------------------------ #
+def measure(sizes, repeat, rng, actions=ACTIONS):
+    """
+    Grows the scratch databases to each size in turn and times every
+    action repeat times (after one untimed warm-up run).
+
+    Returns [{"size", "rows", "actions": {name: latency summary}}].
+    """
+    loaded = dict.fromkeys(TABLE_RATIOS, 0)
+    steps = []
+    for size in sorted(sizes):
+        target = {table: max(int(size * ratio), 1) for table, ratio in TABLE_RATIOS.items()}
+        bench.populate(rng, {table: target[table] - loaded[table] for table in TABLE_RATIOS})
+        loaded = target
+
+        timings = {}
+        for action in actions:
+            run_action(action)
+            timings[action.name] = bench._summarize([run_action(action) for _ in range(repeat)])
+        steps.append({"size": size, "rows": target, "actions": timings})
+    return steps
+
+
+def growth(steps):
+    """
+    Fits median latency ~ size ** exponent per action (least squares in
+    log-log space). Returns {name: {"p50_ms", "exponent", "ratio", "grows"}}.
+    """
+    sizes = [math.log(step["size"]) for step in steps]
+    mean_size = sum(sizes) / len(sizes)
+    spread = sum((x - mean_size) ** 2 for x in sizes)
+    results = {}
+    for name in steps[0]["actions"]:
+        p50 = [step["actions"][name]["p50_ms"] for step in steps]
+        logs = [math.log(max(ms, 1e-6)) for ms in p50]
+        mean_log = sum(logs) / len(logs)
+        exponent = (sum((x - mean_size) * (y - mean_log) for x, y in zip(sizes, logs)) / spread
+                    if spread else 0.0)
+        ratio = p50[-1] / p50[0] if p50[0] else 0.0
+        results[name] = {"p50_ms": p50, "exponent": round(exponent, 2), "ratio": round(ratio, 1),
+                         "grows": exponent >= GROWTH_EXPONENT and ratio >= MIN_GROWTH}
+    return results
+
+
+# ------------------------------------------------------ #
+# Entry point
+# ------------------------------------------------------ #
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FOSS menu latency driver (JSON output)")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated weather row counts (other tables scale with them)")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per action and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dir", help="directory for the scratch databases (default: temporary)")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = sorted({int(size) for size in args.sizes.split(",")})
+    except ValueError:
+        parser.error("--sizes must be comma-separated numbers")
+    if len(sizes) < 2 or sizes[0] <= 0:
+        parser.error("--sizes needs at least two positive sizes")
+
+    with tempfile.TemporaryDirectory(prefix="foss-menus-") as tmp:
+        workdir = args.dir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        bench._use_scratch_databases(workdir)
+        try:
+            steps = measure(sizes, args.repeat, random.Random(args.seed))
+        except ScriptError as e:
+            parser.exit(1, f"Script error: {e}\n")
+        finally:
+            db.close_all()
+
+    trend = growth(steps)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "growing": sorted((name for name, fit in trend.items() if fit["grows"]),
+                          key=lambda name: -trend[name]["exponent"]),
+        "growth": trend,
+        "steps": steps,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
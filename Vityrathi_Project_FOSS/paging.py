@@ -0,0 +1,137 @@
+"""
+Module: paging.py
+Purpose: Keyset-paginated, streaming record viewers shared by all modules.
+
+This module handles:
+- Reading tables page by page with keyset (seek) pagination
+- Page size, date-range and ordering options for the history viewers
+- Printing one page at a time so the first page appears immediately
+"""
+
+import db
+
+DEFAULT_PAGE_SIZE = 20
+
+# Keyset columns for each ordering; id breaks ties between equal dates.
+ORDER_KEYS = {
+    "id": ("id",),
+    "date": ("date", "id"),
+}
+
+
+# ------------------------------------------------------ #
+# Keyset pagination
+# ------------------------------------------------------ #
+def iter_pages(conn, table, columns, order="id", descending=False,
+               date_from=None, date_to=None, page_size=DEFAULT_PAGE_SIZE,
+               where=None, params=()):
+    """
+    Yields pages of at most page_size rows from table, each seeking past the
+    last key of the one before (undated rows skipped when ordering by date).
+    """
+    keys = ORDER_KEYS[order]
+    direction = "DESC" if descending else "ASC"
+    seek = "<" if descending else ">"
+    key_list = ", ".join(keys)
+    order_by = ", ".join(f"{key} {direction}" for key in keys)
+
+    filters = [where] if where else []
+    params = list(params)
+    if order == "date":
+        filters.append("date IS NOT NULL")
+    if date_from:
+        filters.append("date >= ?")
+        params.append(db.parse_date(date_from))
+    if date_to:
+        filters.append("date <= ?")
+        params.append(db.parse_date(date_to))
+
+    last = None
+    while True:
+        conds = list(filters)
+        args = list(params)
+        if last is not None:
+            conds.append(f"({key_list}) {seek} ({', '.join('?' * len(keys))})")
+            args.extend(last)
+        where = f" WHERE {' AND '.join(conds)}" if conds else ""
+
+        cursor = conn.execute(
+            f"SELECT {columns}, {key_list} FROM {table}{where} ORDER BY {order_by} LIMIT ?",
+            args + [page_size]
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+
+        last = rows[-1][-len(keys):]
+        yield [row[:-len(keys)] for row in rows]
+
+        if len(rows) < page_size:
+            return
+
+
+# ------------------------------------------------------ #
+# Interactive viewer helpers
+# ------------------------------------------------------ #
+def ask_view_options(with_dates=True):
+    """
+    Prompts for viewer options; pressing Enter keeps each default.
+
+    Returns a dict of keyword arguments for iter_pages().
+    """
+    options = {"page_size": DEFAULT_PAGE_SIZE, "order": "id", "descending": False}
+
+    while True:
+        size = input(f"Rows per page [{DEFAULT_PAGE_SIZE}]: ").strip()
+        if size == "":
+            break
+        if size.isdigit() and int(size) > 0:
+            options["page_size"] = int(size)
+            break
+        print("Page size must be a positive number.")
+
+    if with_dates:
+        for key, label in (("date_from", "From date"), ("date_to", "To date")):
+            while True:
+                value = input(f"{label} (YYYY-MM-DD, blank for all): ").strip()
+                if value == "" or db.is_valid_date(value):
+                    options[key] = value or None
+                    break
+                print(db.DATE_ERROR)
+
+        if input("Order by date instead of entry order? (y/N): ").strip().lower() == "y":
+            options["order"] = "date"
+
+    if input("Newest first? (y/N): ").strip().lower() == "y":
+        options["descending"] = True
+
+    return options
+
+
+def show_pages(pages, title, headers, empty_message):
+    """
+    Prints pages as they arrive, pausing between pages.
+
+    Returns the number of rows shown.
+    """
+    pages = iter(pages)
+    page = next(pages, None)
+    if page is None:
+        print(empty_message)
+        return 0
+
+    print(f"\n{title}")
+    print(" | ".join(headers))
+    shown = 0
+    while page is not None:
+        for row in page:
+            print(" | ".join("" if value is None else str(value) for value in row))
+        shown += len(page)
+
+        page = next(pages, None)
+        if page is None:
+            break
+        reply = input(f"-- {shown} rows shown. Enter for next page, q to stop: ").strip().lower()
+        if reply == "q":
+            break
+    return shown
@@ -0,0 +1,119 @@
+"""
+Module: preflight.py
+Purpose: Go/no-go readiness check combining maintenance, weather and fuel data.
+
+This module handles:
+- Attaching fuel.db to the maintenance connection
+- One set-based query per check: pending maintenance (from the rollups)
+  and each aircraft's latest range estimate, plus the latest clearance
+  verdict (for one station, or any) from weather.latest_observation()
+- Readiness for one aircraft or the whole fleet
+"""
+
+import db
+import fuel_calc
+import maintenance
+import weather
+
+PREFLIGHT_COLUMNS = (
+    "aircraft_id", "name", "model", "pending_maintenance",
+    "clearance", "weather_date", "estimated_range", "range_date", "verdict",
+)
+
+# Latest weather row is shared by every aircraft (weather has no aircraft
+# link) and is looked up once, across the station databases, then passed
+# in; the latest range estimate is looked up per aircraft through
+# idx_fueldata_aircraft, so each aircraft costs one index seek.
+PREFLIGHT_SQL = """
+WITH latest_wx AS (
+    SELECT :clearance AS clearance, :weather_date AS date
+),
+fleet AS (
+    SELECT a.id, a.name, a.model,
+           IFNULL(r.pending_count, 0) AS pending,
+           (SELECT f.id FROM fuel.fueldata f
+            WHERE f.aircraft_id = a.id ORDER BY f.id DESC LIMIT 1) AS fuel_id
+    FROM aircraft a
+    LEFT JOIN maintenance_rollup_aircraft r ON r.aircraft_id = a.id
+    WHERE :aircraft_id IS NULL OR a.id = :aircraft_id
+)
+SELECT fleet.id, fleet.name, fleet.model, fleet.pending,
+       w.clearance, w.date, f.estimated_range, f.date,
+       CASE
+           WHEN fleet.pending > 0 THEN 'NO-GO - Pending maintenance'
+           WHEN w.clearance IS NULL THEN 'NO-GO - No weather data'
+           WHEN w.clearance NOT LIKE 'YES%' THEN 'NO-GO - Weather'
+           WHEN f.estimated_range IS NULL THEN 'NO-GO - No range estimate'
+           WHEN :required_range IS NOT NULL AND f.estimated_range < :required_range
+               THEN 'NO-GO - Insufficient range'
+           ELSE 'GO'
+       END
+FROM fleet
+LEFT JOIN latest_wx w
+LEFT JOIN fuel.fueldata f ON f.id = fleet.fuel_id
+ORDER BY fleet.id
+"""
+
+
+# ------------------------------------------------------ #
+# Readiness query
+# ------------------------------------------------------ #
+def get_db():
+    """Returns the maintenance connection with fuel attached."""
+    fuel_calc.init_db()
+    conn = maintenance.get_db()
+    db.attach(conn, "fuel", fuel_calc.DB_PATH)
+    return conn
+
+
+def preflight(aircraft_id=None, required_range=None, station=None):
+    """
+    Returns PREFLIGHT_COLUMNS rows for one aircraft, or the whole fleet if
+    None, each with its GO / NO-GO verdict.
+    """
+    latest = weather.latest_observation(station)
+    cursor = get_db().execute(PREFLIGHT_SQL, {
+        "aircraft_id": aircraft_id,
+        "required_range": required_range,
+        "clearance": latest[2] if latest else None,
+        "weather_date": latest[1] if latest else None,
+    })
+    return cursor.fetchall()
+
+
+# ------------------------------------------------------ #
+# Interactive check
+# ------------------------------------------------------ #
+def run_preflight():
+    # Prompts for an aircraft (or the fleet) and prints the readiness table.
+    while True:
+        aircraft_id = input("Enter aircraft ID (blank for whole fleet): ").strip()
+        if aircraft_id == "" or aircraft_id.isdigit():
+            aircraft_id = int(aircraft_id) if aircraft_id else None
+            break
+        print("Aircraft ID must be numeric.")
+
+    while True:
+        required = input("Required range in km (blank to skip): ").strip()
+        try:
+            required = float(required) if required else None
+            break
+        except ValueError:
+            print("Enter a valid number for range.")
+
+    try:
+        rows = preflight(aircraft_id, required)
+    except Exception as e:
+        print("Database Error:", e)
+        return
+
+    if len(rows) == 0:
+        print("No matching aircraft found.")
+        return
+
+    print("\nPreflight Readiness:")
+    print(" | ".join(PREFLIGHT_COLUMNS))
+    for row in rows:
+        print(" | ".join("" if value is None else str(value) for value in row))
+    go = sum(1 for row in rows if row[-1] == "GO")
+    print(f"\n{go} of {len(rows)} aircraft GO.")
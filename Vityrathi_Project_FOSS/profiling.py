@@ -0,0 +1,330 @@
+"""
+Module: profiling.py
+Purpose: Opt-in instrumentation of every database operation.
+
+This module handles:
+- Timing each statement (execute + fetching its rows) and each commit
+- Row counts, SQLite VM work (progress handler) and statement text
+- Counting every statement SQLite actually runs (trace callback), including
+  implicit BEGIN/COMMIT and trigger bodies
+- Latency histograms with p50/p95/p99 per operation
+- Printing a summary or writing JSON at exit
+
+Profiling is off unless FOSS_PROFILE is set (or enable() is called, e.g. by
+`foss.py --profile`) before the first connection is opened. When it is off,
+db.open_connection() returns plain sqlite3 connections and nothing here runs.
+
+    FOSS_PROFILE=1 python main.py                  # summary on stderr at exit
+    FOSS_PROFILE=profile.json python foss.py ...   # JSON file at exit
+"""
+
+import atexit
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# SQLite VM instructions between progress-handler calls
+PROGRESS_STEPS = 1000
+
+# Histogram resolution: buckets per doubling of latency (~9% wide)
+BUCKETS_PER_OCTAVE = 8
+
+# Statement text kept per operation
+SQL_WIDTH = 120
+
+enabled = False
+_output = None
+_started = None
+_lock = threading.Lock()
+_ops = {}      # (database, statement) -> OpStats
+_traced = {}   # (database, statement) -> times SQLite ran it
+
+
+# ------------------------------------------------------ #
+# Statistics
+# ------------------------------------------------------ #
+def _normalize(sql):
+    # One-line, width-limited statement text used as the operation key.
+    text = " ".join(str(sql).split())
+    return text if len(text) <= SQL_WIDTH else text[:SQL_WIDTH - 3] + "..."
+
+
+class OpStats:
+    """Latency histogram and totals for one operation."""
+
+    __slots__ = ("calls", "rows", "seconds", "max", "vm_steps", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.seconds = 0.0
+        self.max = 0.0
+        self.vm_steps = 0
+        self.buckets = {}
+
+    def add(self, seconds, rows, vm_steps):
+        self.calls += 1
+        self.rows += rows
+        self.seconds += seconds
+        self.vm_steps += vm_steps
+        if seconds > self.max:
+            self.max = seconds
+        micros = seconds * 1e6
+        bucket = int(math.log2(micros) * BUCKETS_PER_OCTAVE) if micros > 1 else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, pct):
+        """Upper edge of the histogram bucket holding the pct-th percentile, in seconds."""
+        rank = math.ceil(self.calls * pct / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e6, self.max)
+        return self.max
+
+
+def record(database, operation, seconds, rows=0, vm_steps=0):
+    """Adds one timed call to the stats for (database, operation)."""
+    key = (database, operation)
+    with _lock:
+        stats = _ops.get(key)
+        if stats is None:
+            stats = _ops[key] = OpStats()
+        stats.add(seconds, rows, vm_steps)
+
+
+def reset():
+    """Discards everything recorded so far."""
+    with _lock:
+        _ops.clear()
+        _traced.clear()
+
+
+def summary():
+    """Returns the recorded statistics as a JSON-ready dict, slowest total first."""
+    with _lock:
+        items = list(_ops.items())
+        traced = dict(_traced)
+
+    operations = []
+    for (database, operation), stats in sorted(items, key=lambda item: -item[1].seconds):
+        operations.append({
+            "database": database,
+            "operation": operation,
+            "calls": stats.calls,
+            "rows": stats.rows,
+            "vm_steps": stats.vm_steps,
+            "total_ms": round(stats.seconds * 1000, 4),
+            "mean_ms": round(stats.seconds / stats.calls * 1000, 4),
+            "p50_ms": round(stats.percentile(50) * 1000, 4),
+            "p95_ms": round(stats.percentile(95) * 1000, 4),
+            "p99_ms": round(stats.percentile(99) * 1000, 4),
+            "max_ms": round(stats.max * 1000, 4),
+        })
+    statements = [
+        {"database": database, "statement": statement, "count": count}
+        for (database, statement), count in sorted(traced.items(), key=lambda item: -item[1])
+    ]
+    return {
+        "wall_seconds": round(time.perf_counter() - _started, 4) if _started else 0.0,
+        "operations": operations,
+        "traced_statements": statements,
+    }
+
+
+def print_summary(file=None, limit=25):
+    """Prints the slowest operations as a table."""
+    file = file or sys.stderr
+    report = summary()
+    print(f"\n-- FOSS profile ({report['wall_seconds']:.2f} s wall) --", file=file)
+    print(f"{'calls':>8} {'rows':>9} {'total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8}  operation", file=file)
+    for op in report["operations"][:limit]:
+        print(f"{op['calls']:>8} {op['rows']:>9} {op['total_ms']:>10.2f} {op['p50_ms']:>8.3f} "
+              f"{op['p95_ms']:>8.3f} {op['p99_ms']:>8.3f}  {op['database']}: {op['operation']}", file=file)
+
+
+def export(path):
+    """Writes summary() to path as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary(), f, indent=2)
+        f.write("\n")
+
+
+# ------------------------------------------------------ #
+# Instrumented connection
+# ------------------------------------------------------ #
+class ProfiledCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement from execute() until its rows are
+    exhausted, the cursor runs another statement, or it is closed.
+    """
+
+    _call = None
+
+    def _begin(self, sql, many=False):
+        self._finish()
+        conn = self.connection
+        op = ("executemany: " if many else "") + _normalize(sql)
+        # [operation, seconds, rows, progress ticks at start]
+        self._call = [op, 0.0, 0, conn._progress_ticks]
+
+    def _finish(self):
+        call = self._call
+        if call is not None:
+            self._call = None
+            conn = self.connection
+            rows = call[2] or max(self.rowcount, 0)
+            record(conn._database, call[0], call[1], rows,
+                   (conn._progress_ticks - call[3]) * PROGRESS_STEPS)
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._call is not None:
+                self._call[1] += time.perf_counter() - start
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, many=True)
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self._begin(sql_script)
+        result = self._timed(super().executescript, sql_script)
+        self._finish()
+        return result
+
+    def _fetched(self, rows):
+        if self._call is not None:
+            self._call[2] += rows
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            self._fetched(1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._fetched(len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._fetched(len(rows))
+        self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        self._fetched(1)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose statements and commits are recorded by this module."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._database = os.path.basename(str(args[0] if args else kwargs.get("database", "")))
+        self._progress_ticks = 0
+        self.set_progress_handler(self._tick, PROGRESS_STEPS)
+        self.set_trace_callback(self._trace)
+
+    def _tick(self):
+        self._progress_ticks += 1
+        return 0
+
+    def _trace(self, statement):
+        key = (self._database, _normalize(statement))
+        with _lock:
+            _traced[key] = _traced.get(key, 0) + 1
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        start = time.perf_counter()
+        super().commit()
+        record(self._database, "COMMIT", time.perf_counter() - start)
+
+    def __exit__(self, exc_type, exc, tb):
+        # `with conn:` commits (or rolls back) without calling commit()
+        start = time.perf_counter()
+        result = super().__exit__(exc_type, exc, tb)
+        record(self._database, "COMMIT" if exc_type is None else "ROLLBACK", time.perf_counter() - start)
+        return result
+
+
+# ------------------------------------------------------ #
+# Switch
+# ------------------------------------------------------ #
+def _report_at_exit():
+    if _output:
+        export(_output)
+    else:
+        print_summary()
+
+
+def enable(output=None, at_exit=True):
+    """
+    Turns profiling on for connections opened from now on.
+
+    output is a JSON file path written at exit; without one a summary is
+    printed to stderr at exit. at_exit=False skips the exit report for
+    callers that read summary() themselves.
+    """
+    global enabled, _output, _started
+    if not enabled:
+        enabled = True
+        _started = time.perf_counter()
+        if at_exit:
+            atexit.register(_report_at_exit)
+    _output = output or _output
+
+
+def enable_from_env():
+    # FOSS_PROFILE=1 prints at exit; any other non-empty value is a JSON path.
+    value = os.environ.get("FOSS_PROFILE", "").strip()
+    if value and value.lower() not in ("0", "false", "no", "off"):
+        enable(None if value.lower() in ("1", "true", "yes", "on") else value)
+
+
+enable_from_env()
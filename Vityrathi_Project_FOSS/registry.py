@@ -0,0 +1,246 @@
+"""
+Module: registry.py
+Purpose: In-process cache of the aircraft table.
+
+This module handles:
+- Compact aircraft records (__slots__) loaded once and indexed by id, name
+  and model
+- O(1) "does this aircraft exist?" checks from a bitmap of known ids, with
+  no database round-trip for registered aircraft
+- An LRU bound on cached records for fleets larger than the capacity
+- Caching search results per keyword
+- Invalidation: writes through maintenance.add_aircraft_record() update the
+  cache in place; aircraft written by other connections or processes are
+  noticed through a version counter kept by triggers on the aircraft table
+  (aircraft_version), checked before any listing or search is served, so
+  maintenance records and other tables never force a reload
+
+Aircraft are never updated or deleted by FOSS, so a cached record or a
+positive existence answer cannot go stale within one process. Negative answers (unknown ids)
+are always confirmed against the database.
+"""
+
+from collections import OrderedDict
+
+import paging
+
+# Records kept in memory; fleets up to this size are loaded completely
+DEFAULT_CAPACITY = 100000
+
+# Distinct search keywords remembered
+SEARCH_CACHE_SIZE = 256
+
+COLUMNS = ("id", "name", "model", "manufacture_year")
+_SELECT = f"SELECT {', '.join(COLUMNS)} FROM aircraft"
+
+VERSION_TABLE = "aircraft_version"
+
+
+def ensure_version(conn):
+    """Creates the aircraft version counter and the triggers that bump it (idempotent)."""
+    with conn:
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """)
+        conn.execute(f"INSERT OR IGNORE INTO {VERSION_TABLE} (id, version) VALUES (1, 0)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {VERSION_TABLE}_{event.lower()} AFTER {event} ON aircraft
+            BEGIN UPDATE {VERSION_TABLE} SET version = version + 1 WHERE id = 1; END
+            """)
+
+
+class AircraftRecord:
+    """One aircraft row."""
+
+    __slots__ = COLUMNS
+
+    def __init__(self, id, name, model, manufacture_year):
+        self.id = id
+        self.name = name
+        self.model = model
+        self.manufacture_year = manufacture_year
+
+    def as_row(self):
+        """The record as a (id, name, model, manufacture_year) tuple, like a database row."""
+        return (self.id, self.name, self.model, self.manufacture_year)
+
+    def __repr__(self):
+        return f"AircraftRecord{self.as_row()!r}"
+
+
+class AircraftRegistry:
+    """
+    Aircraft cache over one database connection.
+
+    get_conn is called for a connection whenever the database has to be
+    read, so the registry never holds its own. Loading happens on first use.
+    """
+
+    def __init__(self, get_conn, capacity=DEFAULT_CAPACITY):
+        self.get_conn = get_conn
+        self.capacity = capacity
+        self.stats = {"hits": 0, "misses": 0, "loads": 0}
+        self._loaded = False
+
+    # ---------------- loading ---------------- #
+    def invalidate(self):
+        """Drops everything; the next call reloads from the database."""
+        self._loaded = False
+
+    def _aircraft_version(self, conn):
+        # (counter, MAX(id)): the id also tells apart a database file that
+        # was replaced by one whose counter happens to match
+        return conn.execute(
+            f"SELECT version, (SELECT MAX(id) FROM aircraft) FROM {VERSION_TABLE}").fetchone()
+
+    def _load(self):
+        conn = self.get_conn()
+        self.stats["loads"] += 1
+        self._version = self._aircraft_version(conn)
+        self._records = OrderedDict()
+        self._by_name = {}
+        self._by_model = {}
+        self._searches = OrderedDict()
+
+        # Bitmap of registered ids: one bit per id, so 1M aircraft cost 125 KB
+        max_id = conn.execute("SELECT MAX(id) FROM aircraft").fetchone()[0] or 0
+        self._ids = bytearray((max_id >> 3) + 1)
+        count = 0
+        for (aircraft_id,) in conn.execute("SELECT id FROM aircraft"):
+            self._ids[aircraft_id >> 3] |= 1 << (aircraft_id & 7)
+            count += 1
+
+        # Small enough to hold completely: load every record and index it
+        self.complete = count <= self.capacity
+        if self.complete:
+            for row in conn.execute(_SELECT + " ORDER BY id"):
+                self._index(AircraftRecord(*row))
+        self._loaded = True
+
+    def _ensure_fresh(self):
+        # Reloads if never loaded or the aircraft table has changed since.
+        if not self._loaded or self._aircraft_version(self.get_conn()) != self._version:
+            self._load()
+
+    def _index(self, record):
+        self._records[record.id] = record
+        if self.complete:
+            self._by_name.setdefault(record.name.lower(), []).append(record.id)
+            self._by_model.setdefault(record.model.lower(), []).append(record.id)
+
+    def _remember(self, row):
+        # Adds a record found in (or just written to) the database.
+        record = AircraftRecord(*row)
+        aircraft_id = record.id
+        if aircraft_id >> 3 >= len(self._ids):
+            self._ids.extend(bytearray((aircraft_id >> 3) + 1 - len(self._ids)))
+        self._ids[aircraft_id >> 3] |= 1 << (aircraft_id & 7)
+
+        if self.complete and len(self._records) >= self.capacity:
+            # Outgrew the capacity: keep the id bitmap, bound the records
+            self.complete = False
+            self._by_name.clear()
+            self._by_model.clear()
+        self._index(record)
+        if not self.complete:
+            while len(self._records) > self.capacity:
+                self._records.popitem(last=False)
+        self._searches.clear()
+        return record
+
+    # ---------------- lookups ---------------- #
+    def exists(self, aircraft_id):
+        """True if the aircraft is registered (O(1) for registered ids)."""
+        if not self._loaded:
+            self._load()
+        if 0 <= aircraft_id >> 3 < len(self._ids) and self._ids[aircraft_id >> 3] & (1 << (aircraft_id & 7)):
+            self.stats["hits"] += 1
+            return True
+        return self._fetch(aircraft_id) is not None
+
+    def get(self, aircraft_id):
+        """Returns the AircraftRecord for an id, or None."""
+        if not self._loaded:
+            self._load()
+        record = self._records.get(aircraft_id)
+        if record is not None:
+            self.stats["hits"] += 1
+            if not self.complete:
+                self._records.move_to_end(aircraft_id)
+            return record
+        return self._fetch(aircraft_id)
+
+    def _fetch(self, aircraft_id):
+        self.stats["misses"] += 1
+        row = self.get_conn().execute(_SELECT + " WHERE id = ?", (aircraft_id,)).fetchone()
+        return self._remember(row) if row else None
+
+    def _lookup(self, column, value):
+        # Exact, case-insensitive match on name or model.
+        self._ensure_fresh()
+        value = value.strip().lower()
+        if self.complete:
+            self.stats["hits"] += 1
+            # Looked up after _ensure_fresh(), which may have rebuilt the index
+            index = self._by_name if column == "name" else self._by_model
+            return [self._records[i] for i in index.get(value, ())]
+        self.stats["misses"] += 1
+        rows = self.get_conn().execute(_SELECT + f" WHERE lower({column}) = ? ORDER BY id", (value,))
+        return [AircraftRecord(*row) for row in rows]
+
+    def by_name(self, name):
+        """Records whose name equals name (case-insensitive)."""
+        return self._lookup("name", name)
+
+    def by_model(self, model):
+        """Records whose model equals model (case-insensitive)."""
+        return self._lookup("model", model)
+
+    def search(self, keyword, finder):
+        """
+        Cached substring search: finder(keyword) runs only on a cache miss
+        and must return the matching rows.
+        """
+        self._ensure_fresh()
+        key = keyword.lower()
+        rows = self._searches.get(key)
+        if rows is None:
+            self.stats["misses"] += 1
+            rows = self._searches[key] = tuple(finder(keyword))
+            if len(self._searches) > SEARCH_CACHE_SIZE:
+                self._searches.popitem(last=False)
+        else:
+            self.stats["hits"] += 1
+            self._searches.move_to_end(key)
+        return list(rows)
+
+    def iter_pages(self, order="id", descending=False, page_size=paging.DEFAULT_PAGE_SIZE):
+        """
+        Same pages as paging.iter_pages() over the aircraft table, served
+        from memory when the whole fleet is loaded.
+        """
+        self._ensure_fresh()
+        if not self.complete:
+            yield from paging.iter_pages(self.get_conn(), "aircraft", ", ".join(COLUMNS),
+                                         order=order, descending=descending, page_size=page_size)
+            return
+        self.stats["hits"] += 1
+        ids = sorted(self._records, reverse=descending)
+        for start in range(0, len(ids), page_size):
+            yield [self._records[i].as_row() for i in ids[start:start + page_size]]
+
+    # ---------------- writes ---------------- #
+    def added(self, aircraft_id, name, model, manufacture_year):
+        """Records an aircraft this process has just inserted."""
+        if not self._loaded:
+            return  # the first load will read it from the database
+        self._remember((aircraft_id, name, model, manufacture_year))
+        # Only this insert bumped the counter: the cache is current. If
+        # anyone else wrote too, the next listing or search reloads.
+        version = self._aircraft_version(self.get_conn())
+        if version == (self._version[0] + 1, aircraft_id):
+            self._version = version
@@ -0,0 +1,395 @@
+"""
+Module: snapshot.py
+Purpose: Online snapshots of the FOSS databases, and restoring them.
+
+This module handles:
+- Copying maintenance.db, weather.db, fuel.db and every per-station weather
+  database (stations/<code>.db) with SQLite's online backup API,
+  PAGES_PER_STEP pages at a time, while the app keeps writing
+- Taking all copies from the same moment: read-only connections attach the
+  files (up to FILES_PER_CONNECTION each) and open their read transactions
+  on all of them before the first page is copied (WAL readers never block
+  writers)
+- Writing each snapshot to a timestamped directory with a manifest
+  (page counts, sizes, SHA-256, throughput)
+- Verifying a snapshot (checksums and PRAGMA quick_check) and restoring it
+  into the live databases, again page by page
+
+Pages are streamed file to file, so memory use does not grow with the size
+of the databases. While a snapshot is being taken the WAL files cannot be
+checkpointed past its read transaction and grow until it finishes.
+
+    python foss.py snapshot create
+    python foss.py snapshot list
+    python foss.py snapshot restore foss-20250101-120000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import db
+import fuel_calc
+import maintenance
+import stations
+import weather
+
+BACKUP_DIR = "backups"
+MANIFEST = "manifest.json"
+
+# Pages copied per backup step (4096 pages = 16 MB at the default page size)
+PAGES_PER_STEP = 4096
+
+# Files read through one snapshot connection: main plus attached ones
+# (SQLite allows 10 attached databases by default)
+FILES_PER_CONNECTION = 10
+
+# Read size when checksumming files
+HASH_CHUNK = 1 << 20
+
+
+def _databases():
+    # (name in the snapshot, module, path) for every live database; paths
+    # are read at call time (bench.py moves them). Station databases keep
+    # their stations/ directory inside the snapshot.
+    databases = [(os.path.basename(module.DB_PATH), module, module.DB_PATH)
+                 for module in (maintenance, weather, fuel_calc)]
+    databases += [(f"{stations.SHARD_DIR_NAME}/{station}.db", None, path)
+                  for station, path in stations.shards()]
+    return databases
+
+
+def _live_path(filename):
+    # Where a snapshot file is restored to: (module or None, path)
+    for module in (maintenance, weather, fuel_calc):
+        if filename == os.path.basename(module.DB_PATH):
+            return module, module.DB_PATH
+    directory, _, name = filename.rpartition("/")
+    if directory != stations.SHARD_DIR_NAME:
+        raise ValueError(f"Unknown file in snapshot: {filename}")
+    return None, stations.shard_path(name[:-len(".db")])
+
+
+def _file(archive, filename):
+    return os.path.join(archive, *filename.split("/"))
+
+
+def _open_sources(databases):
+    """
+    Opens read-only connections over databases, attaching up to
+    FILES_PER_CONNECTION files to each. Returns the connections and, per
+    database, (connection, schema name).
+    """
+    connections, schemas = [], []
+    try:
+        for n, (_, _, path) in enumerate(databases):
+            slot = n % FILES_PER_CONNECTION
+            if slot == 0:
+                connections.append(db.open_read_only(path))
+                schemas.append((connections[-1], "main"))
+            else:
+                db.attach(connections[-1], f"db{slot}", path, read_only=True)
+                schemas.append((connections[-1], f"db{slot}"))
+    except BaseException:
+        for conn in connections:
+            conn.close()
+        raise
+    return connections, schemas
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy(source, target, name="main", label="", progress=None):
+    """
+    Copies one database with the backup API, PAGES_PER_STEP pages per step.
+
+    progress(label, pages_done, pages_total), if given, runs after every
+    step. Returns (pages, page_size, seconds).
+    """
+    page_size = source.execute(f"PRAGMA {name}.page_size").fetchone()[0]
+    pages = [0]
+
+    def step(status, remaining, total):
+        pages[0] = total
+        if progress:
+            progress(label, total - remaining, total)
+
+    start = time.perf_counter()
+    source.backup(target, pages=PAGES_PER_STEP, progress=step, name=name)
+    return pages[0], page_size, time.perf_counter() - start
+
+
+def _throughput(size, seconds):
+    return round(size / 1e6 / seconds, 1) if seconds > 0 else 0.0
+
+
+# ------------------------------------------------------ #
+# Create
+# ------------------------------------------------------ #
+def _archive_path(directory):
+    # foss-YYYYmmdd-HHMMSS, with a suffix if that second is already taken
+    base = os.path.join(directory, datetime.now().strftime("foss-%Y%m%d-%H%M%S"))
+    path, n = base, 1
+    while os.path.exists(path) or os.path.exists(path + ".partial"):
+        n += 1
+        path = f"{base}-{n}"
+    return path
+
+
+def create_snapshot(directory=None, verify=False, progress=None):
+    """
+    Takes a consistent snapshot of every database (written to
+    <archive>.partial, then renamed); returns the manifest.
+    """
+    directory = directory or BACKUP_DIR
+    os.makedirs(directory, exist_ok=True)
+    archive = _archive_path(directory)
+    partial = archive + ".partial"
+    os.makedirs(partial)
+
+    for module in (maintenance, weather, fuel_calc):
+        module.get_db()  # creates missing files and brings schemas up to date
+    db.flush()  # batched writes (station databases included) waiting for their commit
+    databases = _databases()
+
+    connections, schemas = _open_sources(databases)
+    try:
+        # A read transaction on every file before anything is copied: every
+        # later backup step reads this same snapshot, and writers are never
+        # blocked. (SQLite starts a file's read transaction when the file is
+        # first read, attached or not, so the files are pinned one after
+        # the other here, before the first page is copied.)
+        for conn in connections:
+            conn.execute("BEGIN")
+        for conn, schema in schemas:
+            conn.execute(f"SELECT count(*) FROM {schema}.sqlite_master").fetchone()
+        created = datetime.now().isoformat(timespec="seconds")
+
+        manifest = {"created": created, "sqlite_version": sqlite3.sqlite_version, "databases": {},
+                    "stations": [filename.rpartition("/")[2][:-len(".db")]
+                                 for filename, module, _ in databases if module is None]}
+        start = time.perf_counter()
+        for (filename, _, path), (source, schema) in zip(databases, schemas):
+            target_path = _file(partial, filename)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            target = sqlite3.connect(target_path)
+            try:
+                pages, page_size, seconds = _copy(source, target, schema, filename, progress)
+                # Self-contained file: no -wal/-shm needed to read it back
+                target.execute("PRAGMA journal_mode = DELETE")
+                if verify:
+                    result = target.execute("PRAGMA quick_check").fetchone()[0]
+                    if result != "ok":
+                        raise sqlite3.DatabaseError(f"{filename}: quick_check failed: {result}")
+                user_version = target.execute("PRAGMA user_version").fetchone()[0]
+            finally:
+                target.close()
+            size = os.path.getsize(target_path)
+            manifest["databases"][filename] = {
+                "source": os.path.abspath(path),
+                "pages": pages,
+                "page_size": page_size,
+                "bytes": size,
+                "user_version": user_version,
+                "sha256": _sha256(target_path),
+                "seconds": round(seconds, 4),
+                "mb_per_sec": _throughput(size, seconds),
+            }
+        for conn in connections:
+            conn.rollback()
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    finally:
+        for conn in connections:
+            conn.close()
+
+    seconds = time.perf_counter() - start
+    total = sum(entry["bytes"] for entry in manifest["databases"].values())
+    manifest.update(bytes=total, seconds=round(seconds, 4), mb_per_sec=_throughput(total, seconds))
+    with open(os.path.join(partial, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.rename(partial, archive)
+    manifest["path"] = archive
+    return manifest
+
+
+# ------------------------------------------------------ #
+# List / verify
+# ------------------------------------------------------ #
+def resolve(archive, directory=None):
+    """Accepts an archive path or a name inside the backup directory."""
+    if os.path.isdir(archive):
+        return archive
+    path = os.path.join(directory or BACKUP_DIR, archive)
+    if os.path.isdir(path):
+        return path
+    raise ValueError(f"Snapshot '{archive}' not found.")
+
+
+def load_manifest(archive):
+    """Returns the manifest of a snapshot directory."""
+    path = os.path.join(archive, MANIFEST)
+    if not os.path.exists(path):
+        raise ValueError(f"{archive} is not a FOSS snapshot (no {MANIFEST}).")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_snapshots(directory=None):
+    """Returns (name, manifest) for every complete snapshot, oldest first."""
+    directory = directory or BACKUP_DIR
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            snapshots.append((name, load_manifest(path)))
+    return snapshots
+
+
+def verify_snapshot(archive, names=None):
+    """
+    Checks a snapshot's files against its manifest (SHA-256) and with
+    PRAGMA quick_check. Raises ValueError on the first problem.
+    """
+    manifest = load_manifest(archive)
+    for filename, entry in manifest["databases"].items():
+        if names and filename not in names:
+            continue
+        path = _file(archive, filename)
+        if not os.path.exists(path):
+            raise ValueError(f"{filename} is missing from {archive}.")
+        if _sha256(path) != entry["sha256"]:
+            raise ValueError(f"{filename} does not match its checksum; the snapshot is damaged.")
+        conn = db.open_read_only(path)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != "ok":
+            raise ValueError(f"{filename}: quick_check failed: {result}")
+    return manifest
+
+
+# ------------------------------------------------------ #
+# Restore
+# ------------------------------------------------------ #
+def restore_snapshot(archive, names=None, progress=None):
+    """
+    Verifies a snapshot and copies it (or the files in names) back over the
+    live databases; a full restore also drops newer station databases.
+    """
+    unknown = set(names or ()) - set(load_manifest(archive)["databases"])
+    if unknown:
+        raise ValueError(f"Not in this snapshot: {', '.join(sorted(unknown))}")
+    manifest = verify_snapshot(archive, names)
+    stations.close_readers()  # pooled fan-out connections to the old files
+
+    results = {}
+    for filename in manifest["databases"]:
+        if names and filename not in names:
+            continue
+        module, path = _live_path(filename)
+        db.close(path)  # the shared connection is reopened (and upgraded) below
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        source = db.open_read_only(_file(archive, filename))
+        target = db.open_connection(path)
+        try:
+            pages, page_size, seconds = _copy(source, target, label=filename, progress=progress)
+            target.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            source.close()
+            target.close()
+        if module is not None:
+            module.get_db()
+        size = pages * page_size
+        results[filename] = {"pages": pages, "bytes": size, "seconds": round(seconds, 4),
+                             "mb_per_sec": _throughput(size, seconds)}
+
+    # Snapshots from before station databases were included say nothing
+    # about them ("stations" missing); leave those alone
+    if not names and "stations" in manifest:
+        for station, path in stations.shards():
+            if station not in manifest["stations"]:
+                db.close(path)
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+                results[f"{stations.SHARD_DIR_NAME}/{station}.db"] = {"removed": True}
+
+    maintenance.invalidate_cache()  # restored aircraft table; drop cached records
+    weather.invalidate_stats()
+    return results
+
+
+# ------------------------------------------------------ #
+# Command line
+# ------------------------------------------------------ #
+def _print_progress(label, done, total):
+    # Live percentage on stderr, only when it is a terminal.
+    if sys.stderr.isatty():
+        end = "\n" if done == total else ""
+        print(f"\r{label}: {done * 100 // max(total, 1):3d}%", end=end, file=sys.stderr, flush=True)
+
+
+def _print_copies(entries):
+    for filename, entry in entries.items():
+        if entry.get("removed"):
+            print(f"{filename}: removed (not in the snapshot)")
+            continue
+        print(f"{filename}: {entry['bytes'] / 1e6:.1f} MB in {entry['seconds']:.2f} s "
+              f"({entry['mb_per_sec']} MB/s)")
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Snapshot and restore the FOSS databases")
+    actions = parser.add_subparsers(dest="action", required=True)
+    p = actions.add_parser("create", help="take a consistent online snapshot of every database")
+    p.add_argument("--dir", help=f"backup directory (default: {BACKUP_DIR})")
+    p.add_argument("--verify", action="store_true", help="run PRAGMA quick_check on each copy")
+    p = actions.add_parser("list", help="list snapshots")
+    p.add_argument("--dir", help=f"backup directory (default: {BACKUP_DIR})")
+    p = actions.add_parser("restore", help="replace the live databases with a snapshot")
+    p.add_argument("archive", help="snapshot directory, or its name in the backup directory")
+    p.add_argument("--dir", help=f"backup directory (default: {BACKUP_DIR})")
+    p.add_argument("--only", nargs="+", metavar="FILE",
+                   help="restore only these files (e.g. weather.db or stations/VIDP.db)")
+    return parser
+
+
+def report(args):
+    if args.action == "create":
+        manifest = create_snapshot(args.dir, args.verify, _print_progress)
+        _print_copies(manifest["databases"])
+        print(f"Snapshot {manifest['path']}: {manifest['bytes'] / 1e6:.1f} MB in "
+              f"{manifest['seconds']:.2f} s ({manifest['mb_per_sec']} MB/s)")
+    elif args.action == "list":
+        snapshots = list_snapshots(args.dir)
+        if not snapshots:
+            print("No snapshots found.")
+        for name, manifest in snapshots:
+            print(f"{name} | {manifest['created']} | {manifest['bytes'] / 1e6:.1f} MB | "
+                  f"{', '.join(manifest['databases'])}")
+    else:
+        archive = resolve(args.archive, args.dir)
+        _print_copies(restore_snapshot(archive, args.only, _print_progress))
+        print(f"Restored from {archive}.")
+
+
+if __name__ == "__main__":
+    report(build_parser().parse_args())
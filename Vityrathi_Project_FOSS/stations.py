@@ -0,0 +1,315 @@
+"""
+Module: stations.py
+Purpose: Station dimension and per-station shards for weather data.
+
+This module handles:
+- Station codes (ICAO-style, e.g. VIDP) on weather observations
+- Optional sharding: one SQLite file per station under databases/stations/,
+  so writers for different airfields never wait for each other's lock
+- Routing each write to its station's database
+- Fan-out reads: the same query runs on every database on a thread pool,
+  through a pool of reusable read-only connections per database
+- Merging ordered results from all databases as a stream (heapq.merge),
+  holding at most a few pages per database in memory
+
+weather.db stays the home of observations without a station, and of every
+observation while sharding is off (its station column still records where
+they came from). Reads always cover weather.db plus every shard file that
+exists, so turning sharding on or off never hides data. Sharding is turned
+on with configure(True) or the FOSS_WEATHER_SHARDS environment variable.
+
+Observation ids are only unique within one database, so merged rows are
+told apart by (station, id). Fan-out reads see committed data only;
+batched writes still waiting for their group commit (db.write()) are
+committed first.
+"""
+
+import os
+import re
+import threading
+
+import db
+import paging
+
+SHARD_DIR_NAME = "stations"
+
+# Threads used for fan-out reads (SQLite releases the GIL while it works)
+FANOUT_WORKERS = 8
+
+# Pages each database may read ahead of the merge
+PREFETCH_PAGES = 2
+
+_CODE = re.compile(r"^[A-Z0-9]{3,8}$")
+
+sharding = os.environ.get("FOSS_WEATHER_SHARDS", "").strip().lower() in ("1", "true", "yes", "on")
+
+_executor = None
+
+# absolute path -> read-only connections not in use by any thread
+_idle = {}
+_idle_lock = threading.Lock()
+
+
+def configure(enabled):
+    """Turns per-station sharding of new writes on or off."""
+    global sharding
+    sharding = bool(enabled)
+
+
+# ------------------------------------------------------ #
+# Stations and shard files
+# ------------------------------------------------------ #
+def normalize(station):
+    """Returns a station code in upper case, or None for blank; raises ValueError if malformed."""
+    if station is None:
+        return None
+    station = str(station).strip().upper()
+    if station == "":
+        return None
+    if not _CODE.match(station):
+        raise ValueError("Station code must be 3-8 letters or digits (e.g. VIDP).")
+    return station
+
+
+def _weather():
+    import weather  # imported late: weather imports this module
+    return weather
+
+
+def shard_dir():
+    """Directory holding the station shards (next to weather.db)."""
+    return os.path.join(os.path.dirname(_weather().DB_PATH), SHARD_DIR_NAME)
+
+
+def shard_path(station):
+    return os.path.join(shard_dir(), normalize(station) + ".db")
+
+
+def shards():
+    """Returns (station, path) for every shard file that exists, by station."""
+    directory = shard_dir()
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in sorted(os.listdir(directory)):
+        station, ext = os.path.splitext(name)
+        if ext == ".db" and _CODE.match(station):
+            found.append((station, os.path.join(directory, name)))
+    return found
+
+
+def sources(station=None):
+    """
+    Database files a read must cover: weather.db plus every shard, or for
+    one station, weather.db plus that station's shard (if any).
+    """
+    paths = [_weather().DB_PATH]
+    for code, path in shards():
+        if station is None or code == station:
+            paths.append(path)
+    return paths
+
+
+def connection_for(station):
+    """Shared write connection for a station's observations."""
+    weather = _weather()
+    if sharding and station is not None:
+        return db.connect(shard_path(station), weather.create_schema)
+    return weather.get_db()
+
+
+def source_connections(station=None):
+    """
+    Shared write connections to every source database, in sources()
+    order: for work that changes each database in place (re-scoring,
+    change-feed watermarks, which every database keeps for its own rows).
+    """
+    weather = _weather()
+    return [db.connect(path, weather.create_schema) for path in sources(station)]
+
+
+def route(rows, station_index=-1):
+    """
+    Groups rows for writing: returns [(connection, rows)] with each row
+    sent to the database of the station at row[station_index].
+    """
+    if not sharding:
+        return [(_weather().get_db(), rows)] if rows else []
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[station_index], []).append(row)
+    return [(connection_for(station), group) for station, group in groups.items()]
+
+
+# ------------------------------------------------------ #
+# Fan-out reads
+# ------------------------------------------------------ #
+def _pool():
+    global _executor
+    if _executor is None:
+        # concurrent.futures (and the logging it pulls in) costs more to
+        # import than a single-database read; only fan-outs need it
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="weather-fanout")
+    return _executor
+
+
+def _checkout(path):
+    # A read-only connection to path for one task, on any thread.
+    key = os.path.abspath(path)
+    with _idle_lock:
+        idle = _idle.get(key)
+        if idle:
+            return idle.pop()
+    return db.open_read_only(key, check_same_thread=False)
+
+
+def _checkin(path, conn):
+    with _idle_lock:
+        _idle.setdefault(os.path.abspath(path), []).append(conn)
+
+
+def _run(fn, path):
+    # Runs fn(conn) on a pool thread with a borrowed connection.
+    conn = _checkout(path)
+    try:
+        return fn(conn)
+    finally:
+        _checkin(path, conn)
+
+
+def close_readers():
+    """Closes the idle fan-out connections (e.g. before replacing database files)."""
+    with _idle_lock:
+        connections = [conn for idle in _idle.values() for conn in idle]
+        _idle.clear()
+    for conn in connections:
+        conn.close()
+
+
+def _prepare(paths):
+    # weather.db may not exist yet on a fresh install, and pool threads
+    # read through their own connections, which only see committed rows.
+    _weather().init_db()
+    if len(paths) > 1:
+        db.flush()
+    return paths
+
+
+def fan_out(fn, station=None):
+    """
+    Runs fn(conn) against every source database on the thread pool;
+    returns the results in sources() order.
+    """
+    paths = _prepare(sources(station))
+    if len(paths) == 1:
+        return [fn(_weather().get_db())]
+    return list(_pool().map(lambda path: _run(fn, path), paths))
+
+
+def _put(out, item, cancelled):
+    # Waits for room in the queue unless the consumer has gone away.
+    import queue
+
+    while not cancelled.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _produce(path, pages, out, cancelled):
+    # Runs on a reader thread: streams one database's pages into its queue.
+    # Every failure, opening the database included, reaches the consumer.
+    conn = stream = None
+    try:
+        conn = _checkout(path)
+        stream = pages(conn)
+        for page in stream:
+            if not _put(out, page, cancelled):
+                return
+        _put(out, None, cancelled)
+    except Exception as e:
+        _put(out, e, cancelled)
+    finally:
+        if stream is not None:
+            stream.close()
+        if conn is not None:
+            _checkin(path, conn)
+
+
+def _drain(out):
+    # Consumer side of one database's queue.
+    while True:
+        page = out.get()
+        if page is None:
+            return
+        if isinstance(page, Exception):
+            raise page
+        yield from page
+
+
+def merge_pages(pages, key, descending=False, page_size=paging.DEFAULT_PAGE_SIZE, station=None):
+    """
+    Runs pages(conn) on every source database, one thread each, and yields
+    merged pages of page_size rows in key order.
+    """
+    paths = _prepare(sources(station))
+    if len(paths) == 1:
+        yield from pages(_weather().get_db())
+        return
+
+    # Only a merge over several databases needs these
+    import heapq
+    import queue
+
+    cancelled = threading.Event()
+    queues = [queue.Queue(maxsize=PREFETCH_PAGES) for _ in paths]
+    for path, out in zip(paths, queues):
+        threading.Thread(target=_produce, args=(path, pages, out, cancelled),
+                         name="weather-merge", daemon=True).start()
+    try:
+        yield from _rechunk(heapq.merge(*(_drain(out) for out in queues), key=key, reverse=descending),
+                            page_size)
+    finally:
+        cancelled.set()
+
+
+def _rechunk(rows, page_size):
+    # Pages of page_size rows from a row stream.
+    page = []
+    for row in rows:
+        page.append(row)
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def iter_pages(columns, order="id", descending=False, date_from=None, date_to=None,
+               page_size=paging.DEFAULT_PAGE_SIZE, station=None):
+    """
+    Same pages as paging.iter_pages() over the weather table, across every
+    source database. order="date" merges by (date, id, station); order="id"
+    by (id, station), which interleaves the databases' own id sequences.
+    Rows carry the requested columns only.
+    """
+    # Each database returns rows sorted by paging's keys (date, id or id),
+    # so adding station as the last key keeps every stream sorted
+    keys = ("date", "id", "station") if order == "date" else ("id", "station")
+    where, params = ("station = ?", (station,)) if station else (None, ())
+    extra = len(keys)
+
+    def pages(conn):
+        return paging.iter_pages(conn, "weather", f"{columns}, {', '.join(keys)}", order=order,
+                                 descending=descending, date_from=date_from, date_to=date_to,
+                                 page_size=page_size, where=where, params=params)
+
+    def key(row):
+        return tuple("" if value is None else value for value in row[-extra:])
+
+    for page in merge_pages(pages, key, descending, page_size, station):
+        yield [row[:-extra] for row in page]
@@ -0,0 +1,36 @@
+"""
+Shared fixtures for the FOSS tests.
+
+Every test gets its own maintenance, weather and fuel databases in a
+temporary directory; the databases in databases/ are never touched.
+"""
+
+import os
+import sys
+
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+import db  # noqa: E402
+import fuel_calc  # noqa: E402
+import maintenance  # noqa: E402
+import stations  # noqa: E402
+import weather  # noqa: E402
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    """Points every module at empty databases in tmp_path; returns tmp_path."""
+    # Rule and model files are read relative to the package directory
+    monkeypatch.chdir(PACKAGE_DIR)
+    for module, name in ((maintenance, "maintenance.db"), (weather, "weather.db"), (fuel_calc, "fuel.db")):
+        monkeypatch.setattr(module, "DB_PATH", str(tmp_path / name))
+        module.init_db()
+    yield tmp_path
+    db.close_all()
+    stations.close_readers()
+    stations.configure(False)
+    maintenance.invalidate_cache()
+    weather.invalidate_stats()
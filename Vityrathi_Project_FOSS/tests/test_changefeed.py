@@ -0,0 +1,57 @@
+import changefeed
+import maintenance
+
+
+def add(aircraft_id, description):
+    return maintenance.add_maintenance_record(aircraft_id, description, "2025-01-01", "Naveen Rao", 10, "pending")
+
+
+def sync(consumer, **options):
+    return [(op, row[0], row[2]) for op, row in maintenance.maintenance_changes(consumer, **options)]
+
+
+def test_inserts_then_updates(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    first = add(aircraft_id, "Tyre replacement")
+    second = add(aircraft_id, "Brake check")
+    assert sync("reports") == [("insert", first, "Tyre replacement"), ("insert", second, "Brake check")]
+    assert sync("reports") == []
+
+    conn = maintenance.get_db()
+    with conn:
+        conn.execute("UPDATE maintenance SET description = 'Brake overhaul' WHERE id = ?", (second,))
+        conn.execute("UPDATE maintenance SET cost = 20 WHERE id = ?", (first,))
+        conn.execute("UPDATE maintenance SET cost = 30 WHERE id = ?", (second,))
+    third = add(aircraft_id, "Engine wash")
+    with conn:
+        conn.execute("UPDATE maintenance SET cost = 40 WHERE id = ?", (third,))
+
+    # One entry per updated row, in change order; the new row only as an insert
+    assert sync("reports") == [("update", first, "Tyre replacement"), ("update", second, "Brake overhaul"),
+                               ("insert", third, "Engine wash")]
+    assert sync("reports") == []
+
+
+def test_peek_reset_and_separate_consumers(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    record_id = add(aircraft_id, "Tyre replacement")
+
+    assert sync("reports", advance=False) == [("insert", record_id, "Tyre replacement")]
+    assert changefeed.get_watermark(maintenance.get_db(), "maintenance", "reports") == (0, 0)
+    assert sync("reports") == sync("billing") == [("insert", record_id, "Tyre replacement")]
+    assert sorted(row[0] for row in changefeed.consumers(maintenance.get_db())) == ["billing", "reports"]
+
+    changefeed.reset(maintenance.get_db(), "maintenance", "reports")
+    assert sync("reports") == [("insert", record_id, "Tyre replacement")]
+    assert sync("billing") == []
+
+
+def test_stopping_part_way_repeats_the_page(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    ids = [add(aircraft_id, f"Task {n}") for n in range(5)]
+
+    feed = maintenance.maintenance_changes("reports", page_size=2)
+    assert [next(feed)[1][0] for _ in range(3)] == ids[:3]
+    feed.close()
+    # The first page was acknowledged; the second is delivered again
+    assert [row_id for _, row_id, _ in sync("reports", page_size=2)] == ids[2:]
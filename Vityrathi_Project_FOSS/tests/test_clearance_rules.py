@@ -0,0 +1,105 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import clearance_rules
+import weather
+
+
+def scalar_verdict(rules, values):
+    # Reference evaluation: the first failing rule in order wins
+    observation = dict(zip(clearance_rules.FIELDS, values))
+    for rule in rules.rules:
+        value = observation[rule.field]
+        if (rule.min is not None and value < rule.min) or (rule.max is not None and value > rule.max):
+            return rule.reason
+    return clearance_rules.CLEARED
+
+
+def original_verdict(wind, temp, humidity, vis):
+    # The hand-written checks the default rule set replaced
+    if wind > 35:
+        return "NO - High wind"
+    if vis < 3:
+        return "NO - Low visibility"
+    if temp < -20 or temp > 50:
+        return "NO - Unsafe temperature"
+    if humidity > 95:
+        return "NO - High humidity risk"
+    return "YES - Cleared for takeoff"
+
+
+def observations(rules, samples=20000, seed=0):
+    """Random observations plus every limit and its neighbours on both sides."""
+    rng = np.random.default_rng(seed)
+    wind = rng.uniform(0, 60, samples)
+    temp = rng.uniform(-40, 70, samples)
+    hum = rng.uniform(0, 100, samples)
+    vis = rng.uniform(0, 15, samples)
+
+    limits = sorted({limit for rule in rules.rules for _, limit in rule.conditions()})
+    edges = [np.nextafter(x, -np.inf) for x in limits] + limits + [np.nextafter(x, np.inf) for x in limits]
+    grid = np.array(np.meshgrid(edges, edges, edges, edges)).reshape(4, -1)
+    return (np.concatenate([wind, grid[0]]), np.concatenate([temp, grid[1]]),
+            np.concatenate([hum, grid[2]]), np.concatenate([vis, grid[3]]))
+
+
+def sql_verdicts(rules, columns):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE weather (wind_speed REAL, temperature REAL, humidity REAL, visibility REAL)")
+    conn.executemany("INSERT INTO weather VALUES (?, ?, ?, ?)", zip(*(column.tolist() for column in columns)))
+    verdicts = [row[0] for row in conn.execute(f"SELECT {rules.sql_case()} FROM weather ORDER BY rowid")]
+    conn.close()
+    return verdicts
+
+
+RULE_SETS = [(None, None), ("VILH", None), (None, "light"), ("VILH", "light")]
+
+
+@pytest.fixture(params=RULE_SETS, ids=lambda key: f"{key[0] or 'any'}-{key[1] or 'any'}")
+def rules(request):
+    clearance_rules.clear_cache()
+    yield clearance_rules.get_rule_set(*request.param)
+    clearance_rules.clear_cache()
+
+
+def test_all_forms_agree_with_scalar(rules):
+    columns = observations(rules)
+    expected = [scalar_verdict(rules, values) for values in zip(*(column.tolist() for column in columns))]
+
+    assert [rules.evaluate(*values) for values in zip(*columns)] == expected
+    assert [rules.reasons[rules.code(*values)] for values in zip(*columns)] == expected
+    assert weather.clearance_labels(weather.evaluate_clearance_array(*columns, rules), rules).tolist() == expected
+    assert sql_verdicts(rules, columns) == expected
+
+
+def test_default_rules_match_original_checks():
+    rules = clearance_rules.RuleSet(clearance_rules.Rule(**rule) for rule in clearance_rules.DEFAULT_RULES)
+    columns = observations(rules, samples=5000, seed=1)
+    for values in zip(*(column.tolist() for column in columns)):
+        assert rules.evaluate(*values) == original_verdict(*values)
+
+
+def test_integer_and_float_inputs_agree(rules):
+    for values in [(35, 20, 50, 3), (36, 20, 50, 3), (10, -20, 95, 2.999), (10, 50.0001, 0, 10)]:
+        assert rules.evaluate(*values) == rules.evaluate(*map(float, values)) == scalar_verdict(rules, values)
+
+
+def test_rules_file_does_not_depend_on_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    clearance_rules.clear_cache()
+    try:
+        assert "VILH" in clearance_rules.available()[0]
+        assert clearance_rules.get_rule_set("VILH").name == "airport VILH"
+    finally:
+        clearance_rules.clear_cache()
+
+
+def test_unknown_airport_or_category_is_reported(capsys):
+    assert clearance_rules.unknown_selection("VILH", "light") == []
+    clearance_rules.warn_unknown("XXXX", "glider")
+    warnings = capsys.readouterr().err.splitlines()
+    assert len(warnings) == 2
+    assert warnings[0].startswith("Warning: airport 'XXXX' has no rules in ")
+    assert warnings[1].startswith("Warning: category 'glider' has no rules in ")
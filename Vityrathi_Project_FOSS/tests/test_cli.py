@@ -0,0 +1,31 @@
+import shutil
+
+import pytest
+
+import cli
+
+
+@pytest.mark.parametrize("argv, module", [
+    ([], None),
+    (["fuel", "range", "--fuel", "8000"], "fuel"),
+    (["--profile", "maint", "history"], "maint"),
+    (["--profile-json", "out.json", "weather", "check"], "weather"),
+    (["--batch-rows", "500", "--batch-ms=200", "--durability", "full", "menu"], "menu"),
+    (["--batch-r", "500", "export"], "export"),
+    (["--help"], None),
+    (["fuels", "range"], None),
+])
+def test_module_is_found_without_building_a_parser(argv, module):
+    assert cli._chosen_module(argv) == module
+
+
+def test_only_the_chosen_module_gets_subcommands():
+    args = cli.build_parser(modules=("fuel",)).parse_args(["fuel", "range", "--fuel", "8000", "--burn", "2400",
+                                                            "--speed", "720"])
+    assert args.module == "fuel" and args.func is cli.cmd_fuel_range
+
+
+@pytest.mark.parametrize("columns", ["50", "", "abc"])
+def test_help_width_matches_argparse(monkeypatch, columns):
+    monkeypatch.setenv("COLUMNS", columns)
+    assert cli._help_width() == shutil.get_terminal_size().columns - 2
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import clearance_rules
+import columnar
+import maintenance
+import stations
+import weather
+
+
+@pytest.fixture
+def sharded(scratch):
+    stations.configure(True)
+    weather.save_observation(10, 20, 50, 10, "2025-01-01")
+    weather.save_observation(10, 20, 50, 10, "2025-01-01", station="VIDP")
+    weather.save_observation(30, 20, 50, 10, "2025-01-02", station="VIDP")
+    weather.save_observation(10, 20, 50, 1, "2025-01-02", station="VABB")
+    return scratch
+
+
+def exported_rows(directory):
+    export = columnar.open_export("weather", directory)
+    return sorted(zip(export.decode("station"), export["wind_speed"].tolist(), export.decode("clearance"),
+                      export.decode(columnar.SOURCE_COLUMN)), key=str)
+
+
+def stored_rows():
+    return sorted(((row[7], row[1], row[6], "weather.db" if row[7] is None else f"stations/{row[7]}.db")
+                   for row in weather.observations_between()), key=str)
+
+
+def test_export_covers_every_station(sharded):
+    directory = str(sharded / "exports")
+    stats = columnar.export_table("weather", directory)
+    assert (stats["mode"], stats["rows"]) == ("full", 4)
+    assert sorted(columnar.open_export("weather", directory).sources) == [
+        "stations/VABB.db", "stations/VIDP.db", "weather.db"]
+    assert exported_rows(directory) == stored_rows()
+    assert columnar.check_export("weather", directory) == []
+
+
+def test_incremental_export_per_station(sharded):
+    directory = str(sharded / "exports")
+    columnar.export_table("weather", directory)
+
+    weather.save_observation(10, 20, 50, 10, "2025-01-03", station="VIDP")
+    weather.save_observation(10, 20, 50, 10, "2025-01-03", station="VOMM")
+    assert columnar.check_export("weather", directory) == ["stations/VOMM.db: weather rows not in the export"]
+    weather.rescore_weather(clearance_rules.get_rule_set(category="light"))
+    assert columnar.check_export("weather", directory) == ["stations/VIDP.db weather id 2: clearance differs",
+                                                           "stations/VOMM.db: weather rows not in the export"]
+
+    stats = columnar.export_table("weather", directory)
+    assert (stats["mode"], stats["appended"], stats["updated"], stats["rows"]) == ("incremental", 2, 1, 6)
+    assert exported_rows(directory) == stored_rows()
+    assert columnar.check_export("weather", directory) == []
+
+
+def test_free_text_is_not_dictionary_encoded(scratch, monkeypatch):
+    monkeypatch.setattr(columnar, "CHUNK_ROWS", 3)
+    directory = str(scratch / "exports")
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    descriptions = [f"Inspection {n} – cabin" for n in range(7)]
+    for description in descriptions:
+        maintenance.add_maintenance_record(aircraft_id, description, "2025-01-01", "Naveen Rao", 10, "pending")
+    columnar.export_table("maintenance", directory)
+
+    export = columnar.open_export("maintenance", directory)
+    assert export.kinds["description"] == "text" and export.kinds["status"] == "code"
+    assert sorted(export.dictionaries) == ["engineer", "source", "status"]
+    assert export.decode("description").tolist() == descriptions
+    with pytest.raises(TypeError):
+        export["description"]
+
+    conn = maintenance.get_db()
+    with conn:
+        conn.execute("UPDATE maintenance SET description = 'Replaced' WHERE id = 2")
+        conn.execute("UPDATE maintenance SET description = NULL WHERE id = 3")
+    maintenance.add_maintenance_record(aircraft_id, "Brake check", "2025-01-02", "Naveen Rao", 10, "pending")
+    stats = columnar.export_table("maintenance", directory)
+    assert (stats["mode"], stats["appended"], stats["updated"]) == ("incremental", 1, 2)
+    export = columnar.open_export("maintenance", directory)
+    assert export.decode("description").tolist() == (
+        descriptions[:1] + ["Replaced", None] + descriptions[3:] + ["Brake check"])
+    assert columnar.check_export("maintenance", directory) == []
+
+
+def test_columns_grow_without_moving_their_data(scratch):
+    path = str(scratch / "column.npy")
+    columnar._create_column(path, "<i8")
+    for start in (0, 5, 10 ** 6 - 5):
+        columnar._write_rows(path, start, np.arange(start, start + 5))
+        with open(path, "rb") as f:
+            assert columnar._read_header(f) == (start + 5, np.dtype("<i8"), columnar.HEADER_BYTES)
+    column = np.load(path, mmap_mode="r")
+    assert len(column) == 10 ** 6 and column[-1] == 10 ** 6 - 1 and column[7] == 7
@@ -0,0 +1,68 @@
+import sqlite3
+
+import pytest
+
+import db
+import maintenance
+
+
+def legacy_database(dates):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE log (id INTEGER PRIMARY KEY, date TEXT)")
+    conn.executemany("INSERT INTO log (date) VALUES (?)", [(value,) for value in dates])
+    conn.commit()
+    return conn
+
+
+def test_parse_date():
+    assert db.parse_date(" 2025-01-05 ") == "2025-01-05"
+    for text in ("2025-02-30", "2025/01/05", "05-01-2025", "yesterday", ""):
+        with pytest.raises(ValueError, match="YYYY-MM-DD"):
+            db.parse_date(text)
+    assert db.parse_date("2025/01/05", lenient=True) == "2025-01-05"
+    assert db.parse_date("05/01/2025", lenient=True) == "2025-01-05"
+    assert db.parse_date("2025-01-05T10:30:00", lenient=True) == "2025-01-05"
+    assert db.is_valid_date("2025-01-05") and not db.is_valid_date("2025-1-5")
+
+
+def test_legacy_rows_are_migrated_once():
+    conn = legacy_database(["2025/01/05", "2025-01-06", "20250107", "not a date", None])
+    reports = db.ensure_dates(conn, ["log"])
+    assert reports == {"log": {"rewritten": 2, "invalid": 1, "invalid_ids": [4]}}
+    assert [row[0] for row in conn.execute("SELECT date FROM log ORDER BY id")] == [
+        "2025-01-05", "2025-01-06", "2025-01-07", "not a date", None]
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db.DATE_SCHEMA_VERSION
+    assert db.ensure_dates(conn, ["log"]) == {}
+
+
+def test_triggers_reject_bad_dates():
+    conn = legacy_database([])
+    db.ensure_dates(conn, ["log"])
+    conn.execute("INSERT INTO log (date) VALUES ('2025-01-05')")
+    for bad in ("2025/01/05", "2025-02-30"):
+        with pytest.raises(sqlite3.IntegrityError, match="YYYY-MM-DD"):
+            conn.execute("INSERT INTO log (date) VALUES (?)", (bad,))
+        with pytest.raises(sqlite3.IntegrityError, match="YYYY-MM-DD"):
+            conn.execute("UPDATE log SET date = ?", (bad,))
+    conn.execute("INSERT INTO log (date) VALUES (NULL)")
+
+
+def test_version_1_triggers_are_replaced():
+    conn = legacy_database(["2025-01-05"])
+    conn.execute("""
+    CREATE TRIGGER log_date_check_insert BEFORE INSERT ON log
+    WHEN new.date IS NOT NULL AND date(new.date) IS NOT new.date
+    BEGIN SELECT RAISE(ABORT, 'old check'); END
+    """)
+    conn.execute("PRAGMA user_version = 1")
+    db.ensure_dates(conn, ["log"])
+    with pytest.raises(sqlite3.IntegrityError, match="YYYY-MM-DD"):
+        conn.execute("INSERT INTO log (date) VALUES ('2025-04-31')")
+
+
+def test_app_tables_reject_bad_dates(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    with pytest.raises(sqlite3.IntegrityError, match="YYYY-MM-DD"):
+        maintenance.get_db().execute(
+            "INSERT INTO maintenance (aircraft_id, description, date, engineer, cost, status) "
+            "VALUES (?, 'Brake check', '01/02/2025', 'Naveen Rao', 50, 'completed')", (aircraft_id,))
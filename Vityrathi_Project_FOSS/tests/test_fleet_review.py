@@ -0,0 +1,37 @@
+import fleet_review
+import fuel_calc
+import maintenance
+import weather
+
+
+def _fleet():
+    first = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    second = maintenance.add_aircraft_record("Test ATR", "ATR72-600", 2018)
+    maintenance.add_maintenance_record(first, "Tyre replacement", "2024-12-20", "Naveen Rao", 100, "pending")
+    maintenance.add_maintenance_record(second, "A-check", "2025-01-03", "Naveen Rao", 100, "pending")
+    maintenance.add_maintenance_record(second, "C-check", "2025-01-03", "Naveen Rao", 100, "pending")
+    fuel_calc.save_range(8000, 2400, 720, "2024-12-01", first)
+    fuel_calc.save_range(8000, 2000, 720, "2025-01-02", second)
+    fuel_calc.save_range(8000, 1000, 720, "2025-01-04", second)
+    for day in ("2025-01-01", "2025-01-02", "2025-01-03", "2025-01-04", "2025-01-05"):
+        weather.save_observation(10, 20, 50, 10, day)
+    return first, second
+
+
+def test_each_block_starts_from_the_history_before_it(scratch, monkeypatch):
+    first, second = _fleet()
+    # One block per window, so every event sits at or next to a block boundary
+    monkeypatch.setattr(fleet_review, "PARTITIONS_PER_WORKER", 5)
+    fleet_review.run_review(workers=1)
+    rows = list(fleet_review.review_rows())
+    pending = {(row[0], row[2]): row[6] for row in rows}
+    ranges = {(row[0], row[2]): row[7] for row in rows}
+
+    assert [pending[f"2025-01-0{day}", first] for day in range(1, 6)] == [1] * 5
+    assert [pending[f"2025-01-0{day}", second] for day in range(1, 6)] == [0, 0, 2, 2, 2]
+    assert [ranges[f"2025-01-0{day}", first] for day in range(1, 6)] == [2400.0] * 5
+    assert [ranges[f"2025-01-0{day}", second] for day in range(1, 6)] == [None, 2880.0, 2880.0, 5760.0, 5760.0]
+
+    monkeypatch.setattr(fleet_review, "PARTITIONS_PER_WORKER", 1)
+    fleet_review.run_review(workers=1)
+    assert list(fleet_review.review_rows()) == rows
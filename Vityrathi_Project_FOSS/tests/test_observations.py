@@ -0,0 +1,31 @@
+import pytest
+
+import weather
+
+GOOD = {"wind_speed": "12", "temperature": "25", "humidity": "60", "visibility": "10", "date": "2025-01-01"}
+
+
+def test_parse_observation():
+    assert weather.parse_observation(GOOD) == (12.0, 25.0, 60.0, 10.0, "2025-01-01")
+    for field, value in [("humidity", "101"), ("wind_speed", "-1"), ("visibility", "-0.5"),
+                         ("date", "2025-02-30"), ("temperature", "warm")]:
+        with pytest.raises(ValueError):
+            weather.parse_observation(dict(GOOD, **{field: value}))
+    with pytest.raises(ValueError):
+        weather.parse_observation({"wind_speed": "12"})
+
+
+@pytest.mark.parametrize("field", ["wind_speed", "temperature", "humidity", "visibility"])
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf", float("nan"), float("inf")])
+def test_non_finite_values_are_rejected(field, value):
+    with pytest.raises(ValueError, match="not a finite number"):
+        weather.parse_observation(dict(GOOD, **{field: value}))
+
+
+def test_import_skips_non_finite_rows(scratch):
+    path = scratch / "feed.jsonl"
+    path.write_text('{"wind_speed": NaN, "temperature": 25, "humidity": 60, "visibility": 10, "date": "2025-01-01"}\n'
+                    '{"wind_speed": 12, "temperature": 25, "humidity": 60, "visibility": 10, "date": "2025-01-01"}\n')
+    stats = weather.import_weather_file(str(path))
+    assert (stats["accepted"], stats["rejected"]) == (1, 1)
+    assert weather.get_db().execute("SELECT wind_speed FROM weather").fetchall() == [(12.0,)]
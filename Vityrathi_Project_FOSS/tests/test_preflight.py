@@ -0,0 +1,58 @@
+import pytest
+
+import fuel_calc
+import maintenance
+import preflight
+import weather
+
+
+@pytest.fixture
+def ready(scratch):
+    """One aircraft with good weather and a range estimate; returns its id."""
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    _, clearance = weather.save_observation(10, 20, 50, 10, "2025-01-01")
+    assert clearance.startswith("YES")
+    fuel_calc.save_range(8000, 2400, 720, "2025-01-01", aircraft_id)
+    return aircraft_id
+
+
+def verdict(aircraft_id, required_range=None):
+    (row,) = preflight.preflight(aircraft_id, required_range)
+    return row[-1]
+
+
+def test_go(ready):
+    assert verdict(ready) == "GO"
+
+
+def test_pending_maintenance_is_no_go(ready):
+    maintenance.add_maintenance_record(ready, "Tyre replacement", "2025-01-02", "Naveen Rao", 100, "pending")
+    assert verdict(ready) == "NO-GO - Pending maintenance"
+
+
+def test_completing_a_record_clears_pending(ready):
+    record_id = maintenance.add_maintenance_record(
+        ready, "Tyre replacement", "2025-01-02", "Naveen Rao", 100, "pending")
+    maintenance.complete_maintenance(record_id)
+    assert maintenance.aircraft_rollup(ready)[2:] == (0, 1)
+    assert verdict(ready) == "GO"
+    with pytest.raises(ValueError):
+        maintenance.complete_maintenance(record_id)
+
+
+def test_completed_record_leaves_pending_records_alone(ready):
+    record_id = maintenance.add_maintenance_record(
+        ready, "Tyre replacement", "2025-01-02", "Naveen Rao", 100, "pending")
+    maintenance.add_maintenance_record(ready, "Tyre replacement", "2025-01-05", "Naveen Rao", 0, "completed")
+    assert maintenance.aircraft_rollup(ready)[2:] == (1, 1)
+    assert verdict(ready) == "NO-GO - Pending maintenance"
+
+    maintenance.complete_maintenance(record_id)
+    assert verdict(ready) == "GO"
+    assert maintenance.check_rollups() == []
+
+
+def test_insufficient_range_and_bad_weather(ready):
+    assert verdict(ready, required_range=100000) == "NO-GO - Insufficient range"
+    weather.save_observation(80, 20, 50, 0.5, "2025-01-02")
+    assert verdict(ready) == "NO-GO - Weather"
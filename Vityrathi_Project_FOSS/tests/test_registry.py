@@ -0,0 +1,57 @@
+import sqlite3
+
+import maintenance
+
+
+def other_connection():
+    # Stands in for another process writing to the same database
+    return sqlite3.connect(maintenance.DB_PATH, isolation_level=None)
+
+
+def listed_ids(cache):
+    return [row[0] for page in cache.iter_pages() for row in page]
+
+
+def test_maintenance_writes_do_not_reload(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    cache = maintenance.get_registry()
+    assert listed_ids(cache) == [aircraft_id]
+    loads = cache.stats["loads"]
+
+    maintenance.add_maintenance_record(aircraft_id, "Tyre replacement", "2025-01-01", "Naveen Rao", 100, "pending")
+    conn = other_connection()
+    conn.execute("INSERT INTO maintenance (aircraft_id, description, date, engineer, cost, status) "
+                 "VALUES (?, 'Brake check', '2025-01-02', 'Naveen Rao', 50, 'completed')", (aircraft_id,))
+    conn.close()
+
+    assert listed_ids(cache) == [aircraft_id]
+    assert [row[0] for row in maintenance.find_aircraft("A320")] == [aircraft_id]
+    assert cache.stats["loads"] == loads
+
+
+def test_own_aircraft_insert_does_not_reload(scratch):
+    first = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    cache = maintenance.get_registry()
+    listed_ids(cache)
+    loads = cache.stats["loads"]
+
+    second = maintenance.add_aircraft_record("Test B737", "B737-800", 2016)
+    assert listed_ids(cache) == [first, second]
+    assert cache.stats["loads"] == loads
+
+
+def test_aircraft_written_elsewhere_reload(scratch):
+    first = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    cache = maintenance.get_registry()
+    listed_ids(cache)
+    loads = cache.stats["loads"]
+
+    conn = other_connection()
+    second = conn.execute("INSERT INTO aircraft (name, model, manufacture_year) "
+                          "VALUES ('Test B737', 'B737-800', 2016)").lastrowid
+    assert listed_ids(cache) == [first, second]
+    assert cache.stats["loads"] == loads + 1
+
+    conn.execute("UPDATE aircraft SET model = 'A320-251N' WHERE id = ?", (first,))
+    conn.close()
+    assert [record.id for record in cache.by_model("A320-251N")] == [first]
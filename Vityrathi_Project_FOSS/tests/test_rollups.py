@@ -0,0 +1,54 @@
+import maintenance
+
+
+def add(aircraft_id, description, date, cost, status):
+    return maintenance.add_maintenance_record(aircraft_id, description, date, "Naveen Rao", cost, status)
+
+
+def test_inserts_update_both_rollups(scratch):
+    first = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    second = maintenance.add_aircraft_record("Test B737", "B737-800", 2016)
+    add(first, "Tyre replacement", "2025-01-05", 100, "pending")
+    add(first, "Brake check", "2025-02-01", 50.5, "completed")
+    add(second, "Engine wash", "2025-01-20", 200, "pending")
+
+    assert maintenance.aircraft_rollup(first) == (150.5, 2, 1, 1)
+    assert maintenance.aircraft_rollup(second) == (200.0, 1, 1, 0)
+    assert maintenance.aircraft_rollup(9999) == (0.0, 0, 0, 0)
+    assert maintenance.monthly_rollups() == [("2025-01", 300.0, 2, 2, 0), ("2025-02", 50.5, 1, 0, 1)]
+    assert maintenance.monthly_rollups("2025-02") == [("2025-02", 50.5, 1, 0, 1)]
+    assert maintenance.check_rollups() == []
+
+
+def test_updates_and_deletes_move_totals(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    record_id = add(aircraft_id, "Tyre replacement", "2025-01-05", 100, "pending")
+    add(aircraft_id, "Brake check", "2025-01-10", 50, "completed")
+
+    conn = maintenance.get_db()
+    with conn:
+        conn.execute("UPDATE maintenance SET date = '2025-03-01', cost = 80 WHERE id = ?", (record_id,))
+    assert maintenance.monthly_rollups() == [("2025-01", 50.0, 1, 0, 1), ("2025-03", 80.0, 1, 1, 0)]
+    assert maintenance.aircraft_rollup(aircraft_id) == (130.0, 2, 1, 1)
+
+    with conn:
+        conn.execute("DELETE FROM maintenance WHERE id = ?", (record_id,))
+    assert maintenance.monthly_rollups() == [("2025-01", 50.0, 1, 0, 1)]
+    assert maintenance.aircraft_rollup(aircraft_id) == (50.0, 1, 0, 1)
+    assert maintenance.check_rollups() == []
+
+
+def test_check_finds_drift_and_rebuild_repairs_it(scratch):
+    aircraft_id = maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    add(aircraft_id, "Tyre replacement", "2025-01-05", 100, "pending")
+
+    conn = maintenance.get_db()
+    with conn:
+        conn.execute("UPDATE maintenance_rollup_aircraft SET total_cost = 1")
+        conn.execute("DELETE FROM maintenance_rollup_month")
+    assert sorted(problem[0] for problem in maintenance.check_rollups()) == [
+        "maintenance_rollup_aircraft", "maintenance_rollup_month"]
+
+    maintenance.rebuild_rollups()
+    assert maintenance.check_rollups() == []
+    assert maintenance.aircraft_rollup(aircraft_id) == (100.0, 1, 1, 0)
@@ -0,0 +1,73 @@
+import pytest
+
+import maintenance
+
+
+def complete(aircraft_id, task, date):
+    maintenance.add_maintenance_record(aircraft_id, task, date, "Naveen Rao", 0, "completed")
+
+
+@pytest.fixture
+def fleet(scratch):
+    return [maintenance.add_aircraft_record("Test A320", "A320-214", 2015),
+            maintenance.add_aircraft_record("Test B737", "B737-800", 2016)]
+
+
+def test_completed_events_advance_next_due(fleet):
+    first, _ = fleet
+    assert maintenance.schedule_task(first, "Tyre replacement", 30, first_due="2025-01-10") == "2025-01-10"
+
+    complete(first, "tyre replacement", "2025-01-05")
+    assert maintenance.next_due_for(first, "Tyre replacement") == "2025-02-04"
+    # Logged out of order: an older event never moves the schedule back
+    complete(first, "Tyre replacement", "2025-01-01")
+    assert maintenance.next_due_for(first, "Tyre replacement") == "2025-02-04"
+    # Another task, and pending records, leave it alone
+    complete(first, "Brake check", "2025-01-20")
+    maintenance.add_maintenance_record(first, "Tyre replacement", "2025-01-25", "Naveen Rao", 0, "pending")
+    assert maintenance.next_due_for(first, "Tyre replacement") == "2025-02-04"
+    assert maintenance.check_schedule() == []
+
+
+def test_scheduling_counts_from_history(fleet):
+    first, _ = fleet
+    complete(first, "Engine wash", "2025-03-01")
+    assert maintenance.schedule_task(first, "Engine wash", 10) == "2025-03-11"
+    assert maintenance.schedule_task(first, "Engine wash", 20) == "2025-03-21"
+
+    with pytest.raises(ValueError):
+        maintenance.schedule_task(first, "Engine wash", 0)
+    with pytest.raises(ValueError):
+        maintenance.schedule_task(9999, "Engine wash", 10)
+
+
+def test_due_queue_is_earliest_first(fleet):
+    first, second = fleet
+    maintenance.schedule_task(first, "Tyre replacement", 30, first_due="2025-02-01")
+    maintenance.schedule_task(second, "Tyre replacement", 30, first_due="2025-01-15")
+    maintenance.schedule_task(first, "Brake check", 60, first_due="2025-01-15")
+
+    due = [(row[0], row[3], row[6]) for row in maintenance.due_maintenance()]
+    assert due == [(first, "Brake check", "2025-01-15"), (second, "Tyre replacement", "2025-01-15"),
+                   (first, "Tyre replacement", "2025-02-01")]
+    assert len(maintenance.due_maintenance(before="2025-01-31")) == 2
+    assert [row[3] for row in maintenance.due_maintenance(aircraft_id=first, limit=1)] == ["Brake check"]
+
+    assert maintenance.unschedule_task(first, "Brake check")
+    assert not maintenance.unschedule_task(first, "Brake check")
+
+
+def test_fleet_schedule_and_rebuild(fleet):
+    first, second = fleet
+    complete(second, "Engine wash", "2025-01-01")
+    assert maintenance.schedule_fleet("Engine wash", 90, first_due="2025-02-01") == 2
+    assert maintenance.next_due_for(first, "Engine wash") == "2025-02-01"
+    assert maintenance.next_due_for(second, "Engine wash") == "2025-04-01"
+
+    conn = maintenance.get_db()
+    with conn:
+        conn.execute("UPDATE maintenance_schedule SET last_done = NULL, next_due = '2025-01-01'")
+    assert [row[:2] for row in maintenance.check_schedule()] == [(second, "Engine wash")]
+    maintenance.rebuild_schedule()
+    assert maintenance.check_schedule() == []
+    assert maintenance.next_due_for(second, "Engine wash") == "2025-04-01"
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+import snapshot
+import stations
+import weather
+
+
+def weather_rows():
+    return sorted((row[5], row[7] or "") for row in weather.observations_between())
+
+
+@pytest.fixture
+def sharded(scratch):
+    stations.configure(True)
+    weather.save_observation(10, 20, 50, 10, "2025-01-01")
+    weather.save_observation(10, 20, 50, 10, "2025-01-01", station="VIDP")
+    weather.save_observation(30, 20, 50, 10, "2025-01-02", station="VABB")
+    return scratch
+
+
+def test_snapshot_includes_every_station(sharded):
+    manifest = snapshot.create_snapshot(str(sharded / "backups"), verify=True)
+    assert sorted(manifest["databases"]) == ["fuel.db", "maintenance.db", "stations/VABB.db",
+                                             "stations/VIDP.db", "weather.db"]
+    assert manifest["stations"] == ["VABB", "VIDP"]
+    assert os.path.exists(os.path.join(manifest["path"], "stations", "VIDP.db"))
+    snapshot.verify_snapshot(manifest["path"])
+
+
+def test_restore_brings_back_station_rows(sharded):
+    before = weather_rows()
+    archive = snapshot.create_snapshot(str(sharded / "backups"))["path"]
+
+    weather.save_observation(10, 20, 50, 10, "2025-01-03", station="VIDP")
+    weather.save_observation(10, 20, 50, 10, "2025-01-03", station="VOMM")
+    list(weather.observations_between())  # leaves pooled readers open on the shards
+    results = snapshot.restore_snapshot(archive)
+
+    assert results["stations/VOMM.db"] == {"removed": True}
+    assert [station for station, _ in stations.shards()] == ["VABB", "VIDP"]
+    assert weather_rows() == before
+
+
+def test_restore_only_one_station(sharded):
+    archive = snapshot.create_snapshot(str(sharded / "backups"))["path"]
+    weather.save_observation(10, 20, 50, 10, "2025-01-03", station="VIDP")
+    weather.save_observation(10, 20, 50, 10, "2025-01-03", station="VABB")
+
+    assert list(snapshot.restore_snapshot(archive, ["stations/VIDP.db"])) == ["stations/VIDP.db"]
+    assert [row[5] for row in weather.observations_between(station="VIDP")] == ["2025-01-01"]
+    assert len(list(weather.observations_between(station="VABB"))) == 2
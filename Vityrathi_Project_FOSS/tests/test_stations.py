@@ -0,0 +1,92 @@
+import sqlite3
+
+import pytest
+
+import clearance_rules
+import fleet_review
+import maintenance
+import stations
+import weather
+
+OBSERVATIONS = [
+    # wind, temp, humidity, visibility, date, station
+    (10, 20, 50, 10, "2025-01-02", "VIDP"),
+    (30, 20, 50, 10, "2025-01-01", "VABB"),
+    (50, 20, 50, 10, "2025-01-03", None),
+    (10, 20, 50, 1, "2025-01-01", "VIDP"),
+    (10, 20, 50, 10, "2025-01-02", "VABB"),
+    (10, 20, 50, 10, "2025-01-01", None),
+]
+
+
+@pytest.fixture
+def sharded(scratch):
+    stations.configure(True)
+    for wind, temp, humidity, vis, day, station in OBSERVATIONS:
+        weather.save_observation(wind, temp, humidity, vis, day, station=station)
+    return scratch
+
+
+def test_rows_go_to_their_station_database(sharded):
+    assert [station for station, _ in stations.shards()] == ["VABB", "VIDP"]
+    assert weather.get_db().execute("SELECT COUNT(*) FROM weather").fetchone()[0] == 2
+
+
+def test_merged_pages_are_in_date_order(sharded):
+    rows = list(weather.observations_between(page_size=2))
+    keys = [(row[5], row[0], row[7] or "") for row in rows]
+    assert len(rows) == len(OBSERVATIONS)
+    assert keys == sorted(keys)
+
+    newest_first = [row for page in stations.iter_pages("date, station", order="date", descending=True,
+                                                        page_size=4) for row in page]
+    assert [row[0] for row in newest_first] == sorted((o[4] for o in OBSERVATIONS), reverse=True)
+
+    vidp = list(weather.observations_between(station="vidp"))
+    assert [(row[5], row[7]) for row in vidp] == [("2025-01-01", "VIDP"), ("2025-01-02", "VIDP")]
+
+
+def test_latest_and_statistics_cover_every_shard(sharded):
+    assert weather.latest_observation()[:2] == (None, "2025-01-03")
+    assert weather.latest_observation("VABB")[:2] == ("VABB", "2025-01-02")
+    assert [row[0] for row in weather.latest_by_station()] == ["VABB", "VIDP"]
+    assert sum(n for _, n, _, _ in weather.clearance_rates("day")) == len(OBSERVATIONS)
+    assert dict(weather.denial_counts()) == {"NO - High wind": 1, "NO - Low visibility": 1}
+
+
+def test_rescore_covers_every_shard(sharded):
+    light = clearance_rules.get_rule_set(category="light")
+    assert weather.rescore_weather(light, dry_run=True) == {"NO - High wind": 1}
+    assert weather.rescore_weather(light) == {"NO - High wind": 1}
+    assert weather.rescore_weather(light) == {}
+    assert dict(weather.denial_counts())["NO - High wind"] == 2
+
+
+def test_change_feed_keeps_a_watermark_per_database(sharded):
+    first = list(weather.observation_changes("sync"))
+    assert sorted((row[7] or "", row[0]) for _, row in first) == sorted(
+        (row[7] or "", row[0]) for row in weather.observations_between())
+    assert list(weather.observation_changes("sync")) == []
+
+    weather.save_observation(10, 20, 50, 10, "2025-01-04", station="VABB")
+    weather.rescore_weather(clearance_rules.get_rule_set(category="light"))
+    changes = list(weather.observation_changes("sync"))
+    assert sorted((op, row[7], row[5]) for op, row in changes) == [
+        ("insert", "VABB", "2025-01-04"), ("update", "VABB", "2025-01-01")]
+
+
+def test_fleet_review_reads_every_shard(sharded):
+    maintenance.add_aircraft_record("Test A320", "A320-214", 2015)
+    assert fleet_review.weather_date_range() == ("2025-01-01", "2025-01-03")
+
+    fleet_review.run_review(workers=1)
+    rows = {row[0]: row for row in fleet_review.review_rows()}
+    assert {day: rows[day][3] for day in rows} == {"2025-01-01": 3, "2025-01-02": 2, "2025-01-03": 1}
+    assert {day: rows[day][4] for day in rows} == {"2025-01-01": 2, "2025-01-02": 2, "2025-01-03": 0}
+
+
+def test_unreadable_shard_raises_instead_of_hanging(sharded):
+    # A directory where a station database should be cannot be opened
+    (sharded / stations.SHARD_DIR_NAME / "VOMM.db").mkdir()
+    with pytest.raises(sqlite3.OperationalError):
+        list(weather.observations_between())
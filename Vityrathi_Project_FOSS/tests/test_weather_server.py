@@ -0,0 +1,65 @@
+import asyncio
+import sqlite3
+
+import weather
+import weather_server
+
+GOOD = {"wind_speed": 12, "temperature": 25, "humidity": 60, "visibility": 10, "date": "2025-01-01"}
+
+
+def stored_rows():
+    return weather.get_db().execute("SELECT COUNT(*) FROM weather").fetchone()[0]
+
+
+async def ingest(server, *lines):
+    host, port = await server.start()
+    try:
+        return await weather_server.send_observations(lines, host, port)
+    finally:
+        await server.stop()
+
+
+def test_acks_follow_the_commit(scratch):
+    server = weather_server.WeatherIngestServer(commit_interval=0.01)
+    replies = asyncio.run(ingest(server, GOOD, dict(GOOD, humidity=150), dict(GOOD, wind_speed=80)))
+    assert [reply["ok"] for reply in replies] == [True, False, True]
+    assert replies[2]["clearance"] == "NO - High wind"
+    assert server.stats["committed"] == 2
+    assert stored_rows() == 2
+
+
+def test_overlong_line_gets_an_error_reply(scratch):
+    server = weather_server.WeatherIngestServer(commit_interval=0.01)
+    replies = asyncio.run(ingest(server, GOOD, b"x" * 70000 + b"\n", GOOD))
+    assert [reply["ok"] for reply in replies] == [True, False]
+    assert replies[1]["error"] == "Line too long."
+    assert stored_rows() == 1
+
+
+def test_failed_commits_stop_the_server(scratch, monkeypatch):
+    monkeypatch.setattr(weather_server, "COMMIT_RETRY_DELAY", 0.001)
+    server = weather_server.WeatherIngestServer(commit_interval=0.01)
+    attempts = []
+
+    def commit(groups):
+        attempts.append(len(groups))
+        raise sqlite3.OperationalError("database is locked")
+    server._commit = commit
+
+    async def run():
+        host, port = await server.start()
+        try:
+            replies = await weather_server.send_observations([GOOD, GOOD], host, port)
+            try:
+                await asyncio.wait_for(server.wait_stopped(), 1)
+            except sqlite3.OperationalError as e:
+                return replies, e
+        finally:
+            await server.stop()
+
+    replies, error = asyncio.run(run())
+    assert str(error) == "database is locked"
+    assert len(attempts) == weather_server.COMMIT_ATTEMPTS
+    assert replies and not any(reply["ok"] for reply in replies)
+    assert replies[0]["error"] == "Not stored: database is locked"
+    assert server.stats["committed"] == 0 and stored_rows() == 0
@@ -0,0 +1,73 @@
+import changefeed
+import clearance_rules
+import weather
+
+LEGACY_CLEARED = "YES – Cleared for takeoff"
+
+
+def insert_raw(rows):
+    # (wind, temp, humidity, visibility, date, clearance) rows, as older versions stored them
+    conn = weather.get_db()
+    with conn:
+        conn.executemany(weather.INSERT_WEATHER_SQL, [row + (None,) for row in rows])
+
+
+def test_rates_denials_and_parameters(scratch):
+    weather.save_observation(10, 20, 50, 10, "2025-01-01")
+    weather.save_observation(50, 20, 50, 10, "2025-01-01")
+    weather.save_observation(10, 20, 50, 1, "2025-01-02")
+
+    assert weather.clearance_rates("day") == [("2025-01-01", 2, 1, 0.5), ("2025-01-02", 1, 0, 0.0)]
+    assert weather.clearance_rates("week") == [("2024-12-30", 3, 1, 1 / 3)]
+    assert weather.denial_counts() == [("NO - High wind", 1), ("NO - Low visibility", 1)]
+    assert weather.parameter_summary()["wind_speed"] == (3, 10, 50, 70 / 3)
+    assert weather.check_stats() == []
+
+
+def test_legacy_cleared_verdicts_are_not_denials(scratch):
+    insert_raw([(10, 20, 50, 10, "2025-01-01", LEGACY_CLEARED),
+                (10, 20, 50, 10, "2025-01-01", clearance_rules.CLEARED),
+                (50, 20, 50, 10, "2025-01-01", "NO - High wind")])
+
+    assert weather.clearance_rates("day") == [("2025-01-01", 3, 2, 2 / 3)]
+    assert weather.denial_counts() == [("NO - High wind", 1)]
+
+
+def test_new_rows_are_folded_in(scratch):
+    weather.save_observation(10, 20, 50, 10, "2025-01-01")
+    assert weather.clearance_rates("day") == [("2025-01-01", 1, 1, 1.0)]
+
+    weather.save_observation(50, 20, 50, 10, "2025-01-01")
+    weather.save_observation(10, 20, 50, 10, "2025-01-03")
+    assert weather.clearance_rates("day") == [("2025-01-01", 2, 1, 0.5), ("2025-01-03", 1, 1, 1.0)]
+    assert weather.check_stats() == []
+
+
+def test_updates_rebuild(scratch):
+    weather.save_observation(30, 20, 50, 10, "2025-01-01")
+    assert weather.denial_counts() == []
+
+    # Stricter limits re-score the stored row through an UPDATE
+    light = clearance_rules.get_rule_set(category="light")
+    assert weather.rescore_weather(light) == {"NO - High wind": 1}
+    assert weather.denial_counts() == [("NO - High wind", 1)]
+    assert weather.clearance_rates("day") == [("2025-01-01", 1, 0, 0.0)]
+    assert weather.check_stats() == []
+
+
+def test_statistics_from_the_old_rule_are_rebuilt(scratch):
+    insert_raw([(10, 20, 50, 10, "2025-01-01", LEGACY_CLEARED)])
+    conn = weather.get_db()
+    weather.refresh_stats(conn)
+    # Simulate tables written by the version that counted only exact matches
+    with conn:
+        conn.execute("UPDATE weather_daily_stats SET cleared = 0")
+    changefeed.set_watermark(conn, "weather", "clearance_stats", *changefeed.get_watermark(
+        conn, "weather", weather.STATS_CONSUMER))
+    conn.execute(f"DELETE FROM {changefeed.WATERMARK_TABLE} WHERE consumer = ?", (weather.STATS_CONSUMER,))
+    conn.commit()
+    weather.invalidate_stats()
+
+    weather.init_stats(conn)
+    assert changefeed.get_watermark(conn, "weather", "clearance_stats") == (0, 0)
+    assert weather.clearance_rates("day") == [("2025-01-01", 1, 1, 1.0)]
@@ -7,24 +7,43 @@ This module handles:
 - Clearance decision based on aviation safety thresholds
 - Viewing historical weather conditions
 - Filtering by clearance decisions
+- Clearance statistics (rates per day/week, denial reasons, parameter
+  ranges), kept up to date incrementally
+- Station codes per observation, with optional per-station database files
+  (see stations.py); history and latest-observation reads span all of them
 """
 
-import sqlite3
+import math
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+import changefeed
+import clearance_rules
+import db
+import paging
+import stations
+
+DB_PATH = "databases/weather.db"
 
 # ------------------------------------------------------ #
 # Database Connection Utility
 # ------------------------------------------------------ #
 def get_db():
-    # Returns a connection to the weather database.
-    return sqlite3.connect("databases/weather.db")
+    # Returns the shared (persistent) connection to the weather database.
+    return db.connect(DB_PATH, create_schema)
 
 
 # ------------------------------------------------------ #
 # Initialize database tables
 # ------------------------------------------------------ #
 def init_db():
+    # Makes sure the tables exist (checked once per process).
+    get_db()
+
+
+def create_schema(conn):
     # Creates weather tables if they do not exist.
-    conn = get_db()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -35,42 +54,154 @@ def init_db():
         humidity REAL,
         visibility REAL,
         date TEXT,
-        clearance TEXT
+        clearance TEXT,
+        station TEXT
     )
     """)
 
+    # Databases created before stations existed
+    if "station" not in [row[1] for row in cursor.execute("PRAGMA table_info(weather)")]:
+        cursor.execute("ALTER TABLE weather ADD COLUMN station TEXT")
+
+    # Latest-observation lookups (preflight) read the tail of this index
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_weather_date
+    ON weather (date, id)
+    """)
+
+    # Per-station history and latest observation
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_weather_station_date
+    ON weather (station, date, id)
+    """)
+
     conn.commit()
-    conn.close()
+    db.ensure_dates(conn, ("weather",))
+    changefeed.ensure_feed(conn, "weather")
+    init_stats(conn)
 
 
 # ------------------------------------------------------ #
 # Aviation Safety Logic
 # ------------------------------------------------------ #
-def evaluate_clearance(wind, temp, humidity, vis):
+def evaluate_clearance(wind, temp, humidity, vis, rules=None):
     """
     Determines whether takeoff is allowed.
 
-    Rules:
-    - wind speed must be < 35 knots
-    - visibility must be > 3 km
+    Default rules (clearance_rules.json), first failing rule wins:
+    - wind speed must not exceed 35 knots
+    - visibility must be at least 3 km
     - temperature must be within -20°C to +50°C
-    - humidity under 90% preferred
+    - humidity must not exceed 95%
+    """
+    if rules is None:
+        rules = clearance_rules.get_rule_set()
+    return rules.evaluate(wind, temp, humidity, vis)
+
+
+# ------------------------------------------------------ #
+# Vectorized Clearance (NumPy)
+# ------------------------------------------------------ #
+# Verdicts of the built-in default rules; index = clearance code.
+CLEARANCE_REASONS = clearance_rules.RuleSet(
+    clearance_rules.Rule(**rule) for rule in clearance_rules.DEFAULT_RULES).reasons
+
+
+def evaluate_clearance_array(wind, temp, humidity, vis, rules=None):
     """
-    if wind > 35:
-        return "NO - High wind"
-    if vis < 3:
-        return "NO - Low visibility"
-    if temp < -20 or temp > 50:
-        return "NO - Unsafe temperature"
-    if humidity > 95:
-        return "NO - High humidity risk"
+    Array counterpart of evaluate_clearance().
+
+    Takes equal-length columns (NumPy arrays, lists or buffers) and returns
+    an int8 array of clearance codes indexing rules.reasons. Rules are
+    applied in the same priority as the scalar function.
+    """
+    rules = rules or clearance_rules.get_rule_set()
+    return rules.evaluate_array(wind, temp, humidity, vis)
+
+
+def clearance_labels(codes, rules=None):
+    # Maps clearance codes back to the verdict strings stored in the database.
+    import numpy as np
+    rules = rules or clearance_rules.get_rule_set()
+    return np.asarray(rules.reasons)[codes]
+
+
+def load_weather_columns(conn=None):
+    """
+    Reads the weather table into NumPy columns in one pass.
+
+    Returns a dict of arrays keyed id, wind_speed, temperature, humidity,
+    visibility. Rows with missing measurements are skipped.
+    """
+    import numpy as np
+
+    dtype = [("id", np.int64), ("wind_speed", np.float64), ("temperature", np.float64),
+             ("humidity", np.float64), ("visibility", np.float64)]
+    if conn is None:
+        conn = get_db()
+    cursor = conn.execute(
+        "SELECT id, wind_speed, temperature, humidity, visibility FROM weather "
+        "WHERE wind_speed IS NOT NULL AND temperature IS NOT NULL "
+        "AND humidity IS NOT NULL AND visibility IS NOT NULL ORDER BY id"
+    )
+    table = np.fromiter(cursor, dtype=dtype)
+    return {name: table[name] for name, _ in dtype}
+
+
+def rescore_weather_history(conn=None, rules=None):
+    """
+    Re-evaluates every stored observation in a single vectorized pass.
+
+    Returns (ids, codes) as NumPy arrays.
+    """
+    cols = load_weather_columns(conn)
+    codes = evaluate_clearance_array(cols["wind_speed"], cols["temperature"],
+                                     cols["humidity"], cols["visibility"], rules)
+    return cols["id"], codes
+
 
-    return "YES - Cleared for takeoff"
+_MEASURED = ("wind_speed IS NOT NULL AND temperature IS NOT NULL "
+             "AND humidity IS NOT NULL AND visibility IS NOT NULL")
+
+
+def rescore_weather(rules=None, dry_run=False, conn=None):
+    """
+    Re-scores every stored clearance under rules in SQL, per database;
+    returns {new verdict: rows changed}. dry_run writes nothing.
+    """
+    rules = rules or clearance_rules.get_rule_set()
+    case = rules.sql_case()
+    changed = f"{_MEASURED} AND clearance IS NOT ({case})"
+    counts = {}
+    for source in [conn] if conn is not None else stations.source_connections():
+        found = source.execute(
+            f"SELECT {case} AS verdict, COUNT(*) FROM weather WHERE {changed} GROUP BY verdict"
+        ).fetchall()
+        if found and not dry_run:
+            with source:
+                source.execute(f"UPDATE weather SET clearance = {case} WHERE {changed}")
+        for verdict, count in found:
+            counts[verdict] = counts.get(verdict, 0) + count
+    return counts
 
 
 # ------------------------------------------------------ #
 # Weather Recording
 # ------------------------------------------------------ #
+INSERT_WEATHER_SQL = (
+    "INSERT INTO weather (wind_speed, temperature, humidity, visibility, date, clearance, station) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _number(value):
+    # float(value), refusing NaN and infinity (they pass every limit check).
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number.")
+    return number
+
+
 def record_weather():
     # Receives the weather data and stores it in database with error handling.
 
@@ -78,7 +209,7 @@ def record_weather():
     while True:
         wind_input = input("Enter wind speed (knots): ").strip()
         try:
-            wind = float(wind_input)
+            wind = _number(wind_input)
             if wind < 0:
                 print("Wind speed cannot be negative.")
                 continue
@@ -90,7 +221,7 @@ def record_weather():
     while True:
         temp_input = input("Enter temperature (°C): ").strip()
         try:
-            temp = float(temp_input)
+            temp = _number(temp_input)
             break
         except:
             print("Enter a valid number for temperature.")
@@ -99,7 +230,7 @@ def record_weather():
     while True:
         hum_input = input("Enter humidity (%): ").strip()
         try:
-            hum = float(hum_input)
+            hum = _number(hum_input)
             if hum < 0 or hum > 100:
                 print("Humidity must be between 0 and 100%.")
                 continue
@@ -111,7 +242,7 @@ def record_weather():
     while True:
         vis_input = input("Enter visibility (km): ").strip()
         try:
-            vis = float(vis_input)
+            vis = _number(vis_input)
             if vis < 0:
                 print("Visibility must be positive.")
                 continue
@@ -119,73 +250,635 @@ def record_weather():
         except:
             print("Enter a valid number for visibility.")
 
-    # Date validation - simple format check
+    # Date validation - real calendar dates only
     while True:
         date = input("Enter date (YYYY-MM-DD): ").strip()
-        if len(date) == 10 and date[4] == "-" and date[7] == "-":
+        if db.is_valid_date(date):
             break
         else:
-            print("Invalid date format. Use YYYY-MM-DD.")
+            print(db.DATE_ERROR)
 
-    # Evaluate takeoff clearance
-    clearance = evaluate_clearance(wind, temp, hum, vis)
+    # Station code (optional)
+    while True:
+        try:
+            station = stations.normalize(input("Enter station code (blank for none): "))
+            break
+        except ValueError as e:
+            print(e)
 
+    # Evaluate takeoff clearance and store
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO weather (wind_speed, temperature, humidity, visibility, date, clearance) VALUES (?, ?, ?, ?, ?, ?)",
-            (wind, temp, hum, vis, date, clearance)
-        )
-        conn.commit()
-        conn.close()
+        _, clearance = save_observation(wind, temp, hum, vis, date, station=station)
 
         print(f"\n Weather recorded successfully.")
         print(f"TAKEOFF CLEARANCE: {clearance}")
+        for failure in clearance_rules.get_rule_set().explain(wind, temp, hum, vis):
+            print(" -", clearance_rules.describe(failure))
+
+    except Exception as e:
+        print("Database Error:", e)
+
+
+# ------------------------------------------------------ #
+# Bulk Import (CSV / JSONL)
+# ------------------------------------------------------ #
+IMPORT_BATCH_SIZE = 5000
+
+
+def parse_observation(raw):
+    """
+    Validates one raw observation with the same rules as record_weather().
+
+    `raw` is a mapping with wind_speed, temperature, humidity, visibility
+    and date keys (values may be strings). Returns the tuple
+    (wind, temp, humidity, vis, date) or raises ValueError.
+    """
+    try:
+        wind = _number(raw["wind_speed"])
+        temp = _number(raw["temperature"])
+        hum = _number(raw["humidity"])
+        vis = _number(raw["visibility"])
+        date = raw["date"]
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"missing or malformed field: {e}")
+
+    if wind < 0:
+        raise ValueError("Wind speed cannot be negative.")
+    if hum < 0 or hum > 100:
+        raise ValueError("Humidity must be between 0 and 100%.")
+    if vis < 0:
+        raise ValueError("Visibility must be positive.")
+    date = db.parse_date(date)
+
+    return wind, temp, hum, vis, date
+
+
+def save_observation(wind, temp, humidity, vis, date, rules=None, station=None):
+    """
+    Validates, scores and stores one observation without prompting; returns
+    (id, clearance). Raises ValueError on invalid input.
+    """
+    wind, temp, humidity, vis, date = parse_observation({
+        "wind_speed": wind, "temperature": temp, "humidity": humidity,
+        "visibility": vis, "date": date,
+    })
+    station = stations.normalize(station)
+    clearance = evaluate_clearance(wind, temp, humidity, vis, rules)
+
+    cursor = db.write(stations.connection_for(station), INSERT_WEATHER_SQL,
+                      (wind, temp, humidity, vis, date, clearance, station))
+    return cursor.lastrowid, clearance
+
+
+def read_observations(path):
+    """Yields raw observations one at a time from a .csv or .jsonl file."""
+    import csv
+    import json
+
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+def score_observations(observations, stats, rules=None):
+    """
+    Validates and scores a stream of raw observations.
+
+    Yields rows ready for INSERT_WEATHER_SQL; invalid observations are
+    skipped and counted in stats["rejected"]. An optional "station" field
+    gives the reporting station.
+    """
+    evaluate = (rules or clearance_rules.get_rule_set()).evaluate
+    for raw in observations:
+        try:
+            wind, temp, hum, vis, date = parse_observation(raw)
+            station = stations.normalize(raw.get("station"))
+        except ValueError:
+            stats["rejected"] += 1
+            continue
+        stats["accepted"] += 1
+        yield (wind, temp, hum, vis, date, evaluate(wind, temp, hum, vis), station)
+
+
+def import_weather_file(path, batch_size=IMPORT_BATCH_SIZE, rules=None):
+    """
+    Streams a CSV/JSONL file into the weather table in batches; returns
+    accepted, rejected, seconds and rows_per_sec.
+    """
+    stats = {"accepted": 0, "rejected": 0}
+    rows = score_observations(read_observations(path), stats, rules)
 
+    start = time.perf_counter()
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        for conn, group in stations.route(batch):
+            with conn:
+                conn.executemany(INSERT_WEATHER_SQL, group)
+    elapsed = time.perf_counter() - start
+
+    stats["seconds"] = elapsed
+    stats["rows_per_sec"] = stats["accepted"] / elapsed if elapsed > 0 else 0.0
+    return stats
+
+
+def import_weather():
+    # Prompts for a CSV/JSONL file and bulk imports it.
+    import csv
+    import json
+
+    path = input("Enter path to CSV/JSONL file: ").strip()
+    if path == "":
+        print("File path cannot be empty.")
+        return
+
+    try:
+        stats = import_weather_file(path)
+    except FileNotFoundError:
+        print("File not found:", path)
+        return
+    except (json.JSONDecodeError, csv.Error, UnicodeDecodeError) as e:
+        print("Could not parse file:", e)
+        return
     except Exception as e:
         print("Database Error:", e)
+        return
+
+    print(f"\n Imported {stats['accepted']} observations "
+          f"({stats['rejected']} rejected) in {stats['seconds']:.2f} s "
+          f"- {stats['rows_per_sec']:.0f} rows/sec")
 
 
 # ------------------------------------------------------ #
 # Record Viewing
 # ------------------------------------------------------ #
+def observations_between(date_from=None, date_to=None, page_size=1000, station=None):
+    """
+    Yields weather rows dated date_from..date_to (inclusive), oldest first.
+
+    Either bound may be None; station limits the rows to one station.
+    Streams page by page along idx_weather_date, merging the station
+    databases when there are any.
+    """
+    pages = stations.iter_pages("*", order="date", date_from=date_from, date_to=date_to,
+                                page_size=page_size, station=stations.normalize(station))
+    for page in pages:
+        yield from page
+
+
+LATEST_COLUMNS = ("station", "date", "clearance", "wind_speed", "temperature", "humidity", "visibility")
+
+
+def _later(rows):
+    # Latest of rows shaped like LATEST_COLUMNS, by date (None if there are none).
+    rows = [row for row in rows if row is not None]
+    return max(rows, key=lambda row: row[1]) if rows else None
+
+
+def latest_observation(station=None):
+    """
+    The most recent dated observation (for one station, or any), as a row
+    shaped like LATEST_COLUMNS, or None.
+    """
+    station = stations.normalize(station)
+    where = "station = ? AND " if station else ""
+    sql = (f"SELECT {', '.join(LATEST_COLUMNS)} FROM weather WHERE {where}date IS NOT NULL "
+           "ORDER BY date DESC, id DESC LIMIT 1")
+    params = (station,) if station else ()
+    return _later(stations.fan_out(lambda conn: conn.execute(sql, params).fetchone(), station))
+
+
+# Distinct stations by skip-scan of idx_weather_station_date (one seek per
+# station), then each station's newest row through the same index
+_LATEST_PER_STATION_SQL = f"""
+WITH RECURSIVE s(station) AS (
+    SELECT MIN(station) FROM weather
+    UNION ALL
+    SELECT (SELECT MIN(station) FROM weather WHERE station > s.station) FROM s WHERE s.station IS NOT NULL
+)
+SELECT {', '.join('w.' + c for c in LATEST_COLUMNS)} FROM s
+JOIN weather w ON w.id = (SELECT id FROM weather WHERE station = s.station AND date IS NOT NULL
+                          ORDER BY date DESC, id DESC LIMIT 1)
+"""
+
+
+def latest_by_station():
+    """The most recent observation of every station, as LATEST_COLUMNS rows by station."""
+    latest = {}
+    for rows in stations.fan_out(lambda conn: conn.execute(_LATEST_PER_STATION_SQL).fetchall()):
+        for row in rows:
+            latest[row[0]] = _later((latest.get(row[0]), row))
+    return [latest[code] for code in sorted(latest)]
+
+
+def observation_changes(consumer, page_size=1000, advance=True):
+    """
+    Yields (op, row) for weather rows changed since consumer's last sync, in
+    weather.db and then each station database.
+    """
+    for conn in stations.source_connections():
+        yield from changefeed.changes(conn, "weather", consumer, page_size, advance)
+
+
 def view_weather_logs():
     # Displays all weather logs.
+    options = paging.ask_view_options(with_dates=True)
+    columns = ("id", "station", "wind_speed", "temperature", "humidity", "visibility", "date", "clearance")
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM weather")
-        rows = cursor.fetchall()
-        conn.close()
-
-        if len(rows) == 0:
-            print("No weather history found.")
-        else:
-            print("\nWeather History:")
-            for row in rows:
-                print(row)
-
+        pages = stations.iter_pages(", ".join(columns), **options)
+        paging.show_pages(pages, "Weather History:", columns, "No weather history found.")
     except Exception as e:
         print("Database Error:", e)
 
 
 def view_clearance_status():
     # Displays only clearance related decisions.
+    options = paging.ask_view_options(with_dates=True)
+    columns = ("date", "station", "wind_speed", "visibility", "clearance")
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT date, wind_speed, visibility, clearance FROM weather")
-        rows = cursor.fetchall()
-        conn.close()
+        pages = stations.iter_pages(", ".join(columns), **options)
+        paging.show_pages(pages, "Clearance Summary:", columns, "No clearance records found.")
+    except Exception as e:
+        print("Database Error:", e)
 
-        if len(rows) == 0:
-            print("No clearance records found.")
+
+# ------------------------------------------------------ #
+# Clearance statistics
+# ------------------------------------------------------ #
+# Per-day aggregates of the weather table, stored next to it. They are not
+# maintained by triggers: each read first folds in the rows added since the
+# last read, found through a change-feed watermark (consumer STATS_CONSUMER).
+# Updates to old rows (rescore_weather, date migration) cannot be folded in
+# without their old values, so any update, or a table that shrank, rebuilds
+# the aggregates from scratch.
+#
+# Each query's answer is also kept in memory as mergeable totals (a
+# _StatsView) tagged with the watermark it reflects. A refresh with no new
+# data costs two small lookups; new rows are aggregated once and merged into
+# every cached view, so the work follows the size of the delta, not of the
+# history.
+#
+# A verdict counts as cleared when it starts with "YES", as in preflight,
+# so legacy rows such as "YES – Cleared for takeoff" are not denials. The
+# consumer name carries a version: changing how rows are aggregated means
+# a new name, whose missing watermark rebuilds the tables once.
+STATS_CONSUMER = "clearance_stats_v2"
+STATS_PARAMETERS = ("wind_speed", "temperature", "humidity", "visibility")
+
+# (database path, kind, period, first day, last day) -> _StatsView; each
+# station database has its own statistics, merged per query
+_stats_cache = {}
+
+
+def invalidate_stats():
+    """Forgets the in-memory statistics."""
+    _stats_cache.clear()
+
+
+def _stats_columns():
+    # Per-parameter aggregate columns of weather_daily_stats, and how to compute them.
+    columns = {}
+    for p in STATS_PARAMETERS:
+        columns[f"{p}_count"] = (f"COUNT({p})", "{col} + excluded.{col}")
+        columns[f"{p}_sum"] = (f"TOTAL({p})", "{col} + excluded.{col}")
+        columns[f"{p}_min"] = (f"MIN({p})", "IFNULL(MIN({col}, excluded.{col}), IFNULL({col}, excluded.{col}))")
+        columns[f"{p}_max"] = (f"MAX({p})", "IFNULL(MAX({col}, excluded.{col}), IFNULL({col}, excluded.{col}))")
+    return columns
+
+
+def init_stats(conn):
+    """Creates the clearance statistics tables (filled on first read)."""
+    parameters = ",\n".join(f"            {col} {'INTEGER NOT NULL' if col.endswith('_count') else 'REAL'}"
+                            for col in _stats_columns())
+    with conn:
+        # Watermarks of earlier versions of the statistics
+        conn.execute(f"DELETE FROM {changefeed.WATERMARK_TABLE} WHERE consumer = 'clearance_stats'")
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS weather_daily_stats (
+            day TEXT PRIMARY KEY NOT NULL,
+            observations INTEGER NOT NULL,
+            cleared INTEGER NOT NULL,
+{parameters}
+        ) WITHOUT ROWID
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS weather_reason_stats (
+            day TEXT NOT NULL,
+            clearance TEXT NOT NULL,
+            observations INTEGER NOT NULL,
+            PRIMARY KEY (day, clearance)
+        ) WITHOUT ROWID
+        """)
+
+
+def _stats_delta(conn, after_id, upto_id):
+    """
+    Aggregates weather rows after_id < id <= upto_id: returns (days,
+    reasons), rows shaped like weather_daily_stats and weather_reason_stats.
+    """
+    columns = _stats_columns()
+    days = conn.execute(f"""
+    SELECT IFNULL(date, ''), COUNT(*), TOTAL(clearance LIKE 'YES%'), {", ".join(expr for expr, _ in columns.values())}
+    FROM weather WHERE id > ? AND id <= ? GROUP BY 1
+    """, (after_id, upto_id)).fetchall()
+    reasons = conn.execute("""
+    SELECT IFNULL(date, ''), IFNULL(clearance, ''), COUNT(*)
+    FROM weather WHERE id > ? AND id <= ? GROUP BY 1, 2
+    """, (after_id, upto_id)).fetchall()
+    return days, reasons
+
+
+def _stats_bounds(conn):
+    # (last weather id, last change seq), read in one statement.
+    return conn.execute(
+        "SELECT (SELECT IFNULL(MAX(id), 0) FROM weather), "
+        "(SELECT IFNULL(MAX(seq), 0) FROM weather_changes)").fetchone()
+
+
+def refresh_stats(conn=None):
+    """
+    Brings the stored clearance statistics up to date; returns the
+    watermark (last weather id, last change seq) they now reflect.
+    """
+    conn = conn or get_db()
+    watermark = changefeed.get_watermark(conn, "weather", STATS_CONSUMER)
+    if _stats_bounds(conn) == watermark:
+        return watermark
+
+    if conn.in_transaction:
+        conn.commit()  # batched writes waiting for their group commit
+    with conn:
+        # Read again under the write lock, so two processes refreshing at
+        # the same time never fold the same rows twice
+        conn.execute("BEGIN IMMEDIATE")
+        last_id, last_seq = changefeed.get_watermark(conn, "weather", STATS_CONSUMER)
+        top_id, top_seq = _stats_bounds(conn)
+        if (top_id, top_seq) == (last_id, last_seq):
+            return last_id, last_seq
+        if last_id == 0 or top_seq > last_seq or top_id < last_id:
+            conn.execute("DELETE FROM weather_daily_stats")
+            conn.execute("DELETE FROM weather_reason_stats")
+            last_id = 0
+
+        columns = _stats_columns()
+        days, reasons = _stats_delta(conn, last_id, top_id)
+        conn.executemany(f"""
+        INSERT INTO weather_daily_stats (day, observations, cleared, {", ".join(columns)})
+        VALUES ({", ".join("?" * (len(columns) + 3))})
+        ON CONFLICT (day) DO UPDATE SET
+            observations = observations + excluded.observations,
+            cleared = cleared + excluded.cleared,
+            {", ".join(f"{col} = " + merge.format(col=col) for col, (_, merge) in columns.items())}
+        """, days)
+        conn.executemany("""
+        INSERT INTO weather_reason_stats (day, clearance, observations) VALUES (?, ?, ?)
+        ON CONFLICT (day, clearance) DO UPDATE SET observations = observations + excluded.observations
+        """, reasons)
+        changefeed.set_watermark(conn, "weather", STATS_CONSUMER, top_id, top_seq)
+    return top_id, top_seq
+
+
+def _week(day):
+    # Monday of day's week (YYYY-MM-DD); unparseable days stand for themselves.
+    try:
+        value = date.fromisoformat(day)
+    except ValueError:
+        return day
+    return (value - timedelta(days=value.weekday())).isoformat()
+
+
+class _StatsView:
+    """
+    Running totals behind one statistics query, for days first..last.
+
+    kind is "rates" (per period: [observations, cleared]), "denials"
+    (per verdict: observations) or "parameters" (per parameter:
+    [count, sum, min, max]).
+    """
+
+    __slots__ = ("kind", "period", "first", "last", "watermark", "totals", "_result")
+
+    def __init__(self, kind, period, first, last):
+        self.kind = kind
+        self.period = period
+        self.first = first
+        self.last = last
+        self.watermark = None
+        self.totals = {}
+        self._result = None
+
+    def load(self, conn):
+        # Reads the stored statistics and their watermark from one snapshot.
+        if conn.in_transaction:
+            conn.commit()  # batched writes waiting for their group commit
+        conn.execute("BEGIN")
+        try:
+            self.watermark = changefeed.get_watermark(conn, "weather", STATS_CONSUMER)
+            table = "weather_reason_stats" if self.kind == "denials" else "weather_daily_stats"
+            self.totals = {}
+            self.add(conn.execute(f"SELECT * FROM {table} WHERE day >= ? AND day <= ?",
+                                  (self.first, self.last)))
+        finally:
+            conn.commit()
+
+    def add(self, rows):
+        """Merges weather_daily_stats rows (weather_reason_stats rows for denials)."""
+        totals = self.totals
+        for row in rows:
+            if not self.first <= row[0] <= self.last:
+                continue
+            if self.kind == "denials":
+                totals[row[1]] = totals.get(row[1], 0) + row[2]
+            elif self.kind == "rates":
+                label = row[0] if self.period == "day" else _week(row[0])
+                entry = totals.setdefault(label, [0, 0])
+                entry[0] += row[1]
+                entry[1] += int(row[2])
+            else:
+                for i, p in enumerate(STATS_PARAMETERS):
+                    count, total, low, high = row[3 + 4 * i:7 + 4 * i]
+                    if not count:
+                        continue
+                    entry = totals.get(p)
+                    if entry is None:
+                        totals[p] = [count, total, low, high]
+                    else:
+                        entry[0] += count
+                        entry[1] += total
+                        entry[2] = min(entry[2], low)
+                        entry[3] = max(entry[3], high)
+        self._result = None
+
+    def merge(self, totals):
+        """Adds another view's totals (same query on another database)."""
+        for name, value in totals.items():
+            entry = self.totals.get(name)
+            if entry is None:
+                self.totals[name] = list(value) if isinstance(value, list) else value
+            elif self.kind == "denials":
+                self.totals[name] = entry + value
+            elif self.kind == "rates":
+                entry[0] += value[0]
+                entry[1] += value[1]
+            else:
+                entry[0] += value[0]
+                entry[1] += value[1]
+                entry[2] = min(entry[2], value[2])
+                entry[3] = max(entry[3], value[3])
+        self._result = None
+
+    def result(self):
+        if self._result is None:
+            totals = self.totals
+            if self.kind == "rates":
+                self._result = [(label, n, cleared, cleared / n) for label, (n, cleared) in sorted(totals.items())]
+            elif self.kind == "denials":
+                self._result = sorted(((verdict, n) for verdict, n in totals.items()
+                                       if not verdict.upper().startswith("YES")), key=lambda item: (-item[1], item[0]))
+            else:
+                self._result = {p: (totals[p][0], totals[p][2], totals[p][3], totals[p][1] / totals[p][0])
+                                if p in totals else (0, None, None, None) for p in STATS_PARAMETERS}
+        return self._result
+
+
+def _stats_view(kind, period, first, last, path):
+    # The cached view for a query on one database, brought up to date.
+    conn = db.connect(path, create_schema)
+    watermark = refresh_stats(conn)
+
+    views = [view for key, view in _stats_cache.items() if key[0] == path]
+    deltas = {}
+    for view in views:
+        start = view.watermark
+        if start == watermark:
+            continue
+        if start[1] == watermark[1] and start[0] < watermark[0]:
+            # Only new rows since this view was computed: merge them in
+            if start not in deltas:
+                deltas[start] = _stats_delta(conn, start[0], watermark[0])
+            days, reasons = deltas[start]
+            view.add(reasons if view.kind == "denials" else days)
+            view.watermark = watermark
         else:
-            print("\nClearance Summary:")
-            for row in rows:
-                print(row)
+            del _stats_cache[(path, view.kind, view.period, view.first, view.last)]
+
+    key = (path, kind, period, first, last)
+    view = _stats_cache.get(key)
+    if view is None:
+        view = _stats_cache[key] = _StatsView(kind, period, first, last)
+        view.load(conn)
+    return view
+
+
+def _stats_query(kind, period, date_from, date_to):
+    # One query over weather.db and every station database, totals merged.
+    first = db.parse_date(date_from) if date_from else ""
+    last = db.parse_date(date_to) if date_to else "9999-99-99"
+    views = [_stats_view(kind, period, first, last, path) for path in stations.sources()]
+    if len(views) == 1:
+        return views[0].result()
+    merged = _StatsView(kind, period, first, last)
+    for view in views:
+        merged.merge(view.totals)
+    return merged.result()
+
+
+def clearance_rates(period="day", date_from=None, date_to=None):
+    """
+    Returns (period, observations, cleared, rate) rows, oldest first.
+
+    period is "day" or "week"; weeks start on Monday and are labelled with
+    that Monday's date. rate is the cleared fraction, 0..1.
+    """
+    if period not in ("day", "week"):
+        raise ValueError("Period must be 'day' or 'week'.")
+    return _stats_query("rates", period, date_from, date_to)
+
+
+def denial_counts(date_from=None, date_to=None):
+    """Returns (verdict, observations) for every denial reason, most frequent first."""
+    return _stats_query("denials", None, date_from, date_to)
+
+
+def parameter_summary(date_from=None, date_to=None):
+    """Returns {parameter: (count, min, max, mean)} over the observations in range."""
+    return _stats_query("parameters", None, date_from, date_to)
+
 
+def check_stats(conn=None, tolerance=1e-6):
+    """
+    Compares the stored daily statistics with a full recompute.
+
+    Returns a list of (table, key, stored, expected) mismatches; empty
+    means consistent.
+    """
+    conn = conn or get_db()
+    refresh_stats(conn)
+    # Stored statistics, their watermark and the recompute from one snapshot
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    try:
+        last_id, _ = changefeed.get_watermark(conn, "weather", STATS_CONSUMER)
+        days, reasons = _stats_delta(conn, 0, last_id)
+        stored_days = conn.execute("SELECT * FROM weather_daily_stats").fetchall()
+        stored_reasons = conn.execute("SELECT * FROM weather_reason_stats").fetchall()
+    finally:
+        conn.commit()
+    expected = {row[0]: row[1:] for row in days}
+    stored = {row[0]: row[1:] for row in stored_days}
+
+    def same(a, b):
+        if a is None or b is None:
+            return a is b
+        return all(x is y if x is None or y is None else abs(x - y) <= tolerance * max(1.0, abs(y))
+                   for x, y in zip(a, b))
+
+    problems = [("weather_daily_stats", day, stored.get(day), expected.get(day))
+                for day in expected.keys() | stored.keys() if not same(stored.get(day), expected.get(day))]
+    expected = {row[:2]: row[2] for row in reasons}
+    stored = {row[:2]: row[2] for row in stored_reasons}
+    problems += [("weather_reason_stats", key, stored.get(key), expected.get(key))
+                 for key in expected.keys() | stored.keys() if stored.get(key) != expected.get(key)]
+    return problems
+
+
+def view_clearance_stats():
+    # Displays clearance rates, denial reasons and parameter ranges.
+    period = input("Group by day or week? [week]: ").strip().lower() or "week"
+    date_from = input("From date (YYYY-MM-DD, blank for all): ").strip() or None
+    date_to = input("To date (YYYY-MM-DD, blank for all): ").strip() or None
+    try:
+        rows = clearance_rates(period, date_from, date_to)
+        if len(rows) == 0:
+            print("No weather history found.")
+            return
+        print(f"\nClearance Rate per {period.capitalize()}:")
+        print(f"{period} | observations | cleared | rate")
+        for label, observations, cleared, rate in rows:
+            print(f"{label} | {observations} | {int(cleared)} | {rate:.1%}")
+
+        print("\nDenials by Reason:")
+        denials = denial_counts(date_from, date_to)
+        if len(denials) == 0:
+            print("No denials.")
+        for verdict, count in denials:
+            print(f"{verdict}: {count}")
+
+        print("\nParameter Summary:")
+        print("parameter | count | min | max | mean")
+        for name, (count, low, high, mean) in parameter_summary(date_from, date_to).items():
+            if count:
+                print(f"{name} | {count} | {low:g} | {high:g} | {mean:.2f}")
+    except ValueError as e:
+        print(e)
     except Exception as e:
         print("Database Error:", e)
 
@@ -197,11 +890,14 @@ def run_weather():
     # Runs the weather module menu.
     init_db()
     while True:
+        db.flush_due()
         print("\n---- Weather & Takeoff Clearance Module ----")
         print("1. Record Weather Data")
         print("2. View Weather Logs")
         print("3. View Clearance Results")
-        print("4. Back to Main Menu")
+        print("4. Import Weather File (CSV/JSONL)")
+        print("5. Clearance Statistics")
+        print("6. Back to Main Menu")
 
         choice = input("Enter choice: ").strip()
 
@@ -212,6 +908,11 @@ def run_weather():
         elif choice == '3':
             view_clearance_status()
         elif choice == '4':
+            import_weather()
+        elif choice == '5':
+            view_clearance_stats()
+        elif choice == '6':
+            db.flush()
             break
         else:
             print("Invalid input, try again.")
\ No newline at end of file
@@ -0,0 +1,399 @@
+"""
+Module: weather_server.py
+Purpose: Live ingestion service for weather station feeds.
+
+This module handles:
+- A local asyncio TCP or Unix-socket server speaking line-delimited JSON
+- Validating each observation with the same rules as record_weather()
+- Scoring it with a compiled clearance rule set (default, or per airport/category)
+- Coalescing writes into periodic group commits on weather.db (or on each
+  station's own database when stations.py sharding is on)
+- Backpressure: readers stop consuming sockets while the writer is behind
+
+Protocol: each request line is one JSON observation, e.g.
+    {"wind_speed": 12, "temperature": 25, "humidity": 60, "visibility": 10, "date": "2025-01-01"}
+with an optional "station" code,
+and each gets one reply line, in order:
+    {"ok": true, "clearance": "YES - Cleared for takeoff"}
+    {"ok": false, "error": "Humidity must be between 0 and 100%."}
+An "ok" reply is sent once the observation's group commit has finished,
+so it means the row is on disk. If a group commit still fails after
+COMMIT_ATTEMPTS tries, its rows get an error reply and the server stops.
+A line longer than the stream limit (64 KiB) gets an error reply and
+ends that client's connection.
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import clearance_rules
+import db
+import stations
+import weather
+
+# Flush socket output once this many reply bytes are buffered
+_DRAIN_THRESHOLD = 64 * 1024
+
+# Tries per group commit (e.g. SQLITE_BUSY), COMMIT_RETRY_DELAY seconds apart, doubling
+COMMIT_ATTEMPTS = 3
+COMMIT_RETRY_DELAY = 0.1
+
+
+def _error_line(message):
+    return (json.dumps({"ok": False, "error": message}) + "\n").encode()
+
+
+class _Client:
+    # Replies of one connection, in request order: [line, ready] entries;
+    # an accepted row's entry becomes ready when its group commit ends.
+
+    __slots__ = ("reader", "writer", "replies", "idle")
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.replies = deque()
+        self.idle = asyncio.Event()
+
+    def flush(self):
+        replies = self.replies
+        while replies and replies[0][1]:
+            self.writer.write(replies.popleft()[0])
+        if not replies:
+            self.idle.set()
+
+
+class WeatherIngestServer:
+    """
+    Accepts observations from many clients and group-commits them (at most
+    batch_size rows per commit; max_pending bounds the queue).
+    """
+
+    def __init__(self, db_path=None, batch_size=5000, commit_interval=0.05, max_pending=20000,
+                 airport=None, category=None):
+        self.db_path = db_path or weather.DB_PATH
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.max_pending = max_pending
+        self.rules = clearance_rules.get_rule_set(airport, category)
+        # Reply lines for accepted observations never change; encode them once.
+        self._acks = [(json.dumps({"ok": True, "clearance": reason}) + "\n").encode()
+                      for reason in self.rules.reasons]
+        self.stats = {"accepted": 0, "rejected": 0, "committed": 0, "commits": 0, "failed": 0}
+        self.error = None  # the commit failure that stopped the server
+
+        self._queue = None
+        self._server = None
+        self._writer_task = None
+        self._clients = {}
+        self._stopped = None
+        # SQLite work happens on one dedicated thread with its own connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather-writer")
+        self._conns = {}
+
+    # ---------------- lifecycle ---------------- #
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Starts listening; returns the bound (host, port) or socket path."""
+        db.connect(self.db_path, weather.create_schema)
+
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._stopped = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer())
+        if path:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=path)
+            return path
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def wait_stopped(self):
+        """Waits until a failed group commit stops the server, then raises its error."""
+        await self._stopped.wait()
+        raise self.error
+
+    async def stop(self):
+        """Stops accepting clients, commits everything queued and closes."""
+        if self._server is not None:
+            self._server.close()
+            # Let in-flight handlers finish queueing before the final commit
+            for client in list(self._clients):
+                client.writer.close()
+            await asyncio.gather(*self._clients.values(), return_exceptions=True)
+            await self._server.wait_closed()
+        if self._writer_task is not None:
+            await self._queue.put(None)
+            await self._writer_task
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close_connection)
+        self._executor.shutdown()
+
+    # ---------------- clients ---------------- #
+    async def _handle_client(self, reader, writer):
+        # Reads one observation per line; replies in order.
+        client = _Client(reader, writer)
+        self._clients[client] = asyncio.current_task()
+        queue, replies = self._queue, client.replies
+        verdict, reasons, acks = self.rules.code, self.rules.reasons, self._acks
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than the stream limit
+                    self.stats["rejected"] += 1
+                    replies.append((_error_line("Line too long."), True))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                if self.error is not None:  # the server is shutting down
+                    replies.append((_error_line(f"Not stored: {self.error}"), True))
+                    break
+                try:
+                    raw = json.loads(line)
+                    wind, temp, hum, vis, date = weather.parse_observation(raw)
+                    station = stations.normalize(raw.get("station"))
+                except (ValueError, TypeError, AttributeError) as e:
+                    self.stats["rejected"] += 1
+                    replies.append((_error_line(str(e)), True))
+                else:
+                    code = verdict(wind, temp, hum, vis)
+                    entry = [acks[code], False]
+                    replies.append(entry)
+                    # Blocks this client (and stops reading its socket) when the queue is full
+                    await queue.put(((wind, temp, hum, vis, date, reasons[code], station), client, entry))
+                    self.stats["accepted"] += 1
+                client.flush()
+
+                if writer.transport.get_write_buffer_size() > _DRAIN_THRESHOLD:
+                    await writer.drain()
+            client.flush()
+            # Replies still waiting for their group commit
+            while replies and not writer.is_closing():
+                client.idle.clear()
+                await client.idle.wait()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.pop(client, None)
+            writer.close()
+
+    # ---------------- group commit ---------------- #
+    async def _writer(self):
+        # Collects queued rows and commits them in groups until stopped.
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.commit_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if self.error is None:
+                await self._commit_batch(loop, batch)
+            else:
+                self._fail(batch)  # rows queued before the failure was seen
+
+    async def _commit_batch(self, loop, batch):
+        # Commits batch, retrying; on final failure stops the server.
+        groups = {}
+        for row, _, _ in batch:
+            groups.setdefault(row[-1] if stations.sharding else None, []).append(row)
+        delay = COMMIT_RETRY_DELAY
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                await loop.run_in_executor(self._executor, self._commit, groups)
+                break
+            except sqlite3.Error as e:
+                print(f"Database Error: group commit of {len(batch)} rows failed "
+                      f"(attempt {attempt}/{COMMIT_ATTEMPTS}): {e}")
+                if attempt == COMMIT_ATTEMPTS:
+                    self.error = e
+                    self._fail(batch)
+                    self._shut_down()
+                    return
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.stats["committed"] += len(batch)
+        self.stats["commits"] += 1
+        clients = set()
+        for _, client, entry in batch:
+            entry[1] = True
+            clients.add(client)
+        for client in clients:
+            client.flush()
+
+    def _fail(self, batch):
+        # Error replies for rows that were not stored.
+        line = _error_line(f"Not stored: {self.error}")
+        clients = set()
+        for _, client, entry in batch:
+            entry[0], entry[1] = line, True
+            clients.add(client)
+        for client in clients:
+            client.flush()
+        self.stats["failed"] += len(batch)
+
+    def _shut_down(self):
+        # A group commit failed for good: stop accepting clients and rows.
+        # Each client's handler sends its remaining replies and closes.
+        print("Weather ingestion stopped: group commits are failing.")
+        self._server.close()
+        queued = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is None:
+                self._queue.put_nowait(None)  # stop() is waiting for the writer
+                break
+            queued.append(item)
+        self._fail(queued)
+        for client in list(self._clients):
+            client.writer.transport.pause_reading()
+            client.reader.feed_eof()
+        self._stopped.set()
+
+    def _connection(self, station):
+        # Runs on the writer thread: its own connection per database file.
+        path = stations.shard_path(station) if stations.sharding and station else self.db_path
+        conn = self._conns.get(path)
+        if conn is None:
+            conn = self._conns[path] = db.open_connection(path)
+            if path != self.db_path:
+                weather.create_schema(conn)  # first observation from this station
+        return conn
+
+    def _commit(self, groups):
+        # Runs on the writer thread; one transaction per database written.
+        # Committed groups are removed, so a retry never writes them twice.
+        for station in list(groups):
+            conn = self._connection(station)
+            with conn:
+                conn.executemany(weather.INSERT_WEATHER_SQL, groups[station])
+            del groups[station]
+
+    def _close_connection(self):
+        for conn in self._conns.values():
+            conn.close()
+        self._conns.clear()
+
+
+# ------------------------------------------------------ #
+# Local client (tests and benchmarks)
+# ------------------------------------------------------ #
+async def send_observations(observations, host="127.0.0.1", port=None, path=None):
+    """
+    Sends observations over one connection; returns the decoded replies.
+
+    Observations may be dicts or pre-encoded JSON lines (bytes). Writing
+    and reading run concurrently so large batches cannot deadlock on full
+    socket buffers.
+    """
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def _send():
+        count = 0
+        for obs in observations:
+            if not isinstance(obs, bytes):
+                obs = (json.dumps(obs) + "\n").encode()
+            writer.write(obs)
+            count += 1
+            if writer.transport.get_write_buffer_size() > _DRAIN_THRESHOLD:
+                await writer.drain()
+        await writer.drain()
+        writer.write_eof()
+        return count
+
+    sender = asyncio.create_task(_send())
+    replies = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        replies.append(json.loads(line))
+    await sender
+    writer.close()
+    return replies
+
+
+async def measure_ingest(observations, clients=4, **server_options):
+    """
+    Runs a server and `clients` local connections sharing the observations.
+
+    Requests are encoded before the clock starts, so the figure reflects
+    the server rather than the client. Returns (server stats, seconds,
+    observations per second).
+    """
+    server = WeatherIngestServer(**server_options)
+    host, port = await server.start()
+    lines = [(json.dumps(obs) + "\n").encode() for obs in observations]
+    shares = [lines[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(send_observations(share, host, port) for share in shares))
+    await server.stop()
+    elapsed = time.perf_counter() - start
+    return server.stats, elapsed, len(observations) / elapsed if elapsed else 0.0
+
+
+# ------------------------------------------------------ #
+# Entry point
+# ------------------------------------------------------ #
+async def _serve(args):
+    clearance_rules.warn_unknown(args.airport, args.category)
+    server = WeatherIngestServer(batch_size=args.batch_size, commit_interval=args.commit_ms / 1000,
+                                 max_pending=args.max_pending, airport=args.airport, category=args.category)
+    address = await server.start(args.host, args.port, args.unix)
+    print(f"Weather ingestion listening on {address}")
+    try:
+        await server.wait_stopped()
+    finally:
+        await server.stop()
+        print(f"Stopped. {server.stats}")
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Line-delimited JSON weather ingestion server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--batch-size", type=int, default=5000, help="max rows per group commit")
+    parser.add_argument("--commit-ms", type=float, default=50, help="max wait before a group commit")
+    parser.add_argument("--max-pending", type=int, default=20000, help="queue bound (backpressure)")
+    parser.add_argument("--airport", help="score with this airport's clearance rules")
+    parser.add_argument("--category", help="score with this aircraft category's clearance rules")
+    return parser
+
+
+def serve(args):
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        print("\nServer stopped by user.")
+
+
+if __name__ == "__main__":
+    serve(build_parser().parse_args())